@@ -0,0 +1,403 @@
+"""Chunked evaluation of assignment logs too large for one evaluate call.
+
+Auditing months of history means evaluating far more assignments than
+`evaluate` comfortably holds as objects. `evaluate_file` streams them from a
+JSON array or JSON Lines file and evaluates them as a map-reduce over a
+process pool:
+
+1. each chunk of assignments is reduced to an `EvaluationAggregate`: the
+   visits it staffs, the caregivers and visit count of each customer, the
+   visits of each caregiver in assignment order and the availability
+   violations. Aggregates of consecutive chunks merge in file order;
+2. the caregivers of the merged aggregate are then sharded over the pool,
+   which finds each caregiver's overlaps, hours per ISO week and
+   neighborhood switches per day from its visits.
+
+The result is the same dict `evaluate` returns for the whole log.
+
+Run `python -m scheduler.audit ASSIGNMENTS` to print it as JSON.
+"""
+
+import argparse
+import json
+import os
+from collections import Counter, defaultdict, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from typing import Any, TypeVar
+
+from .evaluator import (
+    _continuity_score,
+    _count_switches,
+    _get_overlap_violations,
+    _max_hours_violations,
+    _travel_efficiency_score,
+)
+from .models import Assignment, AvailabilityIndex, Caregiver, Visit, iso_week
+from .parser import _iter_json_records, load_caregivers, load_visits
+
+CHUNK_SIZE = 100_000
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+# (visit id, caregiver id): lighter than Assignment objects to send to workers
+_Pair = tuple[str, str]
+
+
+@dataclass
+class _Lookups:
+    """The instance, indexed once per worker process."""
+
+    visit_lookup: dict[str, Visit]
+    caregiver_lookup: dict[str, Caregiver]
+    # built on first use
+    availability: dict[str, AvailabilityIndex] = field(default_factory=dict)
+
+    def is_available(self, caregiver_id: str, visit: Visit) -> bool:
+        index = self.availability.get(caregiver_id)
+        if index is None:
+            caregiver = self.caregiver_lookup[caregiver_id]
+            index = AvailabilityIndex.from_availability(caregiver.availability)
+            self.availability[caregiver_id] = index
+        return index.covers(visit)
+
+
+@dataclass
+class EvaluationAggregate:
+    """Partial evaluation of consecutive assignments, mergeable in order."""
+
+    assignments: int = 0
+    assigned_visits: set[str] = field(default_factory=set)
+    # customer -> ids of its caregivers, customers in order of first assignment
+    customer_caregivers: dict[str, set[str]] = field(default_factory=dict)
+    customer_visits: Counter[str] = field(default_factory=Counter)
+    # caregiver id -> ids of its visits, in assignment order
+    caregiver_visits: dict[str, list[str]] = field(default_factory=dict)
+    availability_violations: list[Assignment] = field(default_factory=list)
+
+    def merge(self, other: "EvaluationAggregate") -> None:
+        """Add the aggregate of the assignments following these ones."""
+        self.assignments += other.assignments
+        self.assigned_visits |= other.assigned_visits
+        for customer, caregiver_ids in other.customer_caregivers.items():
+            self.customer_caregivers.setdefault(customer, set()).update(caregiver_ids)
+        self.customer_visits.update(other.customer_visits)
+        for caregiver_id, visit_ids in other.caregiver_visits.items():
+            self.caregiver_visits.setdefault(caregiver_id, []).extend(visit_ids)
+        self.availability_violations.extend(other.availability_violations)
+
+
+@dataclass
+class _CaregiverTotals:
+    """What one caregiver's visits contribute to the evaluation."""
+
+    overlap_violations: list[dict[str, Any]]
+    # ISO (year, week) -> whole seconds worked
+    week_seconds: dict[tuple[int, int], int]
+    switches: int
+    days: int
+
+
+def _aggregate_chunk(lookups: _Lookups, chunk: list[_Pair]) -> EvaluationAggregate:
+    """Map step: the aggregate of one chunk of assignments."""
+    aggregate = EvaluationAggregate(assignments=len(chunk))
+    for visit_id, caregiver_id in chunk:
+        visit = lookups.visit_lookup[visit_id]
+        aggregate.assigned_visits.add(visit_id)
+        aggregate.customer_caregivers.setdefault(visit.customer, set()).add(
+            caregiver_id
+        )
+        aggregate.customer_visits[visit.customer] += 1
+        aggregate.caregiver_visits.setdefault(caregiver_id, []).append(visit_id)
+        if not lookups.is_available(caregiver_id, visit):
+            aggregate.availability_violations.append(
+                Assignment(visit_id=visit_id, caregiver_id=caregiver_id)
+            )
+    return aggregate
+
+
+def _caregiver_totals(
+    lookups: _Lookups, shard: list[tuple[str, list[str]]]
+) -> list[_CaregiverTotals]:
+    """Overlaps, hours and switches of a shard of caregivers."""
+    totals = []
+    for caregiver_id, visit_ids in shard:
+        caregiver_assigns = [
+            (
+                lookups.visit_lookup[visit_id],
+                Assignment(visit_id=visit_id, caregiver_id=caregiver_id),
+            )
+            for visit_id in visit_ids
+        ]
+        week_seconds: dict[tuple[int, int], int] = defaultdict(int)
+        day_visits = defaultdict(list)
+        for visit, _ in caregiver_assigns:
+            week_seconds[iso_week(visit)] += int(
+                (visit.end - visit.start).total_seconds()
+            )
+            day_visits[visit.weekday].append(visit)
+        totals.append(
+            _CaregiverTotals(
+                overlap_violations=_get_overlap_violations(
+                    {caregiver_id: caregiver_assigns}
+                ),
+                week_seconds=week_seconds,
+                switches=sum(_count_switches(day) for day in day_visits.values()),
+                days=len(day_visits),
+            )
+        )
+    return totals
+
+
+# set in each worker process by _init_worker
+_worker_lookups: _Lookups | None = None
+
+
+def _index(visits: list[Visit], caregivers: list[Caregiver]) -> _Lookups:
+    return _Lookups(
+        visit_lookup={visit.id: visit for visit in visits},
+        caregiver_lookup={caregiver.id: caregiver for caregiver in caregivers},
+    )
+
+
+def _init_worker(visits: list[Visit], caregivers: list[Caregiver]) -> None:
+    global _worker_lookups
+    _worker_lookups = _index(visits, caregivers)
+
+
+def _in_worker(function: Callable[[_Lookups, _T], _R], item: _T) -> _R:
+    assert _worker_lookups is not None
+    return function(_worker_lookups, item)
+
+
+def _map_ordered(
+    function: Callable[[_Lookups, _T], _R],
+    items: Iterable[_T],
+    lookups: _Lookups | None,
+    executor: ProcessPoolExecutor | None,
+    window: int,
+) -> Iterator[_R]:
+    """
+    Apply function to items in order, in the pool when there is one.
+
+    At most window items are in flight, so a stream of chunks is never read
+    further ahead than the pool can work on. Without a pool, lookups are
+    those of the current process.
+    """
+    if executor is None:
+        assert lookups is not None
+        for item in items:
+            yield function(lookups, item)
+        return
+    pending: deque[Future[_R]] = deque()
+    for item in items:
+        pending.append(executor.submit(_in_worker, function, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunks(items: Iterable[_T], size: int) -> Iterator[list[_T]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _shards(
+    caregiver_visits: dict[str, list[str]], size: int
+) -> Iterator[list[tuple[str, list[str]]]]:
+    """Caregivers in order, in shards of about size visits."""
+    shard: list[tuple[str, list[str]]] = []
+    visits = 0
+    for caregiver_id, visit_ids in caregiver_visits.items():
+        shard.append((caregiver_id, visit_ids))
+        visits += len(visit_ids)
+        if visits >= size:
+            yield shard
+            shard, visits = [], 0
+    if shard:
+        yield shard
+
+
+def _evaluation(
+    aggregate: EvaluationAggregate,
+    totals: list[_CaregiverTotals],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+) -> dict[str, Any]:
+    """Reduce step: the evaluate dict of the merged aggregate."""
+    caregiver_week_seconds = {
+        caregiver_id: caregiver_totals.week_seconds
+        for caregiver_id, caregiver_totals in zip(
+            aggregate.caregiver_visits, totals, strict=True
+        )
+    }
+    continuity_score = 0.0
+    travel_efficiency_score = 0.0
+    if aggregate.assignments:
+        continuity_score = _continuity_score(
+            (aggregate.customer_visits[customer], len(caregiver_ids))
+            for customer, caregiver_ids in aggregate.customer_caregivers.items()
+        )
+        travel_efficiency_score = _travel_efficiency_score(
+            sum(caregiver_totals.switches for caregiver_totals in totals),
+            sum(caregiver_totals.days for caregiver_totals in totals),
+        )
+    return {
+        "constraint_violations": {
+            # the set of an id-keyed dict, as evaluate builds it
+            "unassigned_visits": list(
+                set(dict.fromkeys(visit.id for visit in visits))
+                - aggregate.assigned_visits
+            ),
+            "availability_violations": aggregate.availability_violations,
+            "overlap_violations": [
+                violation
+                for caregiver_totals in totals
+                for violation in caregiver_totals.overlap_violations
+            ],
+            "max_hours_violations": _max_hours_violations(
+                caregivers, caregiver_week_seconds
+            ),
+        },
+        "optimization_metrics": {
+            "continuity_score": continuity_score,
+            "travel_efficiency_score": travel_efficiency_score,
+        },
+    }
+
+
+def _evaluate_in(
+    executor: ProcessPoolExecutor | None,
+    window: int,
+    pairs: Iterable[_Pair],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    chunk_size: int,
+) -> dict[str, Any]:
+    lookups = _index(visits, caregivers) if executor is None else None
+    aggregate = EvaluationAggregate()
+    for chunk_aggregate in _map_ordered(
+        _aggregate_chunk, _chunks(pairs, chunk_size), lookups, executor, window
+    ):
+        aggregate.merge(chunk_aggregate)
+    totals = [
+        caregiver_totals
+        for shard_totals in _map_ordered(
+            _caregiver_totals,
+            _shards(aggregate.caregiver_visits, chunk_size),
+            lookups,
+            executor,
+            window,
+        )
+        for caregiver_totals in shard_totals
+    ]
+    return _evaluation(aggregate, totals, visits, caregivers)
+
+
+def evaluate_chunked(
+    assignments: Iterable[Assignment],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    chunk_size: int = CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> dict[str, Any]:
+    """
+    Evaluate a stream of assignments chunk by chunk.
+
+    Args:
+        assignments: Assignments, e.g. streamed from disk; read one chunk per
+            worker ahead of the evaluation
+        visits: List of all visits
+        caregivers: List of all caregivers
+        chunk_size: Assignments per chunk, and visits per caregiver shard
+        max_workers: Worker processes, one per CPU core by default
+
+    Returns:
+        The same dictionary as evaluate over all the assignments
+    """
+    pairs = (
+        (assignment.visit_id, assignment.caregiver_id) for assignment in assignments
+    )
+    return _evaluate_pairs(pairs, visits, caregivers, chunk_size, max_workers)
+
+
+def _evaluate_pairs(
+    pairs: Iterable[_Pair],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    chunk_size: int,
+    max_workers: int | None,
+) -> dict[str, Any]:
+    workers = max_workers or os.cpu_count() or 1
+    if workers <= 1:
+        return _evaluate_in(None, 1, pairs, visits, caregivers, chunk_size)
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(visits, caregivers)
+    ) as executor:
+        # a couple of chunks per worker in flight keeps the pool busy
+        return _evaluate_in(
+            executor, 2 * workers, pairs, visits, caregivers, chunk_size
+        )
+
+
+def evaluate_file(
+    file_path: str,
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    chunk_size: int = CHUNK_SIZE,
+    max_workers: int | None = None,
+) -> dict[str, Any]:
+    """
+    Evaluate the assignments of a file without loading them all.
+
+    Args:
+        file_path: JSON array or JSON Lines file of assignments
+        visits, caregivers, chunk_size, max_workers: As in evaluate_chunked
+
+    Returns:
+        The same dictionary as evaluate over all the assignments
+    """
+    # records go to the workers as pairs, without building Assignment objects
+    pairs = (
+        (record["visit_id"], record["caregiver_id"])
+        for record in _iter_json_records(file_path)
+    )
+    return _evaluate_pairs(pairs, visits, caregivers, chunk_size, max_workers)
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="scheduler.audit", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("assignments", help="JSON or JSON Lines assignments file")
+    parser.add_argument("--visits", default="inputs/visits.json")
+    parser.add_argument("--caregivers", default="inputs/caregivers.json")
+    parser.add_argument(
+        "--chunk-size", type=int, default=CHUNK_SIZE, help="assignments per chunk"
+    )
+    parser.add_argument(
+        "--workers", type=int, help="worker processes, one per core by default"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Print the evaluation of an assignments file as JSON."""
+    args = _parse_args(argv)
+    evaluation = evaluate_file(
+        args.assignments,
+        load_visits(args.visits),
+        load_caregivers(args.caregivers),
+        args.chunk_size,
+        args.workers,
+    )
+    print(json.dumps(evaluation, indent=2, default=asdict))
+
+
+if __name__ == "__main__":
+    main()
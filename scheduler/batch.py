@@ -0,0 +1,218 @@
+"""Batch solving of many instances, e.g. one per agency every night.
+
+Run with `python -m scheduler.batch INSTANCES --output results.jsonl`, where
+INSTANCES is either a directory or a manifest file:
+
+- a directory holds one sub-directory per instance, each with a
+  `visits.json` and a `caregivers.json` (or is itself such an instance);
+- a manifest is a JSON array or JSON Lines file of objects with `name`,
+  `visits` and `caregivers` paths (relative to the manifest) and optionally
+  their own `time_limit` and `workers`.
+
+Instances are solved concurrently in a process pool sized so that the CPU
+allotments of the running instances fit the machine, and each result is
+written as one JSON line as soon as it is ready: throughput over the whole
+batch matters more than the latency of any one instance.
+"""
+
+import argparse
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any
+
+from .evaluator import evaluate
+from .heuristic import solve as solve_heuristic
+from .parser import _iter_json_records, load_caregivers, load_visits
+from .solver import TIME_LIMIT_SECONDS, solve
+
+_VISITS_FILE = "visits.json"
+_CAREGIVERS_FILE = "caregivers.json"
+
+
+@dataclass
+class BatchInstance:
+    """One instance of a batch and the resources allotted to it."""
+
+    name: str
+    visits_path: str
+    caregivers_path: str
+    # time budget (seconds) of the whole solve, shared by its components with
+    # CP-SAT or the wall time of the heuristic solver
+    time_limit: float = TIME_LIMIT_SECONDS
+    # CPU cores given to the instance
+    workers: int = 1
+
+
+def _is_instance_dir(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, _VISITS_FILE)) and os.path.isfile(
+        os.path.join(path, _CAREGIVERS_FILE)
+    )
+
+
+def discover_instances(
+    path: str, time_limit: float = TIME_LIMIT_SECONDS, workers: int = 1
+) -> list[BatchInstance]:
+    """
+    List the instances of a directory or manifest.
+
+    Args:
+        path: Instance directory, directory of instance directories, or
+            manifest file
+        time_limit: Time limit of instances that do not set their own
+        workers: CPU cores of instances that do not set their own
+
+    Returns:
+        The instances, sorted by name for directories and in manifest order
+    """
+    if os.path.isfile(path):
+        base = os.path.dirname(path)
+        return [
+            BatchInstance(
+                name=record["name"],
+                visits_path=os.path.join(base, record["visits"]),
+                caregivers_path=os.path.join(base, record["caregivers"]),
+                time_limit=record.get("time_limit", time_limit),
+                workers=record.get("workers", workers),
+            )
+            for record in _iter_json_records(path)
+        ]
+
+    if _is_instance_dir(path):
+        directories = [path]
+    else:
+        directories = [
+            os.path.join(path, entry)
+            for entry in sorted(os.listdir(path))
+            if _is_instance_dir(os.path.join(path, entry))
+        ]
+    return [
+        BatchInstance(
+            name=os.path.basename(os.path.normpath(directory)),
+            visits_path=os.path.join(directory, _VISITS_FILE),
+            caregivers_path=os.path.join(directory, _CAREGIVERS_FILE),
+            time_limit=time_limit,
+            workers=workers,
+        )
+        for directory in directories
+    ]
+
+
+def solve_instance(instance: BatchInstance, solver: str = "exact") -> dict[str, Any]:
+    """
+    Load, solve and evaluate one instance.
+
+    Runs in a worker process. Errors are reported in the result rather than
+    raised, so that one broken instance does not stop the batch.
+
+    Returns:
+        The result record: assignments and evaluation, or the error
+    """
+    start = time.perf_counter()
+    record: dict[str, Any] = {"name": instance.name}
+    try:
+        visits = load_visits(instance.visits_path)
+        caregivers = load_caregivers(instance.caregivers_path)
+        if solver == "heuristic":
+            assignments = solve_heuristic(visits, caregivers, instance.time_limit)
+        else:
+            assignments = solve(
+                visits,
+                caregivers,
+                max_workers=instance.workers,
+                time_limit=instance.time_limit,
+            )
+        evaluation = evaluate(assignments, visits, caregivers)
+    except Exception as error:
+        record["status"] = "error"
+        record["error"] = "".join(traceback.format_exception_only(error)).strip()
+    else:
+        record["status"] = "ok"
+        record["visits"] = len(visits)
+        record["caregivers"] = len(caregivers)
+        record["assignments"] = [
+            {"visit_id": a.visit_id, "caregiver_id": a.caregiver_id}
+            for a in assignments
+        ]
+        record["evaluation"] = evaluation
+    record["wall_time"] = time.perf_counter() - start
+    return record
+
+
+def run_batch(
+    instances: list[BatchInstance],
+    output_path: str,
+    max_cores: int | None = None,
+    solver: str = "exact",
+) -> int:
+    """
+    Solve instances concurrently, appending each result to a JSON Lines file.
+
+    Args:
+        instances: Instances to solve
+        output_path: JSON Lines file the results are appended to, in
+            completion order
+        max_cores: CPU cores for the whole batch, all of them by default
+        solver: "exact" or "heuristic"
+
+    Returns:
+        Number of instances that failed
+    """
+    if not instances:
+        return 0
+    cores = max_cores or os.cpu_count() or 1
+    # as many processes as the largest allotment fits in the cores, so that
+    # running instances never compete for a core
+    allotment = max(1, max(instance.workers for instance in instances))
+    pool_size = max(1, min(len(instances), cores // allotment))
+
+    failures = 0
+    with (
+        ProcessPoolExecutor(max_workers=pool_size) as executor,
+        open(output_path, "a") as output,
+    ):
+        futures = [
+            executor.submit(solve_instance, instance, solver) for instance in instances
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            failures += record["status"] != "ok"
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    return failures
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="scheduler.batch", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("instances", help="instance directory or manifest file")
+    parser.add_argument("--output", required=True, help="JSON Lines results file")
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=TIME_LIMIT_SECONDS,
+        help="default time limit per instance (s)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="default CPU cores per instance"
+    )
+    parser.add_argument("--max-cores", type=int, help="CPU cores for the batch")
+    parser.add_argument("--solver", choices=("exact", "heuristic"), default="exact")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Solve every instance of a directory or manifest."""
+    args = _parse_args(argv)
+    instances = discover_instances(args.instances, args.time_limit, args.workers)
+    print(f"Solving {len(instances)} instances...")
+    failures = run_batch(instances, args.output, args.max_cores, args.solver)
+    print(f"Done: {len(instances) - failures} solved, {failures} failed")
+
+
+if __name__ == "__main__":
+    main()
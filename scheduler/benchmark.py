@@ -0,0 +1,228 @@
+"""Scaling benchmark of the scheduling pipeline.
+
+Run with `python -m scheduler.benchmark`. Each size generates an instance,
+writes it in the input format and times the pipeline phases: parsing, then
+the phases `solve` records on its SolveReport (eligibility, presolve,
+decomposition, model build, CP-SAT solve, assignment extraction), then
+evaluate.
+Solution quality is reported alongside. Results are appended as JSON Lines
+together with the git commit they were measured at, and `--compare` prints
+them side by side so regressions across commits stand out.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from typing import Any
+
+from .evaluator import evaluate
+from .generator import InstanceConfig, generate_instance, write_instance
+from .instrumentation import SolveReport
+from .parser import load_caregivers, load_visits
+from .solver import solve
+
+SIZES = {
+    "small": InstanceConfig(caregivers=20, visits=100, customers=20),
+    "medium": InstanceConfig(caregivers=100, visits=1_000, customers=200),
+    "large": InstanceConfig(
+        caregivers=500, visits=5_000, customers=1_000, neighborhoods=20
+    ),
+}
+DEFAULT_RESULTS = "benchmarks/results.jsonl"
+# SolveReport phases that add up to the model build
+_MODEL_PHASES = ("variables", "constraints", "objective")
+# CP-SAT statuses from best to worst, the worst component's is reported
+_STATUSES = ("OPTIMAL", "FEASIBLE", "UNKNOWN", "MODEL_INVALID", "INFEASIBLE")
+
+
+def _git_commit() -> str | None:
+    """Commit of the working tree, None outside a git checkout."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+@contextmanager
+def _timed(phases: dict[str, float], name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    yield
+    phases[name] = time.perf_counter() - start
+
+
+def _solve_phases(
+    visits_path: str, caregivers_path: str, time_limit: float
+) -> tuple[dict[str, float], dict[str, Any]]:
+    """Run the pipeline on an instance file, timing each phase."""
+    phases: dict[str, float] = {}
+    with _timed(phases, "parse"):
+        visits = load_visits(visits_path)
+        caregivers = load_caregivers(caregivers_path)
+
+    # visits nobody can staff are left unassigned and reported rather than
+    # making the whole instance infeasible
+    report = SolveReport()
+    assignments = solve(
+        visits, caregivers, report=report, time_limit=time_limit, partial=True
+    )
+    for name, seconds in report.phases.items():
+        if name in _MODEL_PHASES:
+            phases["model_build"] = phases.get("model_build", 0.0) + seconds
+        else:
+            phases[name] = seconds
+
+    diagnosis = report.diagnosis or {}
+    # the travel stage only refines a schedule: status and objective are the
+    # continuity stage's, and the coverage stage's status when it runs first
+    solves = [stats for stats in report.solves if stats["stage"] != "travel"]
+    objectives = [
+        stats["objective"] for stats in solves if stats["stage"] == "continuity"
+    ]
+    components = {stats["component"] for stats in solves}
+    quality: dict[str, Any] = {
+        "ineligible_visits": len(diagnosis.get("unstaffable_visits", [])),
+        "status": max(
+            (stats["status"] for stats in solves),
+            key=_STATUSES.index,
+            default="UNKNOWN",
+        ),
+        "objective": (
+            sum(objectives)
+            if objectives
+            and len(objectives) == len(components)
+            and None not in objectives
+            else None
+        ),
+        "variables": report.variables,
+        "constraints": report.constraints,
+    }
+
+    with _timed(phases, "evaluate"):
+        evaluation = evaluate(assignments, visits, caregivers)
+    quality.update(evaluation["optimization_metrics"])
+    quality["violations"] = {
+        name: len(violations)
+        for name, violations in evaluation["constraint_violations"].items()
+    }
+    return phases, quality
+
+
+def run_benchmark(
+    name: str, config: InstanceConfig, seed: int = 0, time_limit: float = 10.0
+) -> dict[str, Any]:
+    """
+    Benchmark the pipeline on one generated instance.
+
+    Args:
+        name: Label of the size
+        config: Shape of the generated instance
+        seed: Generator seed
+        time_limit: CP-SAT time limit in seconds
+
+    Returns:
+        The result record: phase wall times in seconds and solution quality
+    """
+    visits, caregivers = generate_instance(config, seed)
+    with tempfile.TemporaryDirectory() as directory:
+        visits_path, caregivers_path = write_instance(visits, caregivers, directory)
+        phases, quality = _solve_phases(visits_path, caregivers_path, time_limit)
+    return {
+        "size": name,
+        "visits": config.visits,
+        "caregivers": config.caregivers,
+        "seed": seed,
+        "time_limit": time_limit,
+        "commit": _git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "phases": phases,
+        "quality": quality,
+    }
+
+
+def _load_results(path: str) -> list[dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_results(path: str, write: Callable[[str], None] = print) -> None:
+    """Print stored results per size, one row per run, oldest first."""
+    results = _load_results(path)
+    phase_names = ["parse", "eligibility", "model_build", "solve", "evaluate"]
+    for size in dict.fromkeys(record["size"] for record in results):
+        write(f"\n{size}")
+        write(
+            f"  {'commit':<10}"
+            + "".join(f"{phase:>13}" for phase in phase_names)
+            + f"{'continuity':>12}{'travel':>8}"
+        )
+        for record in results:
+            if record["size"] != size:
+                continue
+            commit = (record["commit"] or "-")[:8]
+            timings = "".join(
+                f"{record['phases'].get(phase, float('nan')):>13.3f}"
+                for phase in phase_names
+            )
+            quality = record["quality"]
+            write(
+                f"  {commit:<10}{timings}"
+                f"{quality['continuity_score']:>12.2f}"
+                f"{quality['travel_efficiency_score']:>8.2f}"
+            )
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="scheduler.benchmark", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        choices=list(SIZES),
+        default=["small", "medium"],
+        help="instance sizes to benchmark",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--time-limit", type=float, default=10.0, help="CP-SAT time limit (s)"
+    )
+    parser.add_argument(
+        "--results", default=DEFAULT_RESULTS, help="JSON Lines file of results"
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="only print the stored results, without running",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark sizes and append their results."""
+    args = _parse_args(argv)
+    if not args.compare:
+        os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+        for name in args.sizes:
+            record = run_benchmark(name, SIZES[name], args.seed, args.time_limit)
+            with open(args.results, "a") as f:
+                f.write(json.dumps(record) + "\n")
+            phases = ", ".join(f"{k} {v:.3f}s" for k, v in record["phases"].items())
+            print(f"{name}: {phases}")
+    compare_results(args.results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""On-disk cache of solved schedules, keyed by a fingerprint of the inputs."""
+
+import hashlib
+import json
+import os
+
+from .models import Assignment, Caregiver, Visit
+from .parser import load_assignments, save_assignments
+
+
+def instance_fingerprint(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    options: dict[str, str] | None = None,
+) -> str:
+    """
+    Hash every input field the solver reads.
+
+    Two instances with the same fingerprint have the same visits and
+    caregivers, in the same order, and were solved with the same options
+    (solver settings that change the schedule).
+    """
+    payload = {
+        "visits": [
+            [
+                visit.id,
+                visit.start.isoformat(),
+                visit.end.isoformat(),
+                visit.customer,
+                visit.required_skill,
+                visit.neighborhood,
+            ]
+            for visit in visits
+        ],
+        "caregivers": [
+            [
+                caregiver.id,
+                caregiver.max_hours,
+                [
+                    [slot.day, slot.start.isoformat(), slot.end.isoformat()]
+                    for slot in caregiver.availability
+                ],
+                caregiver.skills,
+            ]
+            for caregiver in caregivers
+        ],
+    }
+    if options:
+        payload["options"] = options
+    encoded = json.dumps(payload, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _cache_path(cache_dir: str, fingerprint: str) -> str:
+    return os.path.join(cache_dir, f"{fingerprint}.json")
+
+
+def load_cached_schedule(cache_dir: str, fingerprint: str) -> list[Assignment] | None:
+    """Return the schedule stored for the fingerprint, if any."""
+    path = _cache_path(cache_dir, fingerprint)
+    if not os.path.exists(path):
+        return None
+    return load_assignments(path)
+
+
+def store_cached_schedule(
+    cache_dir: str, fingerprint: str, assignments: list[Assignment]
+) -> None:
+    """Store a solved schedule; empty (failed) schedules are not cached."""
+    if not assignments:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(cache_dir, fingerprint)
+    # write then rename so that a concurrent reader never sees a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    save_assignments(assignments, tmp_path)
+    os.replace(tmp_path, path)
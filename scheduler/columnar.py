@@ -0,0 +1,500 @@
+"""Columnar (NumPy) backend for scoring schedules.
+
+Visits, caregivers and assignments are converted to parallel integer arrays so
+that the optimization metrics and hour totals are computed with vectorized
+group-by operations instead of per-assignment Python loops. The results are
+identical to those of `evaluator.evaluate`.
+
+An encoded instance can be saved as a directory holding one `.npy` file per
+array and a `meta.json` of its string dictionaries. Loading memory-maps the
+arrays, so an instance is read without parsing JSON records or building
+per-row objects; `to_models` builds the objects when the solver needs them.
+"""
+
+import json
+import os
+from dataclasses import dataclass, fields
+from datetime import datetime, time, timedelta
+from typing import Any
+
+import numpy as np
+
+from .evaluator import _find_overlapping_pairs
+from .models import WEEKDAYS, Assignment, Availability, Caregiver, Visit, seconds_of_day
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+_DAY = 86_400
+# the epoch is a Thursday: days shifted by 3 group into weeks starting on Monday
+_MONDAY_SHIFT = 3
+_FORMAT_VERSION = 1
+_META_FILE = "meta.json"
+
+
+def _decode_clock(seconds: int) -> time:
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def _week_name(week: int) -> str:
+    """ISO name, e.g. 2025-W26, of a week counted in Mondays since the epoch."""
+    year, number, _ = (_EPOCH + timedelta(days=7 * week - _MONDAY_SHIFT)).isocalendar()
+    return f"{year}-W{number:02d}"
+
+
+@dataclass
+class ColumnarInstance:
+    """
+    Visits and caregivers stored as arrays indexed by integer codes.
+
+    Visit code i is visit_ids[i], caregiver code j is caregiver_ids[j];
+    customers, neighborhoods, skills and days are dictionary-encoded the same
+    way, days starting with WEEKDAYS so that day codes are weekdays.
+    Times are whole seconds: since the epoch for visits, since midnight for
+    availability slots. Slots are grouped by caregiver, slot_offsets[j] to
+    slot_offsets[j + 1] being the slots of caregiver j, and so are skills
+    with skill_offsets.
+    """
+
+    visit_ids: list[str]
+    caregiver_ids: list[str]
+    caregiver_names: list[str]
+    customers: list[str]
+    neighborhoods: list[str]
+    skills: list[str]
+    days: list[str]
+    visit_customer: np.ndarray
+    visit_neighborhood: np.ndarray
+    visit_skill: np.ndarray
+    visit_start: np.ndarray
+    visit_end: np.ndarray
+    visit_weekday: np.ndarray
+    visit_start_of_day: np.ndarray
+    visit_end_of_day: np.ndarray
+    caregiver_max_hours: np.ndarray
+    skill_offsets: np.ndarray
+    caregiver_skills: np.ndarray
+    slot_offsets: np.ndarray
+    slot_day: np.ndarray
+    slot_start: np.ndarray
+    slot_end: np.ndarray
+
+    @classmethod
+    def from_models(
+        cls, visits: list[Visit], caregivers: list[Caregiver]
+    ) -> "ColumnarInstance":
+        """Encode visit and caregiver objects into columns."""
+        customer_codes: dict[str, int] = {}
+        neighborhood_codes: dict[str, int] = {}
+        skill_codes: dict[str, int] = {}
+        visit_customer = [
+            customer_codes.setdefault(v.customer, len(customer_codes)) for v in visits
+        ]
+        visit_neighborhood = [
+            neighborhood_codes.setdefault(v.neighborhood, len(neighborhood_codes))
+            for v in visits
+        ]
+        visit_skill = [
+            skill_codes.setdefault(v.required_skill, len(skill_codes)) for v in visits
+        ]
+
+        # an unknown day name gets a code past the weekdays: it never matches
+        day_codes = {day: code for code, day in enumerate(WEEKDAYS)}
+        slot_offsets, skill_offsets = [0], [0]
+        slot_day: list[int] = []
+        slot_start: list[int] = []
+        slot_end: list[int] = []
+        caregiver_skills: list[int] = []
+        for caregiver in caregivers:
+            for availability in caregiver.availability:
+                slot_day.append(day_codes.setdefault(availability.day, len(day_codes)))
+                slot_start.append(seconds_of_day(availability.start))
+                slot_end.append(seconds_of_day(availability.end))
+            slot_offsets.append(len(slot_day))
+            caregiver_skills.extend(
+                skill_codes.setdefault(skill, len(skill_codes))
+                for skill in caregiver.skills
+            )
+            skill_offsets.append(len(caregiver_skills))
+
+        return cls(
+            visit_ids=[v.id for v in visits],
+            caregiver_ids=[c.id for c in caregivers],
+            caregiver_names=[c.name for c in caregivers],
+            customers=list(customer_codes),
+            neighborhoods=list(neighborhood_codes),
+            skills=list(skill_codes),
+            days=list(day_codes),
+            visit_customer=np.array(visit_customer, dtype=np.int64),
+            visit_neighborhood=np.array(visit_neighborhood, dtype=np.int64),
+            visit_skill=np.array(visit_skill, dtype=np.int64),
+            visit_start=np.array(
+                [(v.start - _EPOCH) // _SECOND for v in visits], dtype=np.int64
+            ),
+            visit_end=np.array(
+                [(v.end - _EPOCH) // _SECOND for v in visits], dtype=np.int64
+            ),
+            visit_weekday=np.array([v.weekday for v in visits], dtype=np.int64),
+            visit_start_of_day=np.array(
+                [v.start_of_day for v in visits], dtype=np.int64
+            ),
+            visit_end_of_day=np.array([v.end_of_day for v in visits], dtype=np.int64),
+            caregiver_max_hours=np.array(
+                [c.max_hours for c in caregivers], dtype=np.float64
+            ),
+            skill_offsets=np.array(skill_offsets, dtype=np.int64),
+            caregiver_skills=np.array(caregiver_skills, dtype=np.int64),
+            slot_offsets=np.array(slot_offsets, dtype=np.int64),
+            slot_day=np.array(slot_day, dtype=np.int64),
+            slot_start=np.array(slot_start, dtype=np.int64),
+            slot_end=np.array(slot_end, dtype=np.int64),
+        )
+
+    def save(self, directory: str) -> None:
+        """Write the instance as .npy arrays and a meta.json of dictionaries."""
+        os.makedirs(directory, exist_ok=True)
+        meta: dict[str, Any] = {"version": _FORMAT_VERSION}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, np.ndarray):
+                np.save(os.path.join(directory, f"{f.name}.npy"), value)
+            else:
+                meta[f.name] = value
+        with open(os.path.join(directory, _META_FILE), "w") as meta_file:
+            json.dump(meta, meta_file)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "ColumnarInstance":
+        """
+        Read an instance written by save.
+
+        Args:
+            directory: Directory of the instance
+            mmap: Memory-map the arrays read-only instead of reading them
+
+        Raises:
+            ValueError: if the directory holds another version of the format
+        """
+        with open(os.path.join(directory, _META_FILE)) as meta_file:
+            meta = json.load(meta_file)
+        if meta.pop("version", None) != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar instance format in {directory}")
+        arrays = {
+            f.name: np.load(
+                os.path.join(directory, f"{f.name}.npy"),
+                mmap_mode="r" if mmap else None,
+            )
+            for f in fields(cls)
+            if f.name not in meta
+        }
+        return cls(**meta, **arrays)
+
+    def to_models(self) -> tuple[list[Visit], list[Caregiver]]:
+        """Decode the visit and caregiver objects, in the order of their codes."""
+        visits = [
+            Visit(
+                id=visit_id,
+                start=_EPOCH + timedelta(seconds=start),
+                end=_EPOCH + timedelta(seconds=end),
+                customer=self.customers[customer],
+                required_skill=self.skills[skill],
+                neighborhood=self.neighborhoods[neighborhood],
+            )
+            for visit_id, start, end, customer, skill, neighborhood in zip(
+                self.visit_ids,
+                self.visit_start.tolist(),
+                self.visit_end.tolist(),
+                self.visit_customer.tolist(),
+                self.visit_skill.tolist(),
+                self.visit_neighborhood.tolist(),
+                strict=True,
+            )
+        ]
+        slots = [
+            Availability(
+                day=self.days[day], start=_decode_clock(start), end=_decode_clock(end)
+            )
+            for day, start, end in zip(
+                self.slot_day.tolist(),
+                self.slot_start.tolist(),
+                self.slot_end.tolist(),
+                strict=True,
+            )
+        ]
+        skills = [self.skills[code] for code in self.caregiver_skills.tolist()]
+        slot_offsets = self.slot_offsets.tolist()
+        skill_offsets = self.skill_offsets.tolist()
+        caregivers = [
+            Caregiver(
+                id=caregiver_id,
+                name=self.caregiver_names[j],
+                max_hours=int(max_hours),
+                availability=slots[slot_offsets[j] : slot_offsets[j + 1]],
+                skills=skills[skill_offsets[j] : skill_offsets[j + 1]],
+            )
+            for j, (caregiver_id, max_hours) in enumerate(
+                zip(self.caregiver_ids, self.caregiver_max_hours.tolist(), strict=True)
+            )
+        ]
+        return visits, caregivers
+
+    def save_assignments(self, assignments: list[Assignment], file_path: str) -> None:
+        """Write a schedule as a (2, n) .npy array of visit and caregiver codes."""
+        np.save(file_path, np.stack(self.encode(assignments)))
+
+    def load_assignments(
+        self, file_path: str, mmap: bool = True
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Read a schedule written by save_assignments as code arrays."""
+        codes = np.load(file_path, mmap_mode="r" if mmap else None)
+        return codes[0], codes[1]
+
+    def decode(
+        self, visit_codes: np.ndarray, caregiver_codes: np.ndarray
+    ) -> list[Assignment]:
+        """Assignments of (visit code, caregiver code) arrays."""
+        return [
+            Assignment(visit_id=self.visit_ids[i], caregiver_id=self.caregiver_ids[j])
+            for i, j in zip(visit_codes.tolist(), caregiver_codes.tolist(), strict=True)
+        ]
+
+    def encode(self, assignments: list[Assignment]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Encode assignments as (visit code, caregiver code) arrays.
+
+        Raises:
+            KeyError: if an assignment references an unknown visit or caregiver
+        """
+        visit_codes = {visit_id: i for i, visit_id in enumerate(self.visit_ids)}
+        caregiver_codes = {cid: j for j, cid in enumerate(self.caregiver_ids)}
+        return (
+            np.array([visit_codes[a.visit_id] for a in assignments], dtype=np.int64),
+            np.array(
+                [caregiver_codes[a.caregiver_id] for a in assignments], dtype=np.int64
+            ),
+        )
+
+    def caregiver_hours(
+        self, visit_codes: np.ndarray, caregiver_codes: np.ndarray
+    ) -> np.ndarray:
+        """Total assigned hours per caregiver code."""
+        durations = (self.visit_end - self.visit_start)[visit_codes] / 3600.0
+        # bincount accumulates in assignment order, like a Python sum would
+        return np.bincount(
+            caregiver_codes, weights=durations, minlength=len(self.caregiver_ids)
+        )
+
+    def week_seconds(
+        self, visit_codes: np.ndarray, caregiver_codes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Assigned whole seconds per caregiver code and ISO week.
+
+        Returns:
+            The caregiver code, week (see _week_name) and seconds of each
+            (caregiver, week) with assignments, by caregiver code then week
+        """
+        durations = (self.visit_end - self.visit_start)[visit_codes]
+        weeks = (self.visit_start[visit_codes] // _DAY + _MONDAY_SHIFT) // 7
+        first = int(weeks.min()) if len(weeks) else 0
+        span = int(weeks.max()) - first + 1 if len(weeks) else 1
+        groups, inverse = np.unique(
+            caregiver_codes * span + (weeks - first), return_inverse=True
+        )
+        # sums of whole seconds are exact in float64, unlike sums of hours
+        seconds = np.bincount(
+            inverse.ravel(), weights=durations, minlength=len(groups)
+        ).astype(np.int64)
+        return groups // span, groups % span + first, seconds
+
+    def continuity_score(
+        self, visit_codes: np.ndarray, caregiver_codes: np.ndarray
+    ) -> float:
+        """Same as evaluator._calculate_continuity_score, vectorized."""
+        if len(visit_codes) == 0:
+            return 0.0
+        n_customers = len(self.customers)
+        customers = self.visit_customer[visit_codes]
+        total_visits = np.bincount(customers, minlength=n_customers)
+        pairs = np.unique(customers * len(self.caregiver_ids) + caregiver_codes)
+        unique_caregivers = np.bincount(
+            pairs // len(self.caregiver_ids), minlength=n_customers
+        )
+        scores = np.where(
+            total_visits == 1,
+            1.0,
+            1.0 - unique_caregivers / np.maximum(total_visits, 1),
+        )
+        # average in order of first appearance to match the evaluator's float sum
+        present, first_seen = np.unique(customers, return_index=True)
+        ordered = present[np.argsort(first_seen)]
+        return float(sum(scores[ordered].tolist()) / len(ordered))
+
+    def travel_efficiency_score(
+        self, visit_codes: np.ndarray, caregiver_codes: np.ndarray
+    ) -> float:
+        """Same as evaluator._calculate_travel_efficiency_score, vectorized."""
+        if len(visit_codes) == 0:
+            return 0.0
+        weekdays = self.visit_weekday[visit_codes]
+        # lexsort is stable: ties on start keep the assignment order
+        order = np.lexsort((self.visit_start[visit_codes], weekdays, caregiver_codes))
+        caregivers = caregiver_codes[order]
+        days = weekdays[order]
+        neighborhoods = self.visit_neighborhood[visit_codes][order]
+
+        same_group = (caregivers[1:] == caregivers[:-1]) & (days[1:] == days[:-1])
+        switches = same_group & (neighborhoods[1:] != neighborhoods[:-1])
+        total_switches = int(switches.sum())
+        total_caregiver_days = 1 + int((~same_group).sum())
+
+        avg_switches = total_switches / total_caregiver_days
+        return max(0.0, 1.0 - (avg_switches / 2.0))
+
+    def availability_mask(
+        self, visit_codes: np.ndarray, caregiver_codes: np.ndarray
+    ) -> np.ndarray:
+        """Whether each assignment fits one of the caregiver's availability slots."""
+        slot_counts = np.diff(self.slot_offsets)[caregiver_codes]
+        # one row per (assignment, slot of its caregiver)
+        rows = np.repeat(np.arange(len(visit_codes)), slot_counts)
+        first_row = np.repeat(np.cumsum(slot_counts) - slot_counts, slot_counts)
+        slots = (
+            np.repeat(self.slot_offsets[caregiver_codes], slot_counts)
+            + np.arange(len(rows))
+            - first_row
+        )
+        row_visits = visit_codes[rows]
+        fits = (
+            (self.slot_day[slots] == self.visit_weekday[row_visits])
+            & (self.slot_start[slots] <= self.visit_start_of_day[row_visits])
+            & (self.visit_end_of_day[row_visits] <= self.slot_end[slots])
+        )
+        return np.bincount(rows[fits], minlength=len(visit_codes)) > 0
+
+    def overlap_candidates(
+        self, visit_codes: np.ndarray, caregiver_codes: np.ndarray
+    ) -> np.ndarray:
+        """
+        Caregiver codes that may have overlapping visits.
+
+        A caregiver is flagged when, in start order, a visit starts no later
+        than the latest end among their previous visits. This is a superset of
+        the caregivers with overlap violations, computed without Python loops.
+        """
+        if len(visit_codes) < 2:
+            return np.empty(0, dtype=np.int64)
+        starts = self.visit_start[visit_codes]
+        ends = self.visit_end[visit_codes]
+        order = np.lexsort((starts, caregiver_codes))
+        caregivers = caregiver_codes[order]
+        # shift every caregiver into its own time range so that one running
+        # maximum does not leak across caregivers
+        shift = caregivers * (int(ends.max()) - int(starts.min()) + 1)
+        latest_end = np.maximum.accumulate(ends[order] + shift)
+        same = caregivers[1:] == caregivers[:-1]
+        clash = same & (starts[order][1:] + shift[1:] <= latest_end[:-1])
+        return np.unique(caregivers[1:][clash])
+
+    def score(
+        self, visit_codes: np.ndarray, caregiver_codes: np.ndarray
+    ) -> dict[str, Any]:
+        """
+        Score an encoded candidate schedule.
+
+        Returns:
+            The optimization metrics, hours per caregiver code and the number
+            of (caregiver, ISO week) over the caregiver's max hours
+        """
+        hours = self.caregiver_hours(visit_codes, caregiver_codes)
+        week_caregivers, _, seconds = self.week_seconds(visit_codes, caregiver_codes)
+        over = seconds > self.caregiver_max_hours[week_caregivers] * 3600
+        return {
+            "continuity_score": self.continuity_score(visit_codes, caregiver_codes),
+            "travel_efficiency_score": self.travel_efficiency_score(
+                visit_codes, caregiver_codes
+            ),
+            "caregiver_hours": hours,
+            "max_hours_violations": int(over.sum()),
+        }
+
+
+def evaluate_columnar(
+    assignments: list[Assignment],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    instance: ColumnarInstance | None = None,
+) -> dict[str, Any]:
+    """
+    Evaluate the scheduling results with the columnar backend.
+
+    Args:
+        assignments: List of Assignment objects
+        visits: List of all visits
+        caregivers: List of all caregivers
+        instance: Encoded visits and caregivers, to reuse across many calls
+
+    Returns:
+        Dictionary containing evaluation results, as `evaluator.evaluate`
+    """
+    if instance is None:
+        instance = ColumnarInstance.from_models(visits, caregivers)
+    visit_codes, caregiver_codes = instance.encode(assignments)
+
+    week_caregivers, weeks, seconds = instance.week_seconds(
+        visit_codes, caregiver_codes
+    )
+    over = seconds > instance.caregiver_max_hours[week_caregivers] * 3600
+    max_hours_violations = [
+        {
+            "caregiver_id": caregivers[week_caregivers[k]].id,
+            "week": _week_name(int(weeks[k])),
+            "assigned_hours": int(seconds[k]) / 3600,
+            "max_hours": caregivers[week_caregivers[k]].max_hours,
+        }
+        for k in np.flatnonzero(over)
+    ]
+
+    available = instance.availability_mask(visit_codes, caregiver_codes)
+    availability_violations = [assignments[i] for i in np.flatnonzero(~available)]
+
+    # only caregivers flagged by the vectorized pass go through the exact sweep
+    overlap_violations = []
+    flagged = set(instance.overlap_candidates(visit_codes, caregiver_codes).tolist())
+    if flagged:
+        caregiver_assignments: dict[int, list[tuple[Visit, Assignment]]] = {}
+        for i, j in enumerate(caregiver_codes.tolist()):
+            if j in flagged:
+                caregiver_assignments.setdefault(j, []).append(
+                    (visits[visit_codes[i]], assignments[i])
+                )
+        # the evaluator reports caregivers in order of first assignment
+        for j, caregiver_assigns in caregiver_assignments.items():
+            for a, b in sorted(_find_overlapping_pairs(caregiver_assigns)):
+                overlap_violations.append(
+                    {
+                        "caregiver_id": caregivers[j].id,
+                        "conflicting_visits": [
+                            caregiver_assigns[a][1].visit_id,
+                            caregiver_assigns[b][1].visit_id,
+                        ],
+                    }
+                )
+
+    assigned_visit_ids = {assignment.visit_id for assignment in assignments}
+    # built from an id-keyed dict like the evaluator's visit lookup, so that
+    # the unassigned ids come out in the same order
+    all_visit_ids = set(dict.fromkeys(visit.id for visit in visits))
+    return {
+        "constraint_violations": {
+            "unassigned_visits": list(all_visit_ids - assigned_visit_ids),
+            "availability_violations": availability_violations,
+            "overlap_violations": overlap_violations,
+            "max_hours_violations": max_hours_violations,
+        },
+        "optimization_metrics": {
+            "continuity_score": instance.continuity_score(visit_codes, caregiver_codes),
+            "travel_efficiency_score": instance.travel_efficiency_score(
+                visit_codes, caregiver_codes
+            ),
+        },
+    }
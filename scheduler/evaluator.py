@@ -1,60 +1,93 @@
 """Evaluator module for the Bloom Care scheduling results."""
 
+import heapq
 from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Any
 
-from .models import Assignment, Caregiver, Visit
+from .models import Assignment, AvailabilityIndex, Caregiver, Visit, iso_week
 
 
-def _is_caregiver_available(caregiver: Caregiver, visit: Visit) -> bool:
-    """Check if caregiver is available for the given visit."""
-    for availability in caregiver.availability:
-        if availability.check_availability(visit):
-            return True
-    return False
+@dataclass
+class _EvaluationContext:
+    """Lookups and groupings shared by every metric and violation helper."""
 
+    assignments: list[Assignment]
+    visits: list[Visit]
+    caregivers: list[Caregiver]
+    visit_lookup: dict[str, Visit]
+    caregiver_lookup: dict[str, Caregiver]
+    # Both groupings keep the order of the assignment list
+    caregiver_assignments: dict[str, list[tuple[Visit, Assignment]]]
+    customer_assignments: dict[str, list[Assignment]]
+    # caregiver -> ISO (year, week) -> whole seconds worked, max_hours being a
+    # weekly limit; seconds add up exactly where float hours would not
+    caregiver_week_seconds: dict[str, dict[tuple[int, int], int]]
 
-def _calculate_caregiver_hours(
-    assignments: list[Assignment], visits: list[Visit], caregiver_id: str
-) -> float:
-    """Calculate total hours worked by a caregiver."""
-    total_hours = 0.0
 
+def _build_context(
+    assignments: list[Assignment], visits: list[Visit], caregivers: list[Caregiver]
+) -> _EvaluationContext:
+    """Index visits and group assignments in a single pass over the schedule."""
+    visit_lookup = {visit.id: visit for visit in visits}
+    caregiver_lookup = {caregiver.id: caregiver for caregiver in caregivers}
+
+    caregiver_assignments = defaultdict(list)
+    customer_assignments = defaultdict(list)
+    caregiver_week_seconds: dict[str, dict[tuple[int, int], int]] = defaultdict(
+        lambda: defaultdict(int)
+    )
     for assignment in assignments:
-        if assignment.caregiver_id == caregiver_id:
-            visit = next(v for v in visits if v.id == assignment.visit_id)
-            total_hours += (visit.end - visit.start).total_seconds() / 3600.0
+        visit = visit_lookup[assignment.visit_id]
+        caregiver_assignments[assignment.caregiver_id].append((visit, assignment))
+        customer_assignments[visit.customer].append(assignment)
+        caregiver_week_seconds[assignment.caregiver_id][iso_week(visit)] += int(
+            (visit.end - visit.start).total_seconds()
+        )
 
-    return total_hours
+    return _EvaluationContext(
+        assignments=assignments,
+        visits=visits,
+        caregivers=caregivers,
+        visit_lookup=visit_lookup,
+        caregiver_lookup=caregiver_lookup,
+        caregiver_assignments=caregiver_assignments,
+        customer_assignments=customer_assignments,
+        caregiver_week_seconds=caregiver_week_seconds,
+    )
+
+
+def _calculate_caregiver_hours(context: _EvaluationContext, caregiver_id: str) -> float:
+    """Calculate hours worked by a caregiver in their busiest week."""
+    week_seconds = context.caregiver_week_seconds.get(caregiver_id, {})
+    return max(week_seconds.values(), default=0) / 3600
 
 
-def _calculate_continuity_score(
-    assignments: list[Assignment], visits: list[Visit]
-) -> float:
+def _calculate_continuity_score(context: _EvaluationContext) -> float:
     """
     Calculate continuity of care score.
 
     Minimize different caregivers assigned to the same customer across multiple days.
     """
-    if not assignments:
+    if not context.assignments:
         return 0.0
 
-    # Create lookup for visits
-    visit_lookup = {visit.id: visit for visit in visits}
+    return _continuity_score(
+        (
+            len(customer_assigns),
+            len({assign.caregiver_id for assign in customer_assigns}),
+        )
+        for customer_assigns in context.customer_assignments.values()
+    )
 
-    # Group assignments by customer
-    customer_assignments = defaultdict(list)
-    for assignment in assignments:
-        visit = visit_lookup[assignment.visit_id]
-        customer_assignments[visit.customer].append(assignment)
 
+def _continuity_score(customer_counts: Iterable[tuple[int, int]]) -> float:
+    """Continuity score of the (visits, unique caregivers) of each customer."""
     # Calculate continuity score for each customer
     customer_scores = []
-    for customer_assigns in customer_assignments.values():
-        total_visits = len(customer_assigns)
-        unique_caregivers_set = {assign.caregiver_id for assign in customer_assigns}
-        unique_caregivers = len(unique_caregivers_set)
-
+    for total_visits, unique_caregivers in customer_counts:
         if total_visits == 1:
             # Single visit gets perfect score
             customer_scores.append(1.0)
@@ -67,52 +100,56 @@ def _calculate_continuity_score(
     return sum(customer_scores) / len(customer_scores) if customer_scores else 0.0
 
 
-def _calculate_travel_efficiency_score(
-    assignments: list[Assignment], visits: list[Visit]
-) -> float:
+def _calculate_travel_efficiency_score(context: _EvaluationContext) -> float:
     """
     Calculate travel efficiency score.
 
     Minimize neighborhood switches per caregiver per day.
     """
-    if not assignments:
+    if not context.assignments:
         return 0.0
 
-    # Create lookup for visits
-    visit_lookup = {visit.id: visit for visit in visits}
-
     # Group assignments by caregiver and day
-    caregiver_day_assignments = defaultdict(list)
-    for assignment in assignments:
-        visit = visit_lookup[assignment.visit_id]
-        key = (assignment.caregiver_id, visit.start.strftime("%A"))
-        caregiver_day_assignments[key].append((visit, assignment))
+    caregiver_day_visits = defaultdict(list)
+    for caregiver_id, caregiver_assigns in context.caregiver_assignments.items():
+        for visit, _ in caregiver_assigns:
+            caregiver_day_visits[(caregiver_id, visit.weekday)].append(visit)
 
     # Calculate switches for each caregiver-day combination
-    total_switches = 0
-    total_caregiver_days = 0
+    total_switches = sum(
+        _count_switches(day_visits) for day_visits in caregiver_day_visits.values()
+    )
+    return _travel_efficiency_score(total_switches, len(caregiver_day_visits))
 
-    for day_assigns in caregiver_day_assignments.values():
-        total_caregiver_days += 1
 
-        if len(day_assigns) == 1:
-            # Single visit gets perfect score (no switches)
-            continue
+def _count_switches(day_visits: list[Visit]) -> int:
+    """
+    Neighborhood switches of one caregiver-day, between visits in start order.
+
+    Visits starting at the same time keep the order they are given in, which
+    callers keep as the assignment order.
+    """
+    if len(day_visits) == 1:
+        # Single visit gets perfect score (no switches)
+        return 0
 
-        # Sort by time to get visit order
-        day_assigns.sort(key=lambda x: x[0].start)
+    # Sort by time to get visit order
+    day_visits = sorted(day_visits, key=lambda visit: visit.start)
 
-        # Count neighborhood switches
-        switches = 0
-        current_neighborhood = day_assigns[0][0].neighborhood
+    # Count neighborhood switches
+    switches = 0
+    current_neighborhood = day_visits[0].neighborhood
 
-        for visit, _ in day_assigns[1:]:
-            if visit.neighborhood != current_neighborhood:
-                switches += 1
-                current_neighborhood = visit.neighborhood
+    for visit in day_visits[1:]:
+        if visit.neighborhood != current_neighborhood:
+            switches += 1
+            current_neighborhood = visit.neighborhood
 
-        total_switches += switches
+    return switches
 
+
+def _travel_efficiency_score(total_switches: int, total_caregiver_days: int) -> float:
+    """Travel efficiency score of the switches over all caregiver-days."""
     if total_caregiver_days == 0:
         return 0.0
 
@@ -124,83 +161,147 @@ def _calculate_travel_efficiency_score(
     return score
 
 
-def _get_unassigned_visits(
-    assignments: list[Assignment], visits: list[Visit]
-) -> list[str]:
-    assigned_visit_ids = {assignment.visit_id for assignment in assignments}
-    all_visit_ids = {visit.id for visit in visits}
+def _get_unassigned_visits(context: _EvaluationContext) -> list[str]:
+    assigned_visit_ids = {assignment.visit_id for assignment in context.assignments}
+    all_visit_ids = set(context.visit_lookup)
     return list(all_visit_ids - assigned_visit_ids)
 
 
-def _get_availability_violations(
-    assignments: list[Assignment], visits: list[Visit], caregivers: list[Caregiver]
-) -> list[Assignment]:
-    visit_lookup = {visit.id: visit for visit in visits}
-    caregiver_lookup = {caregiver.id: caregiver for caregiver in caregivers}
+def _get_availability_violations(context: _EvaluationContext) -> list[Assignment]:
+    # one availability index per assigned caregiver, built on first use
+    indexes: dict[str, AvailabilityIndex] = {}
     violations = []
-    for assignment in assignments:
-        visit = visit_lookup[assignment.visit_id]
-        caregiver = caregiver_lookup[assignment.caregiver_id]
-        if not _is_caregiver_available(caregiver, visit):
+    for assignment in context.assignments:
+        visit = context.visit_lookup[assignment.visit_id]
+        index = indexes.get(assignment.caregiver_id)
+        if index is None:
+            caregiver = context.caregiver_lookup[assignment.caregiver_id]
+            index = AvailabilityIndex.from_availability(caregiver.availability)
+            indexes[assignment.caregiver_id] = index
+        if not index.covers(visit):
             violations.append(assignment)
     return violations
 
 
+def _find_overlapping_pairs(
+    caregiver_assigns: list[tuple[Visit, Assignment]], limit: int | None = None
+) -> list[tuple[int, int]]:
+    """
+    Find the overlapping visits of one caregiver with a sweep over start times.
+
+    Visits are visited by start time while a heap keeps those still running,
+    so each visit is only compared with the visits it can overlap: this runs
+    in O(n log n + k) for k conflicting pairs instead of comparing every pair.
+
+    Returns:
+        Pairs (i, j), i < j, of indices into caregiver_assigns, in sweep order.
+        The sweep stops once limit pairs have been found.
+    """
+    order = sorted(
+        range(len(caregiver_assigns)), key=lambda i: caregiver_assigns[i][0].start
+    )
+    running: list[tuple[datetime, int]] = []
+    pairs = []
+    for i in order:
+        visit = caregiver_assigns[i][0]
+        # visits that ended strictly before this one starts can be dropped;
+        # visits ending exactly at the start may still overlap a zero-length visit
+        while running and running[0][0] < visit.start:
+            heapq.heappop(running)
+        for _, j in running:
+            if visit.overlaps(caregiver_assigns[j][0]):
+                pairs.append((min(i, j), max(i, j)))
+                if limit is not None and len(pairs) >= limit:
+                    return pairs
+        heapq.heappush(running, (visit.end, i))
+    return pairs
+
+
 def _get_overlap_violations(
-    assignments: list[Assignment], visits: list[Visit]
+    caregiver_assignments: dict[str, list[tuple[Visit, Assignment]]],
+    first_only: bool = False,
 ) -> list[dict[str, Any]]:
-    visit_lookup = {visit.id: visit for visit in visits}
-    caregiver_assignments = defaultdict(list)
-    for assignment in assignments:
-        caregiver_assignments[assignment.caregiver_id].append(assignment)
     violations = []
     for caregiver_id, caregiver_assigns in caregiver_assignments.items():
-        for i, assignment1 in enumerate(caregiver_assigns):
-            visit1 = visit_lookup[assignment1.visit_id]
-            for assignment2 in caregiver_assigns[i + 1 :]:
-                visit2 = visit_lookup[assignment2.visit_id]
-                if visit1.overlaps(visit2):
-                    violations.append(
-                        {
-                            "caregiver_id": caregiver_id,
-                            "conflicting_visits": [
-                                assignment1.visit_id,
-                                assignment2.visit_id,
-                            ],
-                        }
-                    )
+        if first_only:
+            pairs = _find_overlapping_pairs(caregiver_assigns, limit=1)
+        else:
+            # report pairs in assignment order, as a pairwise scan would
+            pairs = sorted(_find_overlapping_pairs(caregiver_assigns))
+        for i, j in pairs:
+            violations.append(
+                {
+                    "caregiver_id": caregiver_id,
+                    "conflicting_visits": [
+                        caregiver_assigns[i][1].visit_id,
+                        caregiver_assigns[j][1].visit_id,
+                    ],
+                }
+            )
+            if first_only:
+                return violations
     return violations
 
 
-def _get_max_hours_violations(
-    assignments: list[Assignment], visits: list[Visit], caregivers: list[Caregiver]
+def count_overlap_violations(assignments: list[Assignment], visits: list[Visit]) -> int:
+    """
+    Count pairs of overlapping visits assigned to the same caregiver.
+
+    Cheaper than a full evaluate when only the number of conflicts matters.
+    """
+    context = _build_context(assignments, visits, [])
+    return sum(
+        len(_find_overlapping_pairs(caregiver_assigns))
+        for caregiver_assigns in context.caregiver_assignments.values()
+    )
+
+
+def has_overlap_violations(assignments: list[Assignment], visits: list[Visit]) -> bool:
+    """
+    Check whether any caregiver is assigned overlapping visits.
+
+    Stops at the first conflict found, for fast validity checks.
+    """
+    context = _build_context(assignments, visits, [])
+    return bool(_get_overlap_violations(context.caregiver_assignments, first_only=True))
+
+
+def _get_max_hours_violations(context: _EvaluationContext) -> list[dict[str, Any]]:
+    return _max_hours_violations(context.caregivers, context.caregiver_week_seconds)
+
+
+def _max_hours_violations(
+    caregivers: list[Caregiver],
+    caregiver_week_seconds: dict[str, dict[tuple[int, int], int]],
 ) -> list[dict[str, Any]]:
+    """
+    Caregivers over max_hours in an ISO week, one violation per week.
+
+    Time is compared in whole seconds, as the solver counts it, and converted
+    to hours only for the report.
+    """
     violations = []
     for caregiver in caregivers:
-        total_hours = _calculate_caregiver_hours(assignments, visits, caregiver.id)
-        if total_hours > caregiver.max_hours:
-            violations.append(
-                {
-                    "caregiver_id": caregiver.id,
-                    "assigned_hours": total_hours,
-                    "max_hours": caregiver.max_hours,
-                }
-            )
+        week_seconds = caregiver_week_seconds.get(caregiver.id, {})
+        for (year, week), seconds in sorted(week_seconds.items()):
+            if seconds > caregiver.max_hours * 3600:
+                violations.append(
+                    {
+                        "caregiver_id": caregiver.id,
+                        "week": f"{year}-W{week:02d}",
+                        "assigned_hours": seconds / 3600,
+                        "max_hours": caregiver.max_hours,
+                    }
+                )
     return violations
 
 
-def _check_constraint_violations(
-    assignments: list[Assignment], visits: list[Visit], caregivers: list[Caregiver]
-) -> dict[str, Any]:
+def _check_constraint_violations(context: _EvaluationContext) -> dict[str, Any]:
     return {
-        "unassigned_visits": _get_unassigned_visits(assignments, visits),
-        "availability_violations": _get_availability_violations(
-            assignments, visits, caregivers
-        ),
-        "overlap_violations": _get_overlap_violations(assignments, visits),
-        "max_hours_violations": _get_max_hours_violations(
-            assignments, visits, caregivers
-        ),
+        "unassigned_visits": _get_unassigned_visits(context),
+        "availability_violations": _get_availability_violations(context),
+        "overlap_violations": _get_overlap_violations(context.caregiver_assignments),
+        "max_hours_violations": _get_max_hours_violations(context),
     }
 
 
@@ -213,14 +314,8 @@ def display_caregiver_schedules(
     Shows each caregiver's assignments organized by day, with multiple visits per day
     properly handled.
     """
-    # Create lookups
-    visit_lookup = {visit.id: visit for visit in visits}
-
-    # Group assignments by caregiver
-    caregiver_assignments = defaultdict(list)
-    for assignment in assignments:
-        visit = visit_lookup[assignment.visit_id]
-        caregiver_assignments[assignment.caregiver_id].append((visit, assignment))
+    context = _build_context(assignments, visits, caregivers)
+    caregiver_assignments = context.caregiver_assignments
 
     print("\n" + "=" * 70)
     print("CAREGIVER SCHEDULES")
@@ -233,10 +328,8 @@ def display_caregiver_schedules(
         skills = ", ".join(caregiver.skills)
 
         # Calculate utilization stats
-        assigned_hours = _calculate_caregiver_hours(assignments, visits, caregiver.id)
-        assigned_visits = len(
-            [a for a in assignments if a.caregiver_id == caregiver.id]
-        )
+        assigned_hours = _calculate_caregiver_hours(context, caregiver.id)
+        assigned_visits = len(caregiver_assignments.get(caregiver_id, []))
         utilization = (
             (assigned_hours / caregiver.max_hours) * 100
             if caregiver.max_hours > 0
@@ -297,7 +390,10 @@ def display_caregiver_schedules(
 
 
 def evaluate(
-    assignments: list[Assignment], visits: list[Visit], caregivers: list[Caregiver]
+    assignments: list[Assignment],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    backend: str = "python",
 ) -> dict[str, Any]:
     """
     Evaluate the scheduling results.
@@ -306,14 +402,22 @@ def evaluate(
         assignments: List of Assignment objects
         visits: List of all visits
         caregivers: List of all caregivers
+        backend: "python", or "numpy" for the vectorized columnar backend;
+            both return the same results
 
     Returns:
         Dictionary containing evaluation results
     """
+    if backend == "numpy":
+        from .columnar import evaluate_columnar
+
+        return evaluate_columnar(assignments, visits, caregivers)
+    if backend != "python":
+        raise ValueError(f"Unknown evaluation backend: {backend}")
+
+    context = _build_context(assignments, visits, caregivers)
     evaluation = {
-        "constraint_violations": _check_constraint_violations(
-            assignments, visits, caregivers
-        ),
+        "constraint_violations": _check_constraint_violations(context),
         "optimization_metrics": {
             "continuity_score": 0.0,
             "travel_efficiency_score": 0.0,
@@ -322,10 +426,10 @@ def evaluate(
 
     # Calculate optimization metrics
     evaluation["optimization_metrics"]["continuity_score"] = (
-        _calculate_continuity_score(assignments, visits)
+        _calculate_continuity_score(context)
     )
     evaluation["optimization_metrics"]["travel_efficiency_score"] = (
-        _calculate_travel_efficiency_score(assignments, visits)
+        _calculate_travel_efficiency_score(context)
     )
 
     return evaluation
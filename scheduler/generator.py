@@ -0,0 +1,161 @@
+"""Seeded generator of synthetic scheduling instances.
+
+The bundled inputs hold 15 visits, far too few to show how the solver and
+evaluator scale. `generate_instance` builds instances of any size with the
+same shape: customers live in a neighbourhood and need one skill, their
+visits fall on a half-hour grid during the day, and caregivers hold a few
+skills and work a day-long or split shift on some days of the week.
+"""
+
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+from .models import WEEKDAYS, Availability, Caregiver, Visit
+from .parser import save_caregivers, save_visits
+
+
+@dataclass
+class InstanceConfig:
+    """Size and shape of a generated instance."""
+
+    caregivers: int = 20
+    visits: int = 200
+    customers: int = 40
+    neighborhoods: int = 5
+    # relative frequency of each skill among customers and caregivers
+    skill_mix: dict[str, float] = field(
+        default_factory=lambda: {
+            "hygiene": 0.5,
+            "cooking": 0.25,
+            "driver": 0.15,
+            "alzheim": 0.1,
+        }
+    )
+    skills_per_caregiver: int = 2
+    # probability that a caregiver works on a given day of the week
+    availability_density: float = 0.7
+    horizon_days: int = 7
+    start_date: date = date(2025, 6, 23)
+    max_hours: tuple[int, int] = (20, 40)
+
+
+# Visits start between 07:00 and 19:00 on the half hour and last 1 to 3 hours
+_FIRST_START_SLOT = 14
+_LAST_START_SLOT = 38
+_DURATION_SLOTS = (2, 3, 4, 6)
+# Day-long shift, or morning and evening halves of a split shift
+_SHIFTS = (
+    [(time(7, 0), time(21, 0))],
+    [(time(7, 0), time(13, 0)), (time(16, 0), time(21, 0))],
+    [(time(8, 0), time(18, 0))],
+)
+
+
+def _choose_skills(rng: random.Random, config: InstanceConfig, k: int) -> list[str]:
+    """Draw k distinct skills according to the skill mix."""
+    names = list(config.skill_mix)
+    weights = list(config.skill_mix.values())
+    skills: list[str] = []
+    while len(skills) < min(k, len(names)):
+        skill = rng.choices(names, weights)[0]
+        if skill not in skills:
+            skills.append(skill)
+    return skills
+
+
+def _generate_caregivers(rng: random.Random, config: InstanceConfig) -> list[Caregiver]:
+    caregivers = []
+    for index in range(config.caregivers):
+        availability: list[Availability] = []
+        for day in WEEKDAYS:
+            if rng.random() < config.availability_density:
+                availability.extend(
+                    Availability(day=day, start=start, end=end)
+                    for start, end in rng.choice(_SHIFTS)
+                )
+        caregivers.append(
+            Caregiver(
+                id=f"C{index + 1}",
+                name=f"Caregiver {index + 1}",
+                max_hours=rng.randint(*config.max_hours),
+                availability=availability,
+                skills=_choose_skills(rng, config, config.skills_per_caregiver),
+            )
+        )
+    return caregivers
+
+
+def _generate_visits(rng: random.Random, config: InstanceConfig) -> list[Visit]:
+    neighborhoods = [f"Neighborhood {n + 1}" for n in range(config.neighborhoods)]
+    customers = [
+        (
+            f"Customer {c + 1}",
+            _choose_skills(rng, config, 1)[0],
+            rng.choice(neighborhoods),
+        )
+        for c in range(config.customers)
+    ]
+    first_day = datetime.combine(config.start_date, time())
+
+    visits = []
+    for index in range(config.visits):
+        customer, skill, neighborhood = rng.choice(customers)
+        start = first_day + timedelta(
+            days=rng.randrange(config.horizon_days),
+            minutes=30 * rng.randint(_FIRST_START_SLOT, _LAST_START_SLOT),
+        )
+        visits.append(
+            Visit(
+                id=f"V{index + 1}",
+                start=start,
+                end=start + timedelta(minutes=30 * rng.choice(_DURATION_SLOTS)),
+                customer=customer,
+                required_skill=skill,
+                neighborhood=neighborhood,
+            )
+        )
+    visits.sort(key=lambda visit: visit.start)
+    return visits
+
+
+def generate_instance(
+    config: InstanceConfig, seed: int = 0
+) -> tuple[list[Visit], list[Caregiver]]:
+    """
+    Generate a random instance; the same config and seed give the same one.
+
+    Args:
+        config: Size and shape of the instance
+        seed: Random seed
+
+    Returns:
+        The visits, sorted by start, and the caregivers
+    """
+    rng = random.Random(seed)
+    caregivers = _generate_caregivers(rng, config)
+    visits = _generate_visits(rng, config)
+    return visits, caregivers
+
+
+def write_instance(
+    visits: list[Visit], caregivers: list[Caregiver], directory: str
+) -> tuple[str, str]:
+    """
+    Write an instance in the input format, as visits.json and caregivers.json.
+
+    Args:
+        visits: List of visits
+        caregivers: List of caregivers
+        directory: Directory to write the files to, created if needed
+
+    Returns:
+        Paths of the visits and caregivers files
+    """
+    os.makedirs(directory, exist_ok=True)
+    visits_path = os.path.join(directory, "visits.json")
+    caregivers_path = os.path.join(directory, "caregivers.json")
+    save_visits(visits, visits_path)
+    save_caregivers(caregivers, caregivers_path)
+    return visits_path, caregivers_path
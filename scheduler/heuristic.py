@@ -0,0 +1,410 @@
+"""Greedy construction and large-neighbourhood search for large instances.
+
+For instances where the exact model of `solver.py` is too big to build in the
+time budget, a greedy constructor produces a schedule in one pass and a
+large-neighbourhood search (LNS) then repeatedly frees a small window of the
+schedule (one day, one neighbourhood or a group of customers) and re-optimises
+it with a CP-SAT sub-model, every other assignment staying fixed.
+"""
+
+import random
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+
+from ortools.sat.python import cp_model
+
+from .models import Assignment, Caregiver, Visit, iso_week
+from .scorer import IncrementalScorer, ScheduleScore
+from .solver import build_eligibility, overlap_cliques
+
+# Largest number of visits freed by one LNS step
+WINDOW_SIZE = 60
+# CP-SAT time limit of one LNS step
+WINDOW_TIME_LIMIT_SECONDS = 2.0
+
+
+def _seconds(visit: Visit) -> int:
+    return int((visit.end - visit.start).total_seconds())
+
+
+class _Timelines:
+    """Visits of each caregiver sorted by start, for overlap checks."""
+
+    def __init__(self, visits: list[Visit]) -> None:
+        self._visits = visits
+        self._entries: dict[int, list[tuple[datetime, int]]] = defaultdict(list)
+        # bounds how far back an overlapping visit can start
+        self._max_duration = max(
+            (visit.end - visit.start for visit in visits), default=timedelta(0)
+        )
+
+    @classmethod
+    def of(cls, visits: list[Visit], assigned: dict[int, int]) -> "_Timelines":
+        """Timelines of an assignment, each sorted once rather than per insert."""
+        timelines = cls(visits)
+        for vi, ci in assigned.items():
+            timelines._entries[ci].append((visits[vi].start, vi))
+        for entries in timelines._entries.values():
+            entries.sort()
+        return timelines
+
+    def add(self, ci: int, vi: int) -> None:
+        entries = self._entries[ci]
+        entry = (self._visits[vi].start, vi)
+        entries.insert(bisect_left(entries, entry), entry)
+
+    def clashes(self, ci: int, vi: int) -> bool:
+        """Whether visit vi overlaps one of caregiver ci's visits."""
+        visit = self._visits[vi]
+        entries = self._entries[ci]
+        low = bisect_left(entries, (visit.start - self._max_duration, -1))
+        high = bisect_right(entries, (visit.end, len(self._visits)))
+        return any(
+            visit.overlaps(self._visits[vj]) for _, vj in entries[low:high] if vj != vi
+        )
+
+
+def construct_greedy(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    eligibility: list[list[int]] | None = None,
+) -> dict[int, int]:
+    """
+    Build a schedule in one pass, scarcest visits first.
+
+    Visits with the fewest eligible caregivers are placed first. Each goes to
+    a free caregiver (no overlap, weekly hours left), preferring the one who
+    already serves the customer, then one who already works in the
+    neighbourhood that day, then the least loaded. Visits nobody can take
+    stay unassigned.
+
+    Args:
+        visits: List of visits to be assigned
+        caregivers: List of available caregivers
+        eligibility: Eligible caregiver indices of each visit, if already known
+
+    Returns:
+        Mapping of visit index to caregiver index
+    """
+    if eligibility is None:
+        eligibility = build_eligibility(visits, caregivers)
+
+    timelines = _Timelines(visits)
+    week_seconds: dict[tuple[int, tuple[int, int]], int] = defaultdict(int)
+    total_seconds: dict[int, int] = defaultdict(int)
+    customer_caregivers: dict[str, set[int]] = defaultdict(set)
+    day_neighborhoods: dict[tuple[int, int], set[str]] = defaultdict(set)
+
+    assigned = {}
+    order = sorted(
+        range(len(visits)), key=lambda vi: (len(eligibility[vi]), visits[vi].start)
+    )
+    for vi in order:
+        visit = visits[vi]
+        week = iso_week(visit)
+        candidates = [
+            ci
+            for ci in eligibility[vi]
+            if week_seconds[(ci, week)] + _seconds(visit)
+            <= caregivers[ci].max_hours * 3600
+            and not timelines.clashes(ci, vi)
+        ]
+        if not candidates:
+            continue
+        ci = min(
+            candidates,
+            key=lambda ci: (
+                ci not in customer_caregivers[visit.customer],
+                visit.neighborhood not in day_neighborhoods[(ci, visit.weekday)],
+                total_seconds[ci],
+            ),
+        )
+        assigned[vi] = ci
+        timelines.add(ci, vi)
+        week_seconds[(ci, week)] += _seconds(visit)
+        total_seconds[ci] += _seconds(visit)
+        customer_caregivers[visit.customer].add(ci)
+        day_neighborhoods[(ci, visit.weekday)].add(visit.neighborhood)
+    return assigned
+
+
+def _fixed_state(
+    visits: list[Visit], assigned: dict[int, int], free: list[int]
+) -> tuple[
+    _Timelines,
+    dict[tuple[int, tuple[int, int]], int],
+    set[tuple[str, int]],
+    set[tuple[int, int, str]],
+]:
+    """
+    Aggregates of the assignments that stay fixed.
+
+    Returns:
+        Caregiver timelines, seconds worked per (caregiver, week), served
+        (customer, caregiver) pairs and worked (caregiver, weekday,
+        neighbourhood) triples
+    """
+    free_set = set(free)
+    fixed = {vi: ci for vi, ci in assigned.items() if vi not in free_set}
+    timelines = _Timelines.of(visits, fixed)
+    week_seconds: dict[tuple[int, tuple[int, int]], int] = defaultdict(int)
+    served: set[tuple[str, int]] = set()
+    present: set[tuple[int, int, str]] = set()
+    for vi, ci in fixed.items():
+        visit = visits[vi]
+        week_seconds[(ci, iso_week(visit))] += _seconds(visit)
+        served.add((visit.customer, ci))
+        present.add((ci, visit.weekday, visit.neighborhood))
+    return timelines, week_seconds, served, present
+
+
+def _add_free_constraints(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    free: list[int],
+    week_seconds: dict[tuple[int, tuple[int, int]], int],
+) -> None:
+    """At most one caregiver per visit, no overlaps and weekly hours left."""
+    visit_vars = defaultdict(list)
+    week_terms = defaultdict(list)
+    for (ci, vi), var in caregiver_visit.items():
+        visit_vars[vi].append((ci, var))
+        week_terms[(ci, iso_week(visits[vi]))].append((_seconds(visits[vi]), var))
+
+    for vi in free:
+        model.AddAtMostOne(var for _, var in visit_vars[vi])
+    for clique in overlap_cliques([visits[vi] for vi in free]):
+        clique_vars = defaultdict(list)
+        for local_vi in clique:
+            for ci, var in visit_vars[free[local_vi]]:
+                clique_vars[ci].append(var)
+        for overlapping in clique_vars.values():
+            if len(overlapping) > 1:
+                model.AddAtMostOne(overlapping)
+    for (ci, week), terms in week_terms.items():
+        capacity = caregivers[ci].max_hours * 3600 - week_seconds[(ci, week)]
+        if sum(seconds for seconds, _ in terms) > capacity:
+            model.Add(sum(seconds * var for seconds, var in terms) <= capacity)
+
+
+def _add_cost_indicators(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    visits: list[Visit],
+    served: set[tuple[str, int]],
+    present: set[tuple[int, int, str]],
+) -> list[cp_model.IntVar]:
+    """
+    Indicators of the new (customer, caregiver) pairs and new (caregiver,
+    weekday, neighbourhood) triples the free assignments would create.
+    """
+    indicators: dict[tuple, cp_model.IntVar] = {}
+    for (ci, vi), var in caregiver_visit.items():
+        visit = visits[vi]
+        pair = (visit.customer, ci)
+        presence = (ci, visit.weekday, visit.neighborhood)
+        keys: list[tuple] = [pair] if pair not in served else []
+        if presence not in present:
+            keys.append(presence)
+        for key in keys:
+            if key not in indicators:
+                indicators[key] = model.NewBoolVar(f"cost_{len(indicators)}")
+            model.AddImplication(var, indicators[key])
+    return list(indicators.values())
+
+
+def reoptimise(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    eligibility: list[list[int]],
+    assigned: dict[int, int],
+    free: list[int],
+    time_limit: float,
+    num_workers: int = 1,
+) -> dict[int, int | None] | None:
+    """
+    Re-optimise the free visits with every other assignment fixed.
+
+    The CP-SAT sub-model only holds the free visits. Caregivers whose fixed
+    visits overlap a free visit are not candidates for it, and each
+    caregiver's new visits must fit in the weekly hours left. The objective
+    staffs as many free visits as possible, then avoids new caregiver-customer
+    pairs (continuity) and new caregiver-day-neighbourhood pairs (travel).
+
+    Args:
+        visits: List of all visits
+        caregivers: List of all caregivers
+        eligibility: Eligible caregiver indices of each visit
+        assigned: Current mapping of visit index to caregiver index
+        free: Indices of the visits to re-optimise
+        time_limit: CP-SAT time limit in seconds
+        num_workers: CP-SAT search workers
+
+    Returns:
+        New caregiver index (None if unassigned) of each free visit, or None
+        if CP-SAT found no solution in time
+    """
+    timelines, week_seconds, served, present = _fixed_state(visits, assigned, free)
+
+    model = cp_model.CpModel()
+    caregiver_visit = {}
+    for vi in free:
+        for ci in eligibility[vi]:
+            if not timelines.clashes(ci, vi):
+                var = model.NewBoolVar(f"caregiver_{ci}_visit_{vi}")
+                model.AddHint(var, assigned.get(vi) == ci)
+                caregiver_visit[(ci, vi)] = var
+
+    _add_free_constraints(
+        model, caregiver_visit, visits, caregivers, free, week_seconds
+    )
+    costs = _add_cost_indicators(model, caregiver_visit, visits, served, present)
+    # staffing a visit outweighs any continuity or travel gain
+    model.Minimize(
+        (len(costs) + 1) * (len(free) - sum(caregiver_visit.values())) + sum(costs)
+    )
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = num_workers
+    status = solver.Solve(model)
+    if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+        return None
+
+    result: dict[int, int | None] = dict.fromkeys(free)
+    for (ci, vi), var in caregiver_visit.items():
+        if solver.Value(var):
+            result[vi] = ci
+    return result
+
+
+def _windows(visits: list[Visit]) -> list[list[int]]:
+    """Neighbourhoods to re-optimise: days, neighbourhoods and customer groups."""
+    by_day = defaultdict(list)
+    by_neighborhood = defaultdict(list)
+    by_customer = defaultdict(list)
+    for vi, visit in enumerate(visits):
+        by_day[visit.start.date()].append(vi)
+        by_neighborhood[visit.neighborhood].append(vi)
+        by_customer[visit.customer].append(vi)
+
+    # customers are grouped until a group holds about half a window
+    customer_groups: list[list[int]] = [[]]
+    for customer in sorted(by_customer):
+        if len(customer_groups[-1]) >= WINDOW_SIZE // 2:
+            customer_groups.append([])
+        customer_groups[-1].extend(by_customer[customer])
+
+    return [
+        window
+        for window in [
+            *by_day.values(),
+            *by_neighborhood.values(),
+            *customer_groups,
+        ]
+        if window
+    ]
+
+
+def _rank(score: ScheduleScore) -> tuple[int, float]:
+    """Sort key of a schedule: fewest violations, then best metrics."""
+    violations = (
+        score.unassigned_visits
+        + score.availability_violations
+        + score.overlap_violations
+        + score.max_hours_violations
+    )
+    return violations, -(score.continuity_score + score.travel_efficiency_score)
+
+
+def iter_schedules(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    time_budget: float = 60.0,
+    seed: int = 0,
+) -> Iterator[list[Assignment]]:
+    """
+    Yield progressively better schedules until the time budget is spent.
+
+    The first schedule is the greedy one; each following one improves on the
+    previous after an LNS step.
+
+    Args:
+        visits: List of visits to be assigned
+        caregivers: List of available caregivers
+        time_budget: Wall time in seconds for construction and search
+        seed: Seed of the window selection
+
+    Yields:
+        Lists of Assignment objects, each better than the previous one
+    """
+    deadline = time.monotonic() + time_budget
+    eligibility = build_eligibility(visits, caregivers)
+    assigned = construct_greedy(visits, caregivers, eligibility)
+    scorer = IncrementalScorer(
+        [
+            Assignment(visit_id=visits[vi].id, caregiver_id=caregivers[ci].id)
+            for vi, ci in assigned.items()
+        ],
+        visits,
+        caregivers,
+    )
+    yield scorer.assignments()
+
+    windows = _windows(visits)
+    rng = random.Random(seed)
+    while windows and time.monotonic() < deadline:
+        window = rng.choice(windows)
+        if len(window) > WINDOW_SIZE:
+            window = rng.sample(window, WINDOW_SIZE)
+        time_limit = min(WINDOW_TIME_LIMIT_SECONDS, deadline - time.monotonic())
+        result = reoptimise(
+            visits, caregivers, eligibility, assigned, window, max(time_limit, 0.01)
+        )
+        if result is None:
+            continue
+
+        before = _rank(scorer.score())
+        moves = 0
+        for vi, ci in result.items():
+            caregiver_id = caregivers[ci].id if ci is not None else None
+            if scorer.caregiver_of(visits[vi].id) != caregiver_id:
+                scorer.reassign(visits[vi].id, caregiver_id)
+                moves += 1
+        if moves and _rank(scorer.score()) < before:
+            for vi, ci in result.items():
+                if ci is None:
+                    assigned.pop(vi, None)
+                else:
+                    assigned[vi] = ci
+            scorer.checkpoint()
+            yield scorer.assignments()
+        else:
+            for _ in range(moves):
+                scorer.undo()
+
+
+def solve(
+    visits: list[Visit], caregivers: list[Caregiver], time_budget: float = 60.0
+) -> list[Assignment]:
+    """
+    Solve the scheduling problem with greedy construction and LNS.
+
+    Args:
+        visits: List of visits to be assigned
+        caregivers: List of available caregivers
+        time_budget: Wall time in seconds
+
+    Returns:
+        List of Assignment objects representing which caregiver
+          is assigned to which visit
+    """
+    best: list[Assignment] = []
+    for assignments in iter_schedules(visits, caregivers, time_budget):
+        best = assignments
+    return best
@@ -0,0 +1,227 @@
+"""Rolling-horizon decomposition of multi-week instances.
+
+Availability is a weekly pattern and max_hours a weekly budget, so the weeks
+of a long horizon only interact through continuity of care. One model over a
+month grows super-linearly harder to solve; `solve_weeks` instead solves each
+ISO week as its own instance with `solve`, which keeps the cost linear in the
+number of weeks.
+
+Even weeks are solved first, in parallel, then odd weeks, in parallel. Each
+week counts the caregivers who served a customer in the weeks around it as
+already serving it, so that keeping them costs no continuity, and is hinted
+with the one who served the customer most.
+"""
+
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from .instrumentation import SolveReport, timed
+from .models import Assignment, Caregiver, Visit, iso_week
+from .presolve import diagnose
+from .solver import TIME_LIMIT_SECONDS, solve
+
+
+def split_weeks(visits: list[Visit]) -> list[list[int]]:
+    """
+    Group visits by the ISO week they start in.
+
+    A week with a visit running into the next one (across midnight on Sunday)
+    is merged with it, since the two are no longer independent.
+
+    Args:
+        visits: List of visits
+
+    Returns:
+        Visit indices of each week, weeks in time order
+    """
+    by_week = defaultdict(list)
+    for vi, visit in enumerate(visits):
+        by_week[iso_week(visit)].append(vi)
+
+    weeks: list[list[int]] = []
+    latest_end = None
+    for week in sorted(by_week):
+        week_visits = by_week[week]
+        if latest_end is not None and latest_end > min(
+            visits[vi].start for vi in week_visits
+        ):
+            weeks[-1].extend(week_visits)
+        else:
+            weeks.append(list(week_visits))
+        week_end = max(visits[vi].end for vi in week_visits)
+        latest_end = week_end if latest_end is None else max(latest_end, week_end)
+    return weeks
+
+
+def _served_counts(
+    visits: list[Visit], schedules: list[list[Assignment]]
+) -> dict[str, Counter[str]]:
+    """Visits of each customer served by each caregiver in the schedules."""
+    customers = {visit.id: visit.customer for visit in visits}
+    served: dict[str, Counter[str]] = defaultdict(Counter)
+    for schedule in schedules:
+        for assignment in schedule:
+            served[customers[assignment.visit_id]][assignment.caregiver_id] += 1
+    return served
+
+
+def pairing_hint(
+    visits: list[Visit], week: list[int], schedules: list[list[Assignment]]
+) -> list[Assignment]:
+    """
+    Hint each visit of a week with its customer's usual caregiver.
+
+    Args:
+        visits: List of all visits
+        week: Visit indices of the week to hint
+        schedules: Schedules of other weeks, e.g. the adjacent ones
+
+    Returns:
+        For each visit of a customer seen in the schedules, an assignment to
+        the caregiver who served that customer most. solve repairs the hint
+        where it is not feasible.
+    """
+    served = _served_counts(visits, schedules)
+    return [
+        Assignment(
+            visit_id=visits[vi].id,
+            caregiver_id=served[visits[vi].customer].most_common(1)[0][0],
+        )
+        for vi in week
+        if visits[vi].customer in served
+    ]
+
+
+def _solve_week(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    hint: list[Assignment],
+    served: dict[str, set[str]],
+    num_workers: int,
+    continuity: str,
+    time_limit: float,
+    partial: bool,
+) -> tuple[list[Assignment], SolveReport]:
+    """Solve one week; runs in a worker process."""
+    report = SolveReport()
+    assignments = solve(
+        visits,
+        caregivers,
+        max_workers=num_workers,
+        hint=hint,
+        report=report,
+        continuity=continuity,
+        time_limit=time_limit,
+        partial=partial,
+        split_weeks=False,
+        served=served,
+    )
+    return assignments, report
+
+
+def _week_context(
+    visits: list[Visit],
+    weeks: list[list[int]],
+    wi: int,
+    schedules: list[list[Assignment] | None],
+    hint: list[Assignment] | None,
+    served: dict[str, set[str]] | None,
+) -> tuple[list[Assignment], dict[str, set[str]]]:
+    """
+    Hint and served caregivers of a week from the adjacent weeks.
+
+    The caller's hint comes first, then the pairings of the adjacent weeks;
+    the caller's served caregivers are extended with theirs.
+    """
+    week_ids = {visits[vi].id for vi in weeks[wi]}
+    given = [a for a in hint or [] if a.visit_id in week_ids]
+    hinted = {a.visit_id for a in given}
+    adjacent = [
+        schedule
+        for schedule in schedules[max(wi - 1, 0) : wi + 2]
+        if schedule is not None
+    ]
+    week_hint = given + [
+        assignment
+        for assignment in pairing_hint(visits, weeks[wi], adjacent)
+        if assignment.visit_id not in hinted
+    ]
+    week_served = {customer: set(ids) for customer, ids in (served or {}).items()}
+    for customer, counts in _served_counts(visits, adjacent).items():
+        week_served.setdefault(customer, set()).update(counts)
+    return week_hint, week_served
+
+
+def solve_weeks(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    max_workers: int | None = None,
+    hint: list[Assignment] | None = None,
+    report: SolveReport | None = None,
+    continuity: str = "max",
+    time_limit: float = TIME_LIMIT_SECONDS,
+    partial: bool = False,
+    served: dict[str, set[str]] | None = None,
+) -> list[Assignment]:
+    """
+    Solve a multi-week instance one ISO week at a time.
+
+    Even weeks are solved first, then odd weeks, which keep the caregivers of
+    the even weeks around them at no continuity cost; the weeks of each round
+    run concurrently in a process pool. The time limit is shared by the
+    rounds: each wave of concurrent weeks gets an equal part of the time left.
+    Arguments are those of solve.
+
+    Returns:
+        The schedules of every week, or an empty list when a week cannot be
+        fully staffed and partial is False
+    """
+    start = time.perf_counter()
+    with timed(report, "presolve"):
+        diagnosis = diagnose(visits, caregivers)
+    if report is not None:
+        report.diagnosis = diagnosis.to_dict()
+    if not diagnosis.feasible and not partial:
+        return []
+
+    weeks = split_weeks(visits)
+    schedules: list[list[Assignment] | None] = [None] * len(weeks)
+    cores = max_workers or os.cpu_count() or 1
+    rounds = [list(range(first, len(weeks), 2)) for first in (0, 1)]
+    # waves of at most `cores` weeks solved at once, per round
+    waves = [-(-len(round_weeks) // cores) for round_weeks in rounds]
+    for ri, round_weeks in enumerate(rounds):
+        if not round_weeks:
+            continue
+        pool_size = min(cores, len(round_weeks))
+        time_left = max(0.0, time_limit - (time.perf_counter() - start))
+        week_limit = time_left / sum(waves[ri:])
+        jobs = [
+            (
+                [visits[vi] for vi in weeks[wi]],
+                caregivers,
+                *_week_context(visits, weeks, wi, schedules, hint, served),
+                max(1, cores // pool_size),
+                continuity,
+                week_limit,
+                partial,
+            )
+            for wi in round_weeks
+        ]
+        if pool_size <= 1:
+            results = [_solve_week(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=pool_size) as executor:
+                futures = [executor.submit(_solve_week, *job) for job in jobs]
+                results = [future.result() for future in futures]
+
+        for wi, (assignments, week_report) in zip(round_weeks, results, strict=True):
+            if report is not None:
+                report.merge(week_report)
+            if not assignments and not partial:
+                return []
+            schedules[wi] = assignments
+
+    return [assignment for schedule in schedules for assignment in schedule or []]
@@ -0,0 +1,251 @@
+"""Incremental re-scheduling after changes to a solved instance.
+
+Visits get added, cancelled or moved and caregivers call in sick while a
+schedule is running. `reschedule` applies such a change to the current
+schedule without solving the whole instance again: untouched assignments stay
+fixed and only the affected visits, plus the nearby assignments they may
+displace, are re-optimised with the LNS sub-model of `heuristic.py`.
+
+The sub-model follows the size of the change, not of the schedule. What does
+grow with the schedule is a few linear passes to apply the change and to
+collect the fixed assignments, and building the caregivers' availability
+indexes once.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from .heuristic import WINDOW_SIZE, reoptimise
+from .models import Assignment, AvailabilityIndex, Caregiver, Visit
+from .solver import build_eligibility
+
+# CP-SAT limit of one re-schedule, short enough for interactive edits
+RESCHEDULE_TIME_LIMIT_SECONDS = 0.5
+
+
+@dataclass
+class CaregiverAbsence:
+    """A period during which a caregiver cannot work (e.g. sick leave)."""
+
+    caregiver_id: str
+    start: datetime
+    end: datetime
+
+    def covers(self, visit: Visit) -> bool:
+        """Check if the absence overlaps the visit."""
+        return self.start < visit.end and visit.start < self.end
+
+
+@dataclass
+class ScheduleChange:
+    """Changes to apply to a scheduled instance."""
+
+    added_visits: list[Visit] = field(default_factory=list)
+    cancelled_visit_ids: list[str] = field(default_factory=list)
+    # visits keeping their id with new times, customer or requirements
+    moved_visits: list[Visit] = field(default_factory=list)
+    absences: list[CaregiverAbsence] = field(default_factory=list)
+
+
+def apply_change(visits: list[Visit], change: ScheduleChange) -> list[Visit]:
+    """
+    Build the visit list after a change.
+
+    Cancelled visits are dropped, moved visits replace the visit with the same
+    id and added visits are appended.
+
+    Args:
+        visits: Current visits
+        change: Change to apply
+
+    Returns:
+        The updated list of visits
+
+    Raises:
+        ValueError: If a moved visit is unknown or also cancelled
+    """
+    cancelled = set(change.cancelled_visit_ids)
+    moved = {visit.id: visit for visit in change.moved_visits}
+    conflicting = moved.keys() & cancelled
+    if conflicting:
+        raise ValueError(f"Visits both moved and cancelled: {sorted(conflicting)}")
+    unknown = moved.keys() - {visit.id for visit in visits}
+    if unknown:
+        raise ValueError(f"Unknown moved visits: {sorted(unknown)}")
+    updated = [
+        moved.get(visit.id, visit) for visit in visits if visit.id not in cancelled
+    ]
+    updated.extend(change.added_visits)
+    return updated
+
+
+def _displaceable(
+    visits: list[Visit],
+    assigned: dict[int, int],
+    affected: list[int],
+    eligibility: list[list[int]],
+    limit: int,
+) -> list[int]:
+    """
+    Assigned visits whose caregiver could take an affected visit instead.
+
+    They run at the same time as an affected visit, so freeing them lets the
+    sub-model hand their caregiver over. The ones closest in time come first.
+    """
+    if limit <= 0 or not affected:
+        return []
+    max_duration = max(
+        (visit.end - visit.start for visit in visits), default=timedelta(0)
+    )
+    # only the assignments within the time span of the change are sorted
+    earliest = min(visits[vi].start for vi in affected) - max_duration
+    latest = max(visits[vi].end for vi in affected)
+    by_start = sorted(
+        (visits[vi].start, vi)
+        for vi in assigned
+        if earliest <= visits[vi].start <= latest
+    )
+    affected_set = set(affected)
+    candidates: dict[int, timedelta] = {}
+    for vi in affected:
+        visit = visits[vi]
+        eligible = set(eligibility[vi])
+        low = bisect_left(by_start, (visit.start - max_duration, -1))
+        high = bisect_right(by_start, (visit.end, len(visits)))
+        for start, vj in by_start[low:high]:
+            if (
+                vj not in affected_set
+                and assigned[vj] in eligible
+                and visit.overlaps(visits[vj])
+            ):
+                distance = abs(start - visit.start)
+                candidates[vj] = min(distance, candidates.get(vj, distance))
+    return sorted(candidates, key=lambda vj: (candidates[vj], vj))[:limit]
+
+
+def _split_schedule(
+    assignments: list[Assignment],
+    updated: list[Visit],
+    caregivers: list[Caregiver],
+    change: ScheduleChange,
+) -> tuple[dict[int, int], list[int]]:
+    """
+    Separate the assignments a change leaves untouched from the visits it affects.
+
+    Returns:
+        Mapping of kept visit index to caregiver index, and the indices of the
+        added, moved and absence-hit visits
+    """
+    visit_positions = {visit.id: vi for vi, visit in enumerate(updated)}
+    caregiver_positions = {caregiver.id: ci for ci, caregiver in enumerate(caregivers)}
+    moved = {visit.id for visit in change.moved_visits}
+    absences = defaultdict(list)
+    for absence in change.absences:
+        absences[absence.caregiver_id].append(absence)
+
+    assigned = {}
+    affected = [
+        visit_positions[visit.id]
+        for visit in [*change.moved_visits, *change.added_visits]
+    ]
+    for assignment in assignments:
+        vi = visit_positions.get(assignment.visit_id)
+        if vi is None or assignment.visit_id in moved:
+            continue
+        if any(
+            absence.covers(updated[vi])
+            for absence in absences.get(assignment.caregiver_id, [])
+        ):
+            affected.append(vi)
+        else:
+            assigned[vi] = caregiver_positions[assignment.caregiver_id]
+    return assigned, affected
+
+
+def _add_eligibility(
+    eligibility: list[list[int]],
+    updated: list[Visit],
+    caregivers: list[Caregiver],
+    indexes: list[AvailabilityIndex],
+    free: list[int],
+    absences: list[CaregiverAbsence],
+) -> None:
+    """Fill in the eligible caregivers of the free visits, excluding absent ones."""
+    positions = {caregiver.id: ci for ci, caregiver in enumerate(caregivers)}
+    free_visits = [updated[vi] for vi in free]
+    for vi, eligible in zip(
+        free, build_eligibility(free_visits, caregivers, indexes), strict=True
+    ):
+        absent = {
+            positions[absence.caregiver_id]
+            for absence in absences
+            if absence.covers(updated[vi])
+        }
+        eligibility[vi] = [ci for ci in eligible if ci not in absent]
+
+
+def reschedule(
+    assignments: list[Assignment],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    change: ScheduleChange,
+    time_limit: float = RESCHEDULE_TIME_LIMIT_SECONDS,
+) -> tuple[list[Visit], list[Assignment]]:
+    """
+    Update a schedule after a change, re-optimising only what it affects.
+
+    Added and moved visits, and visits of absent caregivers during their
+    absence, are always re-assigned. While they number fewer than
+    WINDOW_SIZE, assignments running at the same time whose caregiver could
+    cover them are freed as well, up to WINDOW_SIZE visits in total. Every
+    other assignment is kept as is.
+
+    Args:
+        assignments: Current schedule
+        visits: Visits of the current schedule
+        caregivers: List of available caregivers
+        change: Change to apply
+        time_limit: CP-SAT time limit in seconds
+
+    Returns:
+        The updated visits and schedule. Visits nobody can take stay
+        unassigned.
+
+    Raises:
+        ValueError: If a moved visit is unknown or also cancelled
+    """
+    updated = apply_change(visits, change)
+    assigned, affected = _split_schedule(assignments, updated, caregivers, change)
+
+    indexes = [
+        AvailabilityIndex.from_availability(caregiver.availability)
+        for caregiver in caregivers
+    ]
+    eligibility: list[list[int]] = [[] for _ in updated]
+    _add_eligibility(
+        eligibility, updated, caregivers, indexes, affected, change.absences
+    )
+    displaced = _displaceable(
+        updated, assigned, affected, eligibility, max(0, WINDOW_SIZE - len(affected))
+    )
+    _add_eligibility(
+        eligibility, updated, caregivers, indexes, displaced, change.absences
+    )
+    free = affected + displaced
+
+    result = reoptimise(updated, caregivers, eligibility, assigned, free, time_limit)
+    if result is None:
+        # keep the displaced visits where they were rather than dropping them
+        result = {vi: assigned.get(vi) for vi in free}
+    for vi, ci in result.items():
+        if ci is None:
+            assigned.pop(vi, None)
+        else:
+            assigned[vi] = ci
+
+    return updated, [
+        Assignment(visit_id=updated[vi].id, caregiver_id=caregivers[assigned[vi]].id)
+        for vi in sorted(assigned)
+    ]
@@ -0,0 +1,157 @@
+"""Phase timings, model size and CP-SAT statistics of a scheduling run.
+
+A `SolveReport` is passed down to the parts of the pipeline that should be
+measured. It collects the wall time of each phase, the size of the CP-SAT
+models and the solver statistics of each solved component, and can be written
+as a JSON report or as a Prometheus text exposition file.
+"""
+
+import json
+import time
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any
+
+from ortools.sat.python import cp_model
+
+
+@dataclass
+class SolveReport:
+    """
+    Measurements of one scheduling run.
+
+    Phases entered several times (e.g. once per component) accumulate. When
+    components are solved in worker processes, their phase times are summed
+    and can therefore exceed the wall time of the run.
+    """
+
+    phases: dict[str, float] = field(default_factory=dict)
+    variables: int = 0
+    constraints: int = 0
+    # CP-SAT statistics of each search: one per lexicographic stage (e.g.
+    # continuity, then travel) of each solved component
+    solves: list[dict[str, Any]] = field(default_factory=list)
+    # presolve diagnosis of the instance (see presolve.Diagnosis.to_dict)
+    diagnosis: dict[str, Any] | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as the phase name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+
+    def record_model(self, model: cp_model.CpModel) -> None:
+        """Add the size of a built model."""
+        proto = model.Proto()
+        self.variables += len(proto.variables)
+        self.constraints += len(proto.constraints)
+
+    def record_solve(
+        self, solver: cp_model.CpSolver, status: int, stage: str | None = None
+    ) -> None:
+        """
+        Add the statistics of a finished CP-SAT search.
+
+        The searches recorded on one report belong to one component, as
+        component 0; merge renumbers them.
+        """
+        found = status == cp_model.OPTIMAL or status == cp_model.FEASIBLE
+        objective = solver.ObjectiveValue() if found else None
+        bound = solver.BestObjectiveBound()
+        gap = None
+        if objective is not None:
+            gap = abs(objective - bound) / max(1.0, abs(objective))
+        self.solves.append(
+            {
+                "component": 0,
+                "stage": stage,
+                "status": solver.StatusName(status),
+                "objective": objective,
+                "best_bound": bound,
+                "gap": gap,
+                "conflicts": solver.NumConflicts(),
+                "branches": solver.NumBranches(),
+                "wall_time": solver.WallTime(),
+            }
+        )
+
+    def merge(self, other: "SolveReport") -> None:
+        """Add the measurements of another report, e.g. from a worker."""
+        for name, seconds in other.phases.items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+        self.variables += other.variables
+        self.constraints += other.constraints
+        # the other report's components follow the ones already recorded
+        offset = 1 + max((stats["component"] for stats in self.solves), default=-1)
+        self.solves.extend(
+            {**stats, "component": stats["component"] + offset}
+            for stats in other.solves
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """The report as JSON-serialisable data."""
+        return {
+            "phases": dict(self.phases),
+            "model": {"variables": self.variables, "constraints": self.constraints},
+            "solves": list(self.solves),
+            "diagnosis": self.diagnosis,
+        }
+
+    def write_json(self, file_path: str) -> None:
+        """Write the report as a JSON document."""
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def to_prometheus(self, prefix: str = "scheduler") -> str:
+        """Render the report in the Prometheus text exposition format."""
+        lines = [
+            f"# TYPE {prefix}_phase_seconds gauge",
+            *(
+                f'{prefix}_phase_seconds{{phase="{name}"}} {seconds}'
+                for name, seconds in self.phases.items()
+            ),
+            f"# TYPE {prefix}_model_variables gauge",
+            f"{prefix}_model_variables {self.variables}",
+            f"# TYPE {prefix}_model_constraints gauge",
+            f"{prefix}_model_constraints {self.constraints}",
+        ]
+        labels = [
+            f'component="{stats["component"]}",stage="{stats["stage"] or ""}"'
+            for stats in self.solves
+        ]
+        for metric in (
+            "objective",
+            "best_bound",
+            "gap",
+            "conflicts",
+            "branches",
+            "wall_time",
+        ):
+            lines.append(f"# TYPE {prefix}_solver_{metric} gauge")
+            lines.extend(
+                f"{prefix}_solver_{metric}{{{label}}} {stats[metric]}"
+                for label, stats in zip(labels, self.solves, strict=True)
+                if stats[metric] is not None
+            )
+        lines.append(f"# TYPE {prefix}_solver_status gauge")
+        lines.extend(
+            f'{prefix}_solver_status{{{label},status="{stats["status"]}"}} 1'
+            for label, stats in zip(labels, self.solves, strict=True)
+        )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, file_path: str) -> None:
+        """Write the report as a Prometheus text file (node exporter format)."""
+        with open(file_path, "w") as f:
+            f.write(self.to_prometheus())
+
+
+def timed(report: SolveReport | None, name: str) -> AbstractContextManager[None]:
+    """Time a block as a phase of report, or do nothing without a report."""
+    return report.phase(name) if report is not None else nullcontext()
@@ -1,27 +1,148 @@
 """Main module for Bloom Care OR Take-home Test."""
 
+import argparse
+import os
+from typing import Any
+
 from .evaluator import display_caregiver_schedules, evaluate
-from .parser import load_caregivers, load_visits
+from .heuristic import solve as solve_heuristic
+from .instrumentation import SolveReport
+from .models import Assignment, Caregiver, Visit
+from .optimiser import CONTINUITY_OBJECTIVES
+from .parser import (
+    load_assignments,
+    load_caregivers,
+    load_columnar,
+    load_visits,
+    save_assignments,
+)
 from .solver import solve
 
 
-def main() -> None:
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="scheduler", description=__doc__)
+    parser.add_argument(
+        "--visits",
+        default="inputs/visits.json",
+        help="visits JSON file, or a columnar instance directory (then "
+        "--caregivers is ignored)",
+    )
+    parser.add_argument("--caregivers", default="inputs/caregivers.json")
+    parser.add_argument(
+        "--warm-start",
+        metavar="SCHEDULE",
+        help="previous schedule (JSON assignments) to start the solver from",
+    )
+    parser.add_argument(
+        "--cache-dir", help="reuse schedules of previously solved identical inputs"
+    )
+    parser.add_argument("--output", help="write the assignments to this JSON file")
+    parser.add_argument(
+        "--solver",
+        choices=("exact", "heuristic"),
+        default="exact",
+        help="exact CP-SAT model, or greedy construction and LNS for large inputs",
+    )
+    parser.add_argument(
+        "--continuity",
+        choices=CONTINUITY_OBJECTIVES,
+        default="max",
+        help="combine unique caregivers per customer by worst case, sum or ratio",
+    )
+    parser.add_argument(
+        "--partial",
+        action="store_true",
+        help="staff as many visits as possible when not all of them can be",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=60.0,
+        help="wall time in seconds of the heuristic solver",
+    )
+    parser.add_argument(
+        "--report", metavar="JSON", help="write phase timings and solver statistics"
+    )
+    parser.add_argument(
+        "--prometheus",
+        metavar="PROM",
+        help="write the same report in the Prometheus text format",
+    )
+    return parser.parse_args(argv)
+
+
+def _print_diagnosis(diagnosis: dict[str, Any]) -> None:
+    print("\nNot every visit can be staffed (rerun with --partial to staff most):")
+    if diagnosis["unstaffable_visits"]:
+        print(f"  No eligible caregiver: {', '.join(diagnosis['unstaffable_visits'])}")
+    for slot in diagnosis["overloaded_slots"]:
+        print(
+            f"  {slot['unmatched']} caregiver(s) short for overlapping visits "
+            f"{', '.join(slot['visits'])}"
+        )
+    for shortfall in diagnosis["hours_shortfalls"]:
+        print(
+            f"  {shortfall['week']} {shortfall['skill']}: "
+            f"{shortfall['required_hours']:.1f}h needed, "
+            f"{shortfall['capacity_hours']:.1f}h of max hours"
+        )
+
+
+def _solve(
+    args: argparse.Namespace,
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    report: SolveReport,
+) -> list[Assignment]:
+    if args.solver == "heuristic":
+        with report.phase("solve"):
+            return solve_heuristic(visits, caregivers, args.time_budget)
+    hint = load_assignments(args.warm_start) if args.warm_start else None
+    assignments = solve(
+        visits,
+        caregivers,
+        hint=hint,
+        cache_dir=args.cache_dir,
+        report=report,
+        continuity=args.continuity,
+        partial=args.partial,
+    )
+    if not assignments and report.diagnosis is not None:
+        _print_diagnosis(report.diagnosis)
+    return assignments
+
+
+def main(argv: list[str] | None = None) -> None:
     """Main entry point for the application."""
+    args = _parse_args(argv)
+    report = SolveReport()
+
     # Load the data
-    visits = load_visits()
-    caregivers = load_caregivers()
+    with report.phase("load"):
+        if os.path.isdir(args.visits):
+            visits, caregivers = load_columnar(args.visits).to_models()
+        else:
+            visits = load_visits(args.visits)
+            caregivers = load_caregivers(args.caregivers)
 
     print(f"Loaded {len(visits)} visits and {len(caregivers)} caregivers")
 
     # Solve the scheduling problem
     print("\nSolving scheduling problem...")
-    assignments = solve(visits, caregivers)
+    assignments = _solve(args, visits, caregivers, report)
 
     print(f"Generated {len(assignments)} assignments")
+    if args.output:
+        save_assignments(assignments, args.output)
 
     # Evaluate the results
     print("\nEvaluating results...")
-    evaluation = evaluate(assignments, visits, caregivers)
+    with report.phase("evaluation"):
+        evaluation = evaluate(assignments, visits, caregivers)
+    if args.report:
+        report.write_json(args.report)
+    if args.prometheus:
+        report.write_prometheus(args.prometheus)
 
     # Display results
     print("\n" + "=" * 50)
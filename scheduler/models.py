@@ -1,10 +1,27 @@
 """Data models for Bloom Care OR Take-home Test."""
 
+from bisect import bisect_right
 from dataclasses import dataclass
 from datetime import datetime, time
 
+# Availability day names, indexed by datetime.weekday()
+WEEKDAYS = (
+    "MONDAY",
+    "TUESDAY",
+    "WEDNESDAY",
+    "THURSDAY",
+    "FRIDAY",
+    "SATURDAY",
+    "SUNDAY",
+)
 
-@dataclass
+
+def seconds_of_day(moment: datetime | time) -> int:
+    """Seconds elapsed since midnight."""
+    return moment.hour * 3600 + moment.minute * 60 + moment.second
+
+
+@dataclass(slots=True)
 class Visit:
     """Represents a visit/shift that needs to be staffed."""
 
@@ -15,6 +32,21 @@ class Visit:
     required_skill: str
     neighborhood: str
 
+    @property
+    def weekday(self) -> int:
+        """Day of the week of the visit start, as datetime.weekday()."""
+        return self.start.weekday()
+
+    @property
+    def start_of_day(self) -> int:
+        """Seconds since midnight at the visit start."""
+        return seconds_of_day(self.start)
+
+    @property
+    def end_of_day(self) -> int:
+        """Seconds since midnight at the visit end."""
+        return seconds_of_day(self.end)
+
     def overlaps(self, other: "Visit") -> bool:
         """Check if the visit overlaps with another visit."""
         # they can overlap at the start or end, or one can be contained in the other
@@ -34,7 +66,13 @@ class Visit:
         )
 
 
-@dataclass
+def iso_week(visit: Visit) -> tuple[int, int]:
+    """ISO (year, week) of the start of a visit, the period of max_hours."""
+    year, week, _ = visit.start.isocalendar()
+    return year, week
+
+
+@dataclass(slots=True)
 class Availability:
     """Represents a caregiver's availability for a specific day."""
 
@@ -46,18 +84,67 @@ class Availability:
     def check_availability(self, visit: Visit) -> bool:
         """Check if the availability overlaps with the visit."""
         # 1. check if the visit start is the same day of the week as the day string
-        if visit.start.strftime("%A").upper() != self.day:
+        if WEEKDAYS[visit.weekday] != self.day:
             return False
 
         # 2. check that both start and end are in the availability
-        visit_start_time = visit.start.time()
-        visit_end_time = visit.end.time()
-
         # Both start and end times must be within availability window
-        return self.start <= visit_start_time and visit_end_time <= self.end
+        return seconds_of_day(
+            self.start
+        ) <= visit.start_of_day and visit.end_of_day <= seconds_of_day(self.end)
+
+
+@dataclass(slots=True)
+class AvailabilityIndex:
+    """
+    A caregiver's availability slots indexed by weekday.
+
+    Built once per caregiver, it answers the same question as checking every
+    Availability.check_availability with one bisection: slot starts are
+    sorted, and a visit fits if one of the slots starting no later than the
+    visit ends no earlier than it, i.e. if the running maximum of their ends
+    reaches the visit end. Times are seconds since midnight.
+    """
+
+    starts: dict[int, list[int]]  # weekday -> sorted slot starts
+    reach: dict[int, list[int]]  # weekday -> running max of slot ends
+
+    @classmethod
+    def from_availability(cls, availability: list[Availability]) -> "AvailabilityIndex":
+        day_codes = {day: weekday for weekday, day in enumerate(WEEKDAYS)}
+        slots: dict[int, list[tuple[int, int]]] = {}
+        for slot in availability:
+            if slot.day in day_codes:
+                slots.setdefault(day_codes[slot.day], []).append(
+                    (seconds_of_day(slot.start), seconds_of_day(slot.end))
+                )
+
+        starts: dict[int, list[int]] = {}
+        reach: dict[int, list[int]] = {}
+        for weekday, day_slots in slots.items():
+            day_slots.sort()
+            starts[weekday] = [start for start, _ in day_slots]
+            reach[weekday] = []
+            latest_end = -1
+            for _, end in day_slots:
+                latest_end = max(latest_end, end)
+                reach[weekday].append(latest_end)
+        return cls(starts=starts, reach=reach)
+
+    def covers(self, visit: Visit) -> bool:
+        """Check if one of the slots contains the visit."""
+        return self.contains(visit.weekday, visit.start_of_day, visit.end_of_day)
+
+    def contains(self, weekday: int, start: int, end: int) -> bool:
+        """Check if one of the slots contains the given times of a weekday."""
+        starts = self.starts.get(weekday)
+        if not starts:
+            return False
+        position = bisect_right(starts, start)
+        return position > 0 and end <= self.reach[weekday][position - 1]
 
 
-@dataclass
+@dataclass(slots=True)
 class Caregiver:
     """Represents a caregiver with their availability and skills."""
 
@@ -68,7 +155,7 @@ class Caregiver:
     skills: list[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class Assignment:
     """Represents the assignment of a caregiver to a visit."""
 
@@ -1,86 +1,233 @@
+"""Continuity and travel objectives of the CP-SAT model."""
+
+import math
+from collections import Counter, defaultdict
+
 from ortools.sat.python import cp_model
-from collections import defaultdict
-from .models import Assignment, Caregiver, Visit
 
+from .models import Caregiver, Visit
 
+# How the per-customer counts of unique caregivers are combined
+CONTINUITY_OBJECTIVES = ("max", "sum", "ratio")
+# Above this, ratio weights are rounded instead of using the exact common multiple
+_MAX_RATIO_SCALE = 10**6
 
 
-def minimize_max_unique_caregivers_per_customer(model, caregiver_visit, caregivers, visits):
+def minimize_max_unique_caregivers_per_customer(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    caregivers: list[Caregiver],
+    visits: list[Visit],
+) -> cp_model.LinearExprT:
     """
     Minimize the maximum number of unique caregivers assigned to any customer.
 
-    Args: 
+    Args:
         model: The CP-SAT model
-        caregiver_visit: Dictionary mapping (caregiver_index, visit_index) to 
-            (this is our main decision variable)
+        caregiver_visit: Dictionary mapping (caregiver_index, visit_index) to
+            a BoolVar, for eligible pairs only (this is our main decision variable)
         caregivers: List of caregivers
         visits: List of visits
     Returns:
-        max_unique_caregivers: The variable representing the maximum number of 
+        max_unique_caregivers: The variable representing the maximum number of
         unique caregivers assigned to any customer
     """
-    customers = list(set(visit.customer for visit in visits))
-    
-    # Mapping: customer → list of caregiver assigned (BoolVar)
-    caregiver_assigned_to_customer = {
-        (customer, ci): model.NewBoolVar(f'caregiver_{ci}_assigned_to_customer_{customer}')
-        for customer in customers
-        for ci in range(len(caregivers))
-    }
-
-
-    # Link caregiver_assigned_to_customer with caregiver_visit decisions
-    for vi, visit in enumerate(visits):
-        customer = visit.customer
-        for ci in range(len(caregivers)):
-            # caregiver_visit[(ci, vi)] is a BoolVar → whether ci visits vi
-            # If caregiver ci is assigned to any visit of customer, set caregiver_assigned_to_customer to 1
-            model.AddImplication(caregiver_visit[(ci, vi)], caregiver_assigned_to_customer[(customer, ci)])
-
-    # Sum unique caregivers per customer
-    n_diff_caregivers = {}
-    for customer in customers:
-        assigned_vars = [caregiver_assigned_to_customer[(customer, ci)] for ci in range(len(caregivers))]
-        n_diff = model.NewIntVar(0, len(caregivers), f'n_diff_caregivers_customer_{customer}')
-        model.Add(n_diff == sum(assigned_vars))
-        n_diff_caregivers[customer] = n_diff
-
-    # Define max over all customers
-    max_unique_caregivers = model.NewIntVar(0, len(caregivers), 'max_unique_caregivers')
-    for n_diff in n_diff_caregivers.values():
-        model.Add(n_diff <= max_unique_caregivers)
+    max_unique_caregivers = minimize_unique_caregivers_per_customer(
+        model, caregiver_visit, caregivers, visits, objective="max"
+    )
 
     # Objective: minimize max
     model.Minimize(max_unique_caregivers)
 
     return max_unique_caregivers
 
-            
 
+def _ratio_weights(visit_counts: dict[str, int]) -> dict[str, int]:
+    """Integer weights proportional to 1 / number of visits of each customer."""
+    scale = math.lcm(*visit_counts.values())
+    if scale > _MAX_RATIO_SCALE:
+        return {
+            customer: round(_MAX_RATIO_SCALE / n_visits)
+            for customer, n_visits in visit_counts.items()
+        }
+    return {customer: scale // n_visits for customer, n_visits in visit_counts.items()}
+
+
+def customer_lower_bounds(
+    visits: list[Visit], cliques: list[list[int]]
+) -> dict[str, int]:
+    """Most visits of each customer in one group of mutually overlapping visits."""
+    lower_bounds: defaultdict[str, int] = defaultdict(int)
+    for clique in cliques:
+        per_customer = Counter(visits[vi].customer for vi in clique)
+        for customer, n_overlapping in per_customer.items():
+            lower_bounds[customer] = max(lower_bounds[customer], n_overlapping)
+    return lower_bounds
+
+
+def _serves_vars(
+    model: cp_model.CpModel,
+    visit_vars: dict[tuple[str, int], list[cp_model.IntVar]],
+    caregivers: list[Caregiver],
+    served: dict[str, set[str]],
+) -> tuple[dict[str, list[cp_model.IntVar]], dict[str, cp_model.LinearExprT]]:
+    """
+    One BoolVar per (customer, caregiver) pair, set iff the caregiver serves
+    the customer.
 
-# def minimize_max_switches_per_caregiver(model, caregiver_visit, caregivers, switches_per_caregiver):
-#     # For each caregiver, create BoolVars indicating if that switch happens (both visits assigned to caregiver)
-#     switches_vars_per_caregiver = {}
+    Returns:
+        The BoolVars of each customer, and the unique caregivers of each
+        customer: those already serving it elsewhere plus the new ones
+        serving it here
+    """
+    assigned_vars_per_customer: defaultdict[str, list[cp_model.IntVar]] = defaultdict(
+        list
+    )
+    unique_per_customer: dict[str, cp_model.LinearExprT] = {}
+    for (customer, ci), assigned_visits in visit_vars.items():
+        serves = model.NewBoolVar(f"caregiver_{ci}_assigned_to_customer_{customer}")
+        # serves iff at least one of the customer's visits goes to ci
+        for assigned in assigned_visits:
+            model.AddImplication(assigned, serves)
+        model.AddBoolOr(assigned_visits).OnlyEnforceIf(serves)
+        assigned_vars_per_customer[customer].append(serves)
+        known = served.get(customer, set())
+        unique_per_customer.setdefault(customer, len(known))
+        if caregivers[ci].id not in known:
+            unique_per_customer[customer] += serves
+    return assigned_vars_per_customer, unique_per_customer
+
+
+def minimize_unique_caregivers_per_customer(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    caregivers: list[Caregiver],
+    visits: list[Visit],
+    objective: str = "max",
+    cliques: list[list[int]] | None = None,
+    served: dict[str, set[str]] | None = None,
+) -> cp_model.LinearExprT:
+    """
+    Build the continuity objective: unique caregivers per customer.
 
-#     for ci in range(len(caregivers)):
-#         switches_vars = []
-#         for (vi1, vi2) in switches_per_caregiver.get(ci, []):
-#             switch_var = model.NewBoolVar(f'switch_c{ci}_v{vi1}_v{vi2}')
-#             # switch_var == 1 iff caregiver assigned to both visits
-#             model.AddBoolAnd([caregiver_visit[(ci, vi1)], caregiver_visit[(ci, vi2)]]).OnlyEnforceIf(switch_var)
-#             model.AddBoolOr([caregiver_visit[(ci, vi1)].Not(), caregiver_visit[(ci, vi2)].Not()]).OnlyEnforceIf(switch_var.Not())
-#             switches_vars.append(switch_var)
-#         switches_vars_per_caregiver[ci] = switches_vars
+    One BoolVar per (customer, caregiver) pair that an eligible visit makes
+    possible, equal to whether the caregiver serves the customer. Overlapping
+    visits of a customer need different caregivers, which gives each customer
+    a lower bound on its count.
 
-#     # Sum switches per caregiver
-#     total_switches_per_caregiver = {}
-#     for ci, switches_vars in switches_vars_per_caregiver.items():
-#         total_switches_per_caregiver[ci] = model.NewIntVar(0, len(switches_vars), f'total_switches_caregiver_{ci}')
-#         model.Add(total_switches_per_caregiver[ci] == sum(switches_vars))
+    Args:
+        model: The CP-SAT model
+        caregiver_visit: Dictionary mapping (caregiver_index, visit_index) to
+            a BoolVar, for eligible pairs only
+        caregivers: List of caregivers
+        visits: List of visits
+        objective: 'max' for the worst customer, 'sum' for the total over
+            customers, 'ratio' for the evaluator's continuity score (sum of
+            unique caregivers / visits of each customer)
+        cliques: Visit indices of groups of mutually overlapping visits, used
+            for the lower bounds
+        served: Customer -> ids of the caregivers already serving it outside
+            the model (e.g. in adjacent weeks). They count once whether or not
+            they serve it here, so keeping them costs no continuity
+    Returns:
+        The variable or linear expression to minimize
+    """
+    if objective not in CONTINUITY_OBJECTIVES:
+        raise ValueError(f"Unknown continuity objective: {objective}")
+
+    # Mapping: (customer, caregiver) -> visit variables linking them.
+    # caregiver_visit only holds eligible pairs, so we never create a
+    # (customer, caregiver) variable that could not possibly be set
+    visit_vars: defaultdict[tuple[str, int], list[cp_model.IntVar]] = defaultdict(list)
+    for (ci, vi), assigned in caregiver_visit.items():
+        visit_vars[(visits[vi].customer, ci)].append(assigned)
+
+    served = served or {}
+    assigned_vars_per_customer, unique_per_customer = _serves_vars(
+        model, visit_vars, caregivers, served
+    )
+
+    # overlapping visits of a customer cannot share a caregiver
+    lower_bounds = customer_lower_bounds(visits, cliques or [])
+    for customer, lower_bound in lower_bounds.items():
+        if lower_bound > 1:
+            model.Add(sum(assigned_vars_per_customer[customer]) >= lower_bound)
+
+    if objective == "sum":
+        return sum(unique_per_customer.values())
+
+    if objective == "ratio":
+        visit_counts = Counter(visit.customer for visit in visits)
+        # a customer with a single visit always scores 1, whoever serves it
+        weights = _ratio_weights(
+            {customer: n for customer, n in visit_counts.items() if n > 1}
+        )
+        return sum(
+            weights[customer] * unique
+            for customer, unique in unique_per_customer.items()
+            if customer in weights
+        )
 
-#     # Max switches over caregivers
-#     max_switches = model.NewIntVar(0, max(len(v) for v in switches_vars_per_caregiver.values() or [[0]]), 'max_switches_per_caregiver')
-#     model.AddMaxEquality(max_switches, list(total_switches_per_caregiver.values()))
+    # Define max over all customers
+    upper_bound = len(caregivers) + max(map(len, served.values()), default=0)
+    lower_bound = min(max(lower_bounds.values(), default=0), len(caregivers))
+    max_unique_caregivers: cp_model.IntVar = model.NewIntVar(
+        lower_bound, upper_bound, "max_unique_caregivers"
+    )
+    for unique in unique_per_customer.values():
+        model.Add(unique <= max_unique_caregivers)
+
+    return max_unique_caregivers
+
+
+def minimize_neighborhood_switches(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    caregivers: list[Caregiver],
+    visits: list[Visit],
+) -> cp_model.LinearExprT:
+    """
+    Minimize a lower bound of the neighborhood switches of each caregiver-day.
 
-#     # Objective: minimize max switches per caregiver
-#     model.Minimize(max_switches)
\ No newline at end of file
+    A caregiver working in k neighborhoods on a day switches at least k - 1
+    times, so the sum over caregiver-days of (neighborhoods - 1) bounds the
+    switches `_calculate_travel_efficiency_score` reports. It needs one BoolVar
+    per (caregiver, weekday, neighborhood) presence and per caregiver-day, and
+    one implication per eligible (caregiver, visit) pair, instead of a BoolVar
+    per pair of visits.
+
+    Args:
+        model: The CP-SAT model
+        caregiver_visit: Dictionary mapping (caregiver_index, visit_index) to
+            a BoolVar, for eligible pairs only
+        caregivers: List of caregivers
+        visits: List of visits
+    Returns:
+        switches: The linear expression of the switch lower bound, to minimize
+    """
+    # days are weekdays, as in the evaluator
+    presence: dict[tuple[int, int, str], cp_model.IntVar] = {}
+    for (ci, vi), assigned in caregiver_visit.items():
+        visit = visits[vi]
+        key = (ci, visit.weekday, visit.neighborhood)
+        if key not in presence:
+            presence[key] = model.NewBoolVar(
+                f"caregiver_{ci}_in_{visit.neighborhood}_on_day_{visit.weekday}"
+            )
+        # visiting vi means being in its neighborhood that day
+        model.AddImplication(assigned, presence[key])
+
+    presences_per_day: defaultdict[tuple[int, int], list[cp_model.IntVar]] = (
+        defaultdict(list)
+    )
+    for (ci, weekday, _), present in presence.items():
+        presences_per_day[(ci, weekday)].append(present)
+
+    # a caregiver-day only counts as worked if the caregiver is somewhere
+    worked_days: list[cp_model.IntVar] = []
+    for (ci, weekday), presences in presences_per_day.items():
+        worked = model.NewBoolVar(f"caregiver_{ci}_works_on_day_{weekday}")
+        model.AddBoolOr(presences).OnlyEnforceIf(worked)
+        worked_days.append(worked)
+
+    return sum(presence.values()) - sum(worked_days)
@@ -1,70 +1,307 @@
 import json
-from datetime import datetime
+import sys
+from collections.abc import Iterator
+from datetime import datetime, time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, TextIO
 
-from .models import Availability, Caregiver, Visit
+from .models import Assignment, Availability, Caregiver, Visit
+
+if TYPE_CHECKING:
+    from .columnar import ColumnarInstance
+
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+_CLOCK_FORMAT = "%H:%M"
+_READ_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=1 << 16)
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a "YYYY-MM-DD HH:MM" timestamp.
+
+    Slicing the fixed-width fields is much faster than strptime; anything that
+    does not look like the expected layout goes through strptime so that it
+    fails the same way. Visits share few distinct timestamps, hence the cache.
+    """
+    if (
+        len(value) == 16
+        and value[4] == "-"
+        and value[7] == "-"
+        and value[10] == " "
+        and value[13] == ":"
+        and value.replace("-", "").replace(" ", "").replace(":", "").isdigit()
+    ):
+        return datetime(
+            int(value[0:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+        )
+    return datetime.strptime(value, _TIMESTAMP_FORMAT)
+
+
+@lru_cache(maxsize=1 << 12)
+def _parse_clock(value: str) -> time:
+    """Parse a "HH:MM" time of day."""
+    if len(value) == 5 and value[2] == ":" and value.replace(":", "").isdigit():
+        return time(int(value[0:2]), int(value[3:5]))
+    return datetime.strptime(value, _CLOCK_FORMAT).time()
+
+
+def _iter_json_lines(f: TextIO, head: str) -> Iterator[dict[str, Any]]:
+    """Yield one object per non-blank line, head being already read from f."""
+    for line in (head + f.readline()).splitlines():
+        if line.strip():
+            yield json.loads(line)
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _iter_json_array(f: TextIO, head: str) -> Iterator[dict[str, Any]]:
+    """Decode a JSON array element by element, head being already read from f."""
+    decoder = json.JSONDecoder()
+    buffer = head
+    position = buffer.index("[") + 1
+    eof = False
+    while True:
+        # skip separators between array elements
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(_READ_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield record
+
+
+def _iter_json_records(file_path: str) -> Iterator[dict[str, Any]]:
+    """Yield the objects of a JSON array or JSON Lines file one at a time.
+
+    A JSON array is decoded element by element from fixed-size reads, so the
+    whole document is never held in memory.
+    """
+    with open(file_path) as f:
+        head = f.read(_READ_SIZE)
+        if head.lstrip().startswith("["):
+            yield from _iter_json_array(f, head)
+        else:
+            yield from _iter_json_lines(f, head)
+
+
+def _visit_from_dict(visit_data: dict[str, Any]) -> Visit:
+    # customers, neighborhoods and skills repeat across thousands of records:
+    # interning keeps a single copy of each string
+    return Visit(
+        id=visit_data["id"],
+        start=_parse_timestamp(visit_data["start"]),
+        end=_parse_timestamp(visit_data["end"]),
+        customer=sys.intern(visit_data["customer"]),
+        required_skill=sys.intern(visit_data["required_skill"]),
+        neighborhood=sys.intern(visit_data["neighborhood"]),
+    )
+
+
+def _caregiver_from_dict(caregiver_data: dict[str, Any]) -> Caregiver:
+    availability_list = []
+    for avail_data in caregiver_data["availability"]:
+        availability = Availability(
+            day=sys.intern(avail_data["day"]),
+            start=_parse_clock(avail_data["start"]),
+            end=_parse_clock(avail_data["end"]),
+        )
+        availability_list.append(availability)
+
+    return Caregiver(
+        id=caregiver_data["id"],
+        name=caregiver_data["name"],
+        max_hours=caregiver_data["max_hours"],
+        availability=availability_list,
+        skills=[sys.intern(skill) for skill in caregiver_data["skills"]],
+    )
+
+
+def iter_visits(
+    file_path: str = "inputs/visits.json",
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Iterator[Visit]:
+    """Stream visits from a JSON array or JSON Lines file.
+
+    Args:
+        file_path: Path to the visits file
+        start: If given, skip visits starting before this time
+        end: If given, skip visits starting at or after this time
+
+    Yields:
+        Visit objects, in file order
+    """
+    for visit_data in _iter_json_records(file_path):
+        visit = _visit_from_dict(visit_data)
+        if start is not None and visit.start < start:
+            continue
+        if end is not None and visit.start >= end:
+            continue
+        yield visit
 
 
 def load_visits(file_path: str = "inputs/visits.json") -> list[Visit]:
     """Load visits from JSON file.
 
     Args:
-        file_path: Path to the visits JSON file
+        file_path: Path to the visits JSON (or JSON Lines) file
 
     Returns:
         List of Visit objects
     """
-    with open(file_path) as f:
-        data = json.load(f)
-
-    visits = []
-    for visit_data in data:
-        visit = Visit(
-            id=visit_data["id"],
-            start=datetime.strptime(visit_data["start"], "%Y-%m-%d %H:%M"),
-            end=datetime.strptime(visit_data["end"], "%Y-%m-%d %H:%M"),
-            customer=visit_data["customer"],
-            required_skill=visit_data["required_skill"],
-            neighborhood=visit_data["neighborhood"],
-        )
-        visits.append(visit)
-
-    return visits
+    return list(iter_visits(file_path))
 
 
 def load_caregivers(file_path: str = "inputs/caregivers.json") -> list[Caregiver]:
     """Load caregivers from JSON file.
 
     Args:
-        file_path: Path to the caregivers JSON file
+        file_path: Path to the caregivers JSON (or JSON Lines) file
 
     Returns:
         List of Caregiver objects
     """
-    with open(file_path) as f:
-        data = json.load(f)
-
-    caregivers = []
-    for caregiver_data in data:
-        availability_list = []
-        for avail_data in caregiver_data["availability"]:
-            # Parse time strings to datetime objects (using a dummy date)
-            start_time = datetime.strptime(avail_data["start"], "%H:%M").time()
-            end_time = datetime.strptime(avail_data["end"], "%H:%M").time()
-
-            availability = Availability(
-                day=avail_data["day"],
-                start=start_time,
-                end=end_time,
-            )
-            availability_list.append(availability)
-
-        caregiver = Caregiver(
-            id=caregiver_data["id"],
-            name=caregiver_data["name"],
-            max_hours=caregiver_data["max_hours"],
-            availability=availability_list,
-            skills=caregiver_data["skills"],
+    return [
+        _caregiver_from_dict(caregiver_data)
+        for caregiver_data in _iter_json_records(file_path)
+    ]
+
+
+def load_assignments(file_path: str) -> list[Assignment]:
+    """Load a schedule from a JSON (or JSON Lines) file.
+
+    Args:
+        file_path: Path to a file of {"visit_id", "caregiver_id"} objects
+
+    Returns:
+        List of Assignment objects
+    """
+    return [
+        Assignment(visit_id=record["visit_id"], caregiver_id=record["caregiver_id"])
+        for record in _iter_json_records(file_path)
+    ]
+
+
+def save_assignments(assignments: list[Assignment], file_path: str) -> None:
+    """Write a schedule as a JSON array readable by load_assignments.
+
+    Args:
+        assignments: List of Assignment objects
+        file_path: Path of the file to write
+    """
+    with open(file_path, "w") as f:
+        json.dump(
+            [
+                {"visit_id": a.visit_id, "caregiver_id": a.caregiver_id}
+                for a in assignments
+            ],
+            f,
+            indent=2,
+        )
+
+
+def save_visits(visits: list[Visit], file_path: str) -> None:
+    """Write visits as a JSON array readable by load_visits.
+
+    Args:
+        visits: List of Visit objects
+        file_path: Path of the file to write
+    """
+    with open(file_path, "w") as f:
+        json.dump(
+            [
+                {
+                    "id": visit.id,
+                    "start": visit.start.strftime(_TIMESTAMP_FORMAT),
+                    "end": visit.end.strftime(_TIMESTAMP_FORMAT),
+                    "customer": visit.customer,
+                    "required_skill": visit.required_skill,
+                    "neighborhood": visit.neighborhood,
+                }
+                for visit in visits
+            ],
+            f,
+            indent=2,
+        )
+
+
+def save_caregivers(caregivers: list[Caregiver], file_path: str) -> None:
+    """Write caregivers as a JSON array readable by load_caregivers.
+
+    Args:
+        caregivers: List of Caregiver objects
+        file_path: Path of the file to write
+    """
+    with open(file_path, "w") as f:
+        json.dump(
+            [
+                {
+                    "id": caregiver.id,
+                    "name": caregiver.name,
+                    "max_hours": caregiver.max_hours,
+                    "availability": [
+                        {
+                            "day": slot.day,
+                            "start": slot.start.strftime(_CLOCK_FORMAT),
+                            "end": slot.end.strftime(_CLOCK_FORMAT),
+                        }
+                        for slot in caregiver.availability
+                    ],
+                    "skills": caregiver.skills,
+                }
+                for caregiver in caregivers
+            ],
+            f,
+            indent=2,
         )
-        caregivers.append(caregiver)
 
-    return caregivers
+
+def save_columnar(
+    visits: list[Visit], caregivers: list[Caregiver], directory: str
+) -> None:
+    """Write an instance in the binary columnar format, readable by load_columnar.
+
+    The directory holds one .npy file per column and a meta.json of the
+    string dictionaries (see columnar.py).
+
+    Args:
+        visits: List of Visit objects
+        caregivers: List of Caregiver objects
+        directory: Directory to write the instance to, created if needed
+    """
+    # numpy is only needed by the columnar format
+    from .columnar import ColumnarInstance
+
+    ColumnarInstance.from_models(visits, caregivers).save(directory)
+
+
+def load_columnar(directory: str, mmap: bool = True) -> "ColumnarInstance":
+    """Load an instance written by save_columnar.
+
+    The columns are memory-mapped and nothing is decoded: use the instance
+    directly to score schedules, or its to_models for the solver.
+
+    Args:
+        directory: Directory of the instance
+        mmap: Memory-map the columns instead of reading them into memory
+
+    Returns:
+        The encoded instance
+    """
+    from .columnar import ColumnarInstance
+
+    return ColumnarInstance.load(directory, mmap=mmap)
@@ -0,0 +1,216 @@
+"""Fast combinatorial checks of an instance, run before building a CP-SAT model.
+
+An instance that cannot be fully staffed otherwise costs a whole CP-SAT time
+limit before the solver gives up, with no hint of why. `diagnose` finds the
+usual causes in milliseconds:
+
+- visits no caregiver is eligible for;
+- groups of overlapping visits that need more distinct caregivers than are
+  eligible for them, found by a bipartite matching per group;
+- weeks where the visits requiring a skill add up to more hours than the
+  caregivers holding it may work.
+
+It also bounds the continuity objective from below, which tells how far a
+schedule is from the best one possible.
+
+Run `python -m scheduler.presolve` to print the diagnosis of the inputs.
+"""
+
+import argparse
+import json
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from .models import Caregiver, Visit, iso_week
+from .optimiser import customer_lower_bounds
+from .parser import load_caregivers, load_visits
+from .solver import build_eligibility, overlap_cliques
+
+
+@dataclass
+class Diagnosis:
+    """Reasons an instance cannot be fully staffed, and objective bounds."""
+
+    # ids of the visits nobody is eligible for
+    unstaffable_visits: list[str] = field(default_factory=list)
+    # groups of overlapping visits, and how many of their staffable visits
+    # cannot get a caregiver of their own
+    overloaded_slots: list[dict[str, Any]] = field(default_factory=list)
+    # ISO weeks and skills whose visits need more hours than the caregivers
+    # with the skill may work
+    hours_shortfalls: list[dict[str, Any]] = field(default_factory=list)
+    # lower bound on the unique caregivers of each customer
+    continuity_lower_bounds: dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def feasible(self) -> bool:
+        """Whether every visit may still be staffed; False is a proof it cannot."""
+        return not (
+            self.unstaffable_visits or self.overloaded_slots or self.hours_shortfalls
+        )
+
+    @property
+    def continuity_bound(self) -> dict[str, int]:
+        """Lower bounds of the 'max' and 'sum' continuity objectives."""
+        bounds = self.continuity_lower_bounds.values()
+        return {"max": max(bounds, default=0), "sum": sum(bounds)}
+
+    def to_dict(self) -> dict[str, Any]:
+        """The diagnosis as JSON-serialisable data."""
+        return {
+            **asdict(self),
+            "feasible": self.feasible,
+            "continuity_bound": self.continuity_bound,
+        }
+
+
+def _matching_size(visit_indices: list[int], eligibility: list[list[int]]) -> int:
+    """Size of a maximum matching of visits to distinct eligible caregivers."""
+    # Kuhn's augmenting paths
+    visit_of: dict[int, int] = {}
+
+    def augment(vi: int, seen: set[int]) -> bool:
+        for ci in eligibility[vi]:
+            if ci in seen:
+                continue
+            seen.add(ci)
+            if ci not in visit_of or augment(visit_of[ci], seen):
+                visit_of[ci] = vi
+                return True
+        return False
+
+    # a greedy pass matches most visits, augmenting paths only fix the rest
+    unmatched = []
+    for vi in visit_indices:
+        ci = next((ci for ci in eligibility[vi] if ci not in visit_of), None)
+        if ci is None:
+            unmatched.append(vi)
+        else:
+            visit_of[ci] = vi
+    return (
+        len(visit_indices)
+        - len(unmatched)
+        + sum(augment(vi, set()) for vi in unmatched)
+    )
+
+
+def _overloaded_slots(
+    visits: list[Visit], eligibility: list[list[int]], cliques: list[list[int]]
+) -> list[dict[str, Any]]:
+    overloaded = []
+    for clique in cliques:
+        staffable = [vi for vi in clique if eligibility[vi]]
+        unmatched = len(staffable) - _matching_size(staffable, eligibility)
+        if unmatched:
+            overloaded.append(
+                {
+                    "start": min(visits[vi].start for vi in clique).isoformat(),
+                    "visits": [visits[vi].id for vi in clique],
+                    "unmatched": unmatched,
+                }
+            )
+    return overloaded
+
+
+def _hours_shortfalls(
+    visits: list[Visit], caregivers: list[Caregiver]
+) -> list[dict[str, Any]]:
+    # whole seconds, as the solver counts them, so an exact fit is not
+    # reported over capacity by float rounding
+    capacity: dict[str, int] = defaultdict(int)
+    for caregiver in caregivers:
+        for skill in set(caregiver.skills):
+            capacity[skill] += caregiver.max_hours * 3600
+    required: dict[tuple[str, str], int] = defaultdict(int)
+    for visit in visits:
+        year, week = iso_week(visit)
+        required[(f"{year}-W{week:02d}", visit.required_skill)] += int(
+            (visit.end - visit.start).total_seconds()
+        )
+    return [
+        {
+            "week": week,
+            "skill": skill,
+            "required_hours": seconds / 3600,
+            "capacity_hours": capacity[skill] / 3600,
+        }
+        for (week, skill), seconds in sorted(required.items())
+        if seconds > capacity[skill]
+    ]
+
+
+def diagnose(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    eligibility: list[list[int]] | None = None,
+    cliques: list[list[int]] | None = None,
+) -> Diagnosis:
+    """
+    Check an instance for reasons it cannot be fully staffed.
+
+    The checks are necessary conditions only: a feasible diagnosis does not
+    prove a full schedule exists, an infeasible one proves it does not.
+
+    Args:
+        visits: List of visits to be assigned
+        caregivers: List of available caregivers
+        eligibility: Eligible caregiver indices of each visit, computed if
+            not given
+        cliques: Groups of mutually overlapping visits, computed if not given
+
+    Returns:
+        The diagnosis
+    """
+    start = time.perf_counter()
+    if eligibility is None:
+        eligibility = build_eligibility(visits, caregivers)
+    if cliques is None:
+        cliques = overlap_cliques(visits)
+
+    # overlapping visits of a customer need different caregivers, and any
+    # staffed customer needs one
+    lower_bounds = {
+        visit.customer: 1
+        for visit, eligible in zip(visits, eligibility, strict=True)
+        if eligible
+    }
+    staffable_cliques = [[vi for vi in clique if eligibility[vi]] for clique in cliques]
+    for customer, bound in customer_lower_bounds(visits, staffable_cliques).items():
+        lower_bounds[customer] = max(lower_bounds.get(customer, 0), bound)
+
+    diagnosis = Diagnosis(
+        unstaffable_visits=[
+            visit.id
+            for visit, eligible in zip(visits, eligibility, strict=True)
+            if not eligible
+        ],
+        overloaded_slots=_overloaded_slots(visits, eligibility, cliques),
+        hours_shortfalls=_hours_shortfalls(visits, caregivers),
+        continuity_lower_bounds=lower_bounds,
+    )
+    diagnosis.elapsed = time.perf_counter() - start
+    return diagnosis
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="scheduler.presolve", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--visits", default="inputs/visits.json")
+    parser.add_argument("--caregivers", default="inputs/caregivers.json")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Print the diagnosis of an instance as JSON."""
+    args = _parse_args(argv)
+    visits = load_visits(args.visits)
+    caregivers = load_caregivers(args.caregivers)
+    print(json.dumps(diagnose(visits, caregivers).to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Incremental scoring of schedule edits.
+
+`IncrementalScorer` keeps the aggregates behind the evaluator's metrics and
+constraint checks up to date while single visits are reassigned or swapped,
+so local search and interactive edits can score a move without re-running
+`evaluate` on the whole schedule.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta
+
+from .models import Assignment, AvailabilityIndex, Caregiver, Visit, iso_week
+
+
+@dataclass(frozen=True)
+class ScheduleScore:
+    """Metrics and violation counts of a schedule, as reported by evaluate."""
+
+    continuity_score: float
+    travel_efficiency_score: float
+    unassigned_visits: int
+    availability_violations: int
+    overlap_violations: int
+    max_hours_violations: int
+
+    def __sub__(self, other: "ScheduleScore") -> "ScheduleScore":
+        return ScheduleScore(
+            *(getattr(self, f.name) - getattr(other, f.name) for f in fields(self))
+        )
+
+    @property
+    def is_valid(self) -> bool:
+        """Whether every hard constraint is satisfied."""
+        return not (
+            self.unassigned_visits
+            or self.availability_violations
+            or self.overlap_violations
+            or self.max_hours_violations
+        )
+
+
+# (start, assignment sequence, visit id): ties on start keep the order in
+# which the visits were assigned, as evaluate does with its assignment list
+_TimelineEntry = tuple[datetime, int, str]
+
+
+class IncrementalScorer:
+    """
+    Stateful scorer supporting reassign/swap moves with undo.
+
+    Each visit has at most one caregiver. Applying or undoing a move finds
+    the visit's place among the k visits of its caregiver by bisection, in
+    O(log k), then inserts or deletes it in a list, which shifts up to k
+    entries. Only the few neighbouring visits are compared, and the score is
+    read in O(1).
+    """
+
+    def __init__(
+        self,
+        assignments: list[Assignment],
+        visits: list[Visit],
+        caregivers: list[Caregiver],
+    ) -> None:
+        self._visits = {visit.id: visit for visit in visits}
+        self._caregivers = {caregiver.id: caregiver for caregiver in caregivers}
+        self._availability = {
+            caregiver.id: AvailabilityIndex.from_availability(caregiver.availability)
+            for caregiver in caregivers
+        }
+        # bounds how far back an overlapping visit can start
+        self._max_duration = max(
+            (visit.end - visit.start for visit in visits), default=timedelta(0)
+        )
+
+        self._assigned: dict[str, str | None] = dict.fromkeys(self._visits)
+        # assigned visit -> sequence number of its assignment
+        self._sequence: dict[str, int] = {}
+        self._next_sequence = 0
+        # each move records (visit, caregiver, sequence) to restore on undo
+        self._history: list[list[tuple[str, str | None, int | None]]] = []
+
+        # continuity: customer -> caregiver -> number of visits
+        self._customer_caregivers: dict[str, Counter[str]] = defaultdict(Counter)
+        self._customer_visits: Counter[str] = Counter()
+        self._continuity_sum = 0.0
+        # travel: (caregiver, weekday) -> visits sorted by start
+        self._days: dict[tuple[str, int], list[_TimelineEntry]] = defaultdict(list)
+        self._switches = 0
+        # overlaps: caregiver -> visits sorted by start
+        self._timelines: dict[str, list[_TimelineEntry]] = defaultdict(list)
+        self._overlaps = 0
+        # hours: (caregiver, ISO week) -> seconds worked
+        self._seconds: Counter[tuple[str, tuple[int, int]]] = Counter()
+        self._over_hours = 0
+        self._unavailable = 0
+        self._unassigned = len(self._assigned)
+
+        for assignment in assignments:
+            if self._assigned[assignment.visit_id] is not None:
+                raise ValueError(f"Visit {assignment.visit_id} is assigned twice")
+            self._assign(assignment.visit_id, assignment.caregiver_id)
+
+    def score(self) -> ScheduleScore:
+        """Current score of the schedule."""
+        n_customers = len(self._customer_visits)
+        n_days = len(self._days)
+        travel = max(0.0, 1.0 - (self._switches / n_days) / 2.0) if n_days else 0.0
+        return ScheduleScore(
+            continuity_score=(
+                self._continuity_sum / n_customers if n_customers else 0.0
+            ),
+            travel_efficiency_score=travel,
+            unassigned_visits=self._unassigned,
+            availability_violations=self._unavailable,
+            overlap_violations=self._overlaps,
+            max_hours_violations=self._over_hours,
+        )
+
+    def assignments(self) -> list[Assignment]:
+        """
+        Current assignments, in the order they were made.
+
+        The given assignments come first and a moved visit goes last. This is
+        the order in which visits starting at the same time are counted for
+        travel, so evaluate scores the returned list as the scorer does.
+        """
+        assigned = [
+            Assignment(visit_id=visit_id, caregiver_id=caregiver_id)
+            for visit_id, caregiver_id in self._assigned.items()
+            if caregiver_id is not None
+        ]
+        return sorted(assigned, key=lambda item: self._sequence[item.visit_id])
+
+    def caregiver_of(self, visit_id: str) -> str | None:
+        """Caregiver currently assigned to the visit, if any."""
+        return self._assigned[visit_id]
+
+    def reassign(self, visit_id: str, caregiver_id: str | None) -> ScheduleScore:
+        """
+        Move a visit to another caregiver, or unassign it with None.
+
+        Returns:
+            The change in score caused by the move
+
+        Raises:
+            KeyError: if the visit or caregiver is unknown; the schedule is
+                left unchanged
+        """
+        self._check(visit_id, caregiver_id)
+        before = self.score()
+        self._history.append([self._undo_entry(visit_id)])
+        self._move(visit_id, caregiver_id)
+        return self.score() - before
+
+    def swap(self, visit_a: str, visit_b: str) -> ScheduleScore:
+        """
+        Exchange the caregivers of two visits.
+
+        Returns:
+            The change in score caused by the swap
+
+        Raises:
+            KeyError: if either visit is unknown; the schedule is left
+                unchanged
+        """
+        self._check(visit_a, None)
+        self._check(visit_b, None)
+        before = self.score()
+        caregiver_a, caregiver_b = self._assigned[visit_a], self._assigned[visit_b]
+        self._history.append([self._undo_entry(visit_a), self._undo_entry(visit_b)])
+        self._move(visit_a, caregiver_b)
+        self._move(visit_b, caregiver_a)
+        return self.score() - before
+
+    def undo(self) -> None:
+        """Revert the last reassign or swap."""
+        for visit_id, caregiver_id, sequence in reversed(self._history.pop()):
+            self._move(visit_id, caregiver_id, sequence)
+
+    def checkpoint(self) -> None:
+        """Forget the undo history, keeping the current schedule."""
+        self._history.clear()
+
+    def reassign_delta(self, visit_id: str, caregiver_id: str | None) -> ScheduleScore:
+        """Change in score a reassign would cause, leaving the schedule as is."""
+        delta = self.reassign(visit_id, caregiver_id)
+        self.undo()
+        return delta
+
+    def swap_delta(self, visit_a: str, visit_b: str) -> ScheduleScore:
+        """Change in score a swap would cause, leaving the schedule as is."""
+        delta = self.swap(visit_a, visit_b)
+        self.undo()
+        return delta
+
+    def _check(self, visit_id: str, caregiver_id: str | None) -> None:
+        """Reject unknown ids before a move changes any state."""
+        if visit_id not in self._visits:
+            raise KeyError(f"Unknown visit: {visit_id}")
+        if caregiver_id is not None and caregiver_id not in self._caregivers:
+            raise KeyError(f"Unknown caregiver: {caregiver_id}")
+
+    def _undo_entry(self, visit_id: str) -> tuple[str, str | None, int | None]:
+        return (visit_id, self._assigned[visit_id], self._sequence.get(visit_id))
+
+    def _move(
+        self, visit_id: str, caregiver_id: str | None, sequence: int | None = None
+    ) -> None:
+        if self._assigned[visit_id] == caregiver_id:
+            return
+        self._unassign(visit_id)
+        if caregiver_id is not None:
+            self._assign(visit_id, caregiver_id, sequence)
+
+    def _customer_score(self, customer: str) -> float:
+        total_visits = self._customer_visits[customer]
+        if total_visits <= 1:
+            return float(total_visits)
+        return 1.0 - len(self._customer_caregivers[customer]) / total_visits
+
+    def _assign(
+        self, visit_id: str, caregiver_id: str, sequence: int | None = None
+    ) -> None:
+        """Assign a visit, as the latest assignment unless given its sequence."""
+        visit = self._visits[visit_id]
+        caregiver = self._caregivers[caregiver_id]
+        if sequence is None:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+        entry = (visit.start, sequence, visit_id)
+        self._sequence[visit_id] = sequence
+        self._assigned[visit_id] = caregiver_id
+        self._unassigned -= 1
+
+        self._continuity_sum -= self._customer_score(visit.customer)
+        self._customer_visits[visit.customer] += 1
+        self._customer_caregivers[visit.customer][caregiver_id] += 1
+        self._continuity_sum += self._customer_score(visit.customer)
+
+        day = self._days[(caregiver_id, visit.weekday)]
+        position = bisect_left(day, entry)
+        self._switches += self._switch_change(day, position, visit.neighborhood)
+        day.insert(position, entry)
+
+        timeline = self._timelines[caregiver_id]
+        self._overlaps += self._count_overlaps(timeline, visit)
+        insort(timeline, entry)
+
+        self._add_seconds(caregiver, visit, 1)
+
+        if not self._availability[caregiver_id].covers(visit):
+            self._unavailable += 1
+
+    def _unassign(self, visit_id: str) -> None:
+        caregiver_id = self._assigned[visit_id]
+        if caregiver_id is None:
+            return
+        visit = self._visits[visit_id]
+        caregiver = self._caregivers[caregiver_id]
+        entry = (visit.start, self._sequence.pop(visit_id), visit_id)
+        self._assigned[visit_id] = None
+        self._unassigned += 1
+
+        self._continuity_sum -= self._customer_score(visit.customer)
+        self._customer_visits[visit.customer] -= 1
+        caregivers = self._customer_caregivers[visit.customer]
+        caregivers[caregiver_id] -= 1
+        if not caregivers[caregiver_id]:
+            del caregivers[caregiver_id]
+        if not self._customer_visits[visit.customer]:
+            del self._customer_visits[visit.customer]
+        self._continuity_sum += self._customer_score(visit.customer)
+
+        key = (caregiver_id, visit.weekday)
+        day = self._days[key]
+        position = bisect_left(day, entry)
+        del day[position]
+        self._switches -= self._switch_change(day, position, visit.neighborhood)
+        if not day:
+            del self._days[key]
+
+        timeline = self._timelines[caregiver_id]
+        del timeline[bisect_left(timeline, entry)]
+        self._overlaps -= self._count_overlaps(timeline, visit)
+
+        self._add_seconds(caregiver, visit, -1)
+
+        if not self._availability[caregiver_id].covers(visit):
+            self._unavailable -= 1
+
+    def _add_seconds(self, caregiver: Caregiver, visit: Visit, sign: int) -> None:
+        """Add (sign 1) or remove (sign -1) a visit's time from its week."""
+        key = (caregiver.id, iso_week(visit))
+        was_over = self._seconds[key] > caregiver.max_hours * 3600
+        self._seconds[key] += sign * int((visit.end - visit.start).total_seconds())
+        is_over = self._seconds[key] > caregiver.max_hours * 3600
+        self._over_hours += is_over - was_over
+        if not self._seconds[key]:
+            del self._seconds[key]
+
+    def _switch_change(
+        self, day: list[_TimelineEntry], position: int, neighborhood: str
+    ) -> int:
+        """Switches added by inserting a visit in neighborhood at position."""
+        previous = self._visits[day[position - 1][2]] if position > 0 else None
+        following = self._visits[day[position][2]] if position < len(day) else None
+        change = 0
+        if previous is not None:
+            change += previous.neighborhood != neighborhood
+        if following is not None:
+            change += following.neighborhood != neighborhood
+        if previous is not None and following is not None:
+            change -= previous.neighborhood != following.neighborhood
+        return change
+
+    def _count_overlaps(self, timeline: list[_TimelineEntry], visit: Visit) -> int:
+        """Number of visits in timeline overlapping visit."""
+        # only visits starting in [start - longest visit, end] can overlap
+        low = bisect_left(timeline, (visit.start - self._max_duration,))
+        high = bisect_right(timeline, (visit.end, self._next_sequence))
+        return sum(
+            visit.overlaps(self._visits[visit_id])
+            for _, _, visit_id in timeline[low:high]
+            if visit_id != visit.id
+        )
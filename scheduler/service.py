@@ -0,0 +1,466 @@
+"""Local scheduling service: a job queue in front of parse, solve and evaluate.
+
+Run with `python -m scheduler.service --port 8080` (or `--unix PATH` for a
+Unix socket). The service stays resident, so the interpreter and OR-Tools
+start-up a CLI run pays every time is paid once, and solves run in a pool of
+warm worker processes so that CP-SAT never blocks request handling.
+
+Endpoints, all exchanging JSON:
+
+- `POST /jobs` submits `{"visits": [...], "caregivers": [...]}` in the input
+  file format, optionally with `time_limit`, `continuity` and `workers`
+  (clamped to the cores of one pool worker), and answers `202 {"id": ...}`,
+  or `503` when the queue is full;
+- `GET /jobs/ID` gives the status of a job and its latest progress;
+- `GET /jobs/ID/events` streams progress as JSON Lines until the job ends;
+- `GET /jobs/ID/result` gives the assignments and evaluation of an ended job;
+- `DELETE /jobs/ID` cancels a queued or running job.
+
+Progress is the stream of improving solutions of `iter_solutions`, so a job
+optimises continuity only; cancelling a running job keeps the best schedule
+found so far as its result.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from .evaluator import evaluate
+from .models import Assignment, Caregiver, Visit
+from .optimiser import CONTINUITY_OBJECTIVES
+from .parser import _caregiver_from_dict, _visit_from_dict
+from .solver import iter_solutions
+
+JOB_TIME_LIMIT_SECONDS = 60.0
+MAX_PENDING_JOBS = 16
+
+_ENDED = ("done", "failed", "cancelled")
+_REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    503: "Service Unavailable",
+}
+_JOB_PATH = re.compile(r"^/jobs/(?P<id>[0-9a-f]+)(?P<action>/events|/result)?$")
+
+
+class _RequestError(Exception):
+    """Turned into an error response by the request handler."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Job:
+    """A submitted instance and the state of its solve."""
+
+    id: str
+    visits: list[Visit]
+    caregivers: list[Caregiver]
+    time_limit: float
+    continuity: str
+    workers: int
+    # queued, running, done, failed or cancelled
+    status: str = "queued"
+    # objective, best bound and elapsed time of each improving solution
+    progress: list[dict[str, float]] = field(default_factory=list)
+    result: dict[str, Any] | None = None
+    # multiprocessing Event set to stop the search in the worker process
+    cancel: Any = None
+    # set, then replaced, whenever the progress or status changes
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+    # set once the last progress update of the worker has been recorded
+    progress_ended: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def notify(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "visits": len(self.visits),
+            "caregivers": len(self.caregivers),
+            "progress": self.progress[-1] if self.progress else None,
+        }
+
+
+def _warm_up() -> None:
+    """Start a worker process; importing this module loaded OR-Tools."""
+
+
+def _run_job(
+    job_id: str,
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    time_limit: float,
+    continuity: str,
+    workers: int,
+    cancel: Any,
+    progress: Any,
+) -> dict[str, Any]:
+    """
+    Solve and evaluate a job; runs in a worker process.
+
+    Each improving solution is reported on the progress queue as
+    (job_id, update), followed by (job_id, None) once the search ends, and the
+    search stops as soon as cancel is set.
+
+    Returns:
+        The result: status, assignments and evaluation of the best schedule
+    """
+    assignments: list[Assignment] | None = None
+    try:
+        for update in iter_solutions(
+            visits,
+            caregivers,
+            time_limit,
+            max_workers=workers,
+            continuity=continuity,
+            should_stop=cancel.is_set,
+        ):
+            assignments = update.assignments
+            progress.put(
+                (
+                    job_id,
+                    {
+                        "objective": update.objective,
+                        "best_bound": update.best_bound,
+                        "elapsed": update.elapsed,
+                    },
+                )
+            )
+    finally:
+        progress.put((job_id, None))
+
+    status = "cancelled" if cancel.is_set() else "done"
+    if assignments is None:
+        if status == "done":
+            return {"status": "failed", "error": "no schedule found"}
+        return {"status": status}
+    return {
+        "status": status,
+        "assignments": [
+            {"visit_id": a.visit_id, "caregiver_id": a.caregiver_id}
+            for a in assignments
+        ],
+        "evaluation": evaluate(assignments, visits, caregivers),
+    }
+
+
+def _parse_job(body: bytes, max_workers: int) -> Job:
+    """
+    Build a job from a submitted instance, rejecting malformed ones.
+
+    The requested CP-SAT workers are clamped to between 1 and max_workers.
+    """
+    try:
+        data = json.loads(body)
+        visits = [_visit_from_dict(v) for v in data["visits"]]
+        caregivers = [_caregiver_from_dict(c) for c in data["caregivers"]]
+        time_limit = float(data.get("time_limit", JOB_TIME_LIMIT_SECONDS))
+        workers = int(data.get("workers", 1))
+    except (ValueError, KeyError, TypeError) as error:
+        raise _RequestError(400, f"invalid instance: {error!r}") from error
+    continuity = data.get("continuity", "max")
+    if continuity not in CONTINUITY_OBJECTIVES:
+        raise _RequestError(400, f"unknown continuity objective {continuity!r}")
+    return Job(
+        id=uuid.uuid4().hex,
+        visits=visits,
+        caregivers=caregivers,
+        time_limit=time_limit,
+        continuity=continuity,
+        workers=max(1, min(workers, max_workers)),
+    )
+
+
+async def _read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+    """Read the method, path and body of an HTTP/1.1 request."""
+    request_line = await reader.readline()
+    try:
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError as error:
+        raise _RequestError(400, "malformed request line") from error
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError as error:
+        raise _RequestError(400, "invalid Content-Length") from error
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?", 1)[0], body
+
+
+def _head(status: int, content_type: str = "application/json") -> bytes:
+    return (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        "Connection: close\r\n"
+    ).encode("latin-1")
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: Any) -> None:
+    body = json.dumps(payload).encode()
+    writer.write(_head(status) + f"Content-Length: {len(body)}\r\n\r\n".encode())
+    writer.write(body)
+    await writer.drain()
+
+
+class SchedulingService:
+    """
+    Job store, bounded queue and worker pool behind the HTTP endpoints.
+
+    Use `async with SchedulingService(...) as service` and then `serve` or
+    `serve_unix`; leaving the block cancels running jobs and stops the pool.
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = MAX_PENDING_JOBS) -> None:
+        """
+        Args:
+            workers: Worker processes, i.e. jobs solved at the same time
+            max_pending: Queued jobs beyond which submissions are refused
+        """
+        self.workers = workers
+        # CP-SAT workers a job may use without oversubscribing the machine
+        self.job_cores = max(1, (os.cpu_count() or 1) // workers)
+        self.jobs: dict[str, Job] = {}
+        self.max_pending = max_pending
+        # cancelled jobs stay in the queue until dispatched, so the queued
+        # ones are counted apart to bound the queue
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._queued = 0
+        self._tasks: list[asyncio.Task[None]] = []
+        self._manager: Any = None
+        self._progress: Any = None
+        self._pool: ProcessPoolExecutor | None = None
+
+    async def __aenter__(self) -> "SchedulingService":
+        loop = asyncio.get_running_loop()
+        # the manager shares cancel events and the progress queue with the
+        # worker processes
+        self._manager = multiprocessing.Manager()
+        self._progress = self._manager.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        # start every worker now rather than on the first jobs
+        await asyncio.gather(
+            *(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers))
+        )
+        self._tasks = [
+            asyncio.create_task(self._dispatch()) for _ in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._pump_progress()))
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        for job in self.jobs.values():
+            if job.status in ("queued", "running"):
+                job.cancel.set()
+        for task in self._tasks[:-1]:
+            task.cancel()
+        await asyncio.gather(*self._tasks[:-1], return_exceptions=True)
+        assert self._pool is not None
+        await asyncio.get_running_loop().run_in_executor(None, self._pool.shutdown)
+        # None ends the progress pump
+        self._progress.put(None)
+        await self._tasks[-1]
+        self._manager.shutdown()
+
+    def submit(self, job: Job) -> None:
+        """Queue a job, raising asyncio.QueueFull when max_pending are queued."""
+        if self._queued >= self.max_pending:
+            raise asyncio.QueueFull
+        job.cancel = self._manager.Event()
+        self._queue.put_nowait(job)
+        self._queued += 1
+        self.jobs[job.id] = job
+
+    def cancel(self, job: Job) -> None:
+        """Cancel a job: a queued one ends now, a running one at its next poll."""
+        if job.status == "queued":
+            self._queued -= 1
+            job.status = "cancelled"
+            job.result = {"status": "cancelled"}
+            job.notify()
+        job.cancel.set()
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            if job.status != "queued":
+                continue
+            self._queued -= 1
+            job.status = "running"
+            job.notify()
+            try:
+                job.result = await loop.run_in_executor(
+                    self._pool,
+                    _run_job,
+                    job.id,
+                    job.visits,
+                    job.caregivers,
+                    job.time_limit,
+                    job.continuity,
+                    job.workers,
+                    job.cancel,
+                    self._progress,
+                )
+                # the result comes back before the progress queue is pumped,
+                # so the job only ends once its last update is recorded
+                await job.progress_ended.wait()
+            except Exception as error:
+                job.result = {"status": "failed", "error": repr(error)}
+            job.status = job.result["status"]
+            job.notify()
+
+    async def _pump_progress(self) -> None:
+        loop = asyncio.get_running_loop()
+        while message := await loop.run_in_executor(None, self._progress.get):
+            job_id, update = message
+            job = self.jobs[job_id]
+            if update is None:
+                job.progress_ended.set()
+                continue
+            job.progress.append(update)
+            job.notify()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+        """Listen for HTTP requests on a TCP port (0 picks a free one)."""
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def serve_unix(self, path: str) -> asyncio.Server:
+        """Listen for HTTP requests on a Unix socket."""
+        return await asyncio.start_unix_server(self._handle, path)
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            method, path, body = await _read_request(reader)
+            await self._route(method, path, body, writer)
+        except _RequestError as error:
+            await _respond(writer, error.status, {"error": str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(
+        self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter
+    ) -> None:
+        if path == "/jobs":
+            await self._route_jobs(method, body, writer)
+            return
+        match = _JOB_PATH.match(path)
+        job = self.jobs.get(match["id"]) if match else None
+        if match is None or job is None:
+            raise _RequestError(404, f"no job at {path}")
+        await self._route_job(method, match["action"] or "", job, writer)
+
+    async def _route_jobs(
+        self, method: str, body: bytes, writer: asyncio.StreamWriter
+    ) -> None:
+        if method == "GET":
+            await _respond(writer, 200, [job.summary() for job in self.jobs.values()])
+        elif method == "POST":
+            job = _parse_job(body, self.job_cores)
+            try:
+                self.submit(job)
+            except asyncio.QueueFull as error:
+                raise _RequestError(503, "job queue is full") from error
+            await _respond(writer, 202, {"id": job.id})
+        else:
+            raise _RequestError(405, f"{method} not allowed on /jobs")
+
+    async def _route_job(
+        self, method: str, action: str, job: Job, writer: asyncio.StreamWriter
+    ) -> None:
+        if (method, action) == ("GET", ""):
+            await _respond(writer, 200, job.summary())
+        elif (method, action) == ("DELETE", ""):
+            self.cancel(job)
+            await _respond(writer, 202, job.summary())
+        elif (method, action) == ("GET", "/result"):
+            if job.result is None:
+                raise _RequestError(409, f"job {job.id} is {job.status}")
+            await _respond(writer, 200, job.result)
+        elif (method, action) == ("GET", "/events"):
+            await self._stream(job, writer)
+        else:
+            raise _RequestError(405, f"{method} not allowed on /jobs/{job.id}{action}")
+
+    async def _stream(self, job: Job, writer: asyncio.StreamWriter) -> None:
+        """Write each progress update as a JSON line, then the final status."""
+        writer.write(_head(200, "application/x-ndjson") + b"\r\n")
+        sent = 0
+        while True:
+            changed = job.changed
+            for update in job.progress[sent:]:
+                writer.write(json.dumps(update).encode() + b"\n")
+            sent = len(job.progress)
+            await writer.drain()
+            if job.status in _ENDED:
+                break
+            await changed.wait()
+        writer.write(json.dumps({"status": job.status}).encode() + b"\n")
+        await writer.drain()
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    async with SchedulingService(args.workers, args.max_pending) as service:
+        if args.unix:
+            server = await service.serve_unix(args.unix)
+        else:
+            server = await service.serve(args.host, args.port)
+        addresses = ", ".join(str(s.getsockname()) for s in server.sockets)
+        print(f"Serving on {addresses}")
+        async with server:
+            await server.serve_forever()
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="scheduler.service", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="listen on this Unix socket instead")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="jobs solved at the same time"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=MAX_PENDING_JOBS,
+        help="queued jobs beyond which submissions are refused",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the scheduling service until interrupted."""
+    args = _parse_args(argv)
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
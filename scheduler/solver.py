@@ -1,96 +1,985 @@
 """Solver module for the Bloom Care scheduling problem."""
 
-from .models import Assignment, Caregiver, Visit
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+
 from ortools.sat.python import cp_model
-from datetime import datetime, timedelta 
-from .optimiser import minimize_max_unique_caregivers_per_customer
 
-def solve(visits: list[Visit], caregivers: list[Caregiver]) -> list[Assignment]:
+from .cache import (
+    instance_fingerprint,
+    load_cached_schedule,
+    store_cached_schedule,
+)
+from .instrumentation import SolveReport, timed
+from .models import Assignment, AvailabilityIndex, Caregiver, Visit, iso_week
+from .optimiser import (
+    CONTINUITY_OBJECTIVES,
+    minimize_neighborhood_switches,
+    minimize_unique_caregivers_per_customer,
+)
+
+# 5 mins for a start we can increase depending on the size of the data
+TIME_LIMIT_SECONDS = 300.0
+# how often iter_solutions checks should_stop while no solution arrives
+_STOP_POLL_SECONDS = 0.1
+
+
+def build_eligibility(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    indexes: list[AvailabilityIndex] | None = None,
+) -> list[list[int]]:
     """
-    Solve the scheduling problem.
+    Index which caregivers can staff which visit.
+
+    A caregiver is eligible for a visit when they have the required skill and
+    one of their availability slots covers the visit.
 
     Args:
         visits: List of visits to be assigned
         caregivers: List of available caregivers
+        indexes: Availability index of each caregiver, if already built
 
     Returns:
-        List of Assignment objects representing which caregiver
-          is assigned to which visit
+        For each visit index, the sorted list of eligible caregiver indices
     """
-   
+    # caregivers are bucketed by skill once, then each candidate is checked
+    # against a weekday index of its slots instead of every slot
+    caregivers_by_skill = defaultdict(list)
+    for ci, caregiver in enumerate(caregivers):
+        for skill in set(caregiver.skills):
+            caregivers_by_skill[skill].append(ci)
+    if indexes is None:
+        indexes = [
+            AvailabilityIndex.from_availability(caregiver.availability)
+            for caregiver in caregivers
+        ]
 
-    # we start by ininitializing the CP-SAT model
-    model = cp_model.CpModel() 
-    # variables : 
-    caregiver_visit = {}
-    objective_terms = [] 
+    eligibility = []
+    for visit in visits:
+        # the visit times are derived once, not per candidate
+        weekday, start, end = visit.weekday, visit.start_of_day, visit.end_of_day
+        eligibility.append(
+            [
+                ci
+                for ci in caregivers_by_skill.get(visit.required_skill, [])
+                if indexes[ci].contains(weekday, start, end)
+            ]
+        )
+    return eligibility
+
+
+def overlap_cliques(visits: list[Visit]) -> list[list[int]]:
+    """
+    Find the maximal groups of mutually overlapping visits.
+
+    Visits are intervals on a line, so sweeping their start and end events in
+    time order yields every maximal clique of the overlap graph: the set of
+    running visits is a maximal clique each time the sweep switches from
+    starting visits to ending them. There are at most len(visits) of them.
+
+    Args:
+        visits: List of visits
+
+    Returns:
+        Visit indices of each maximal clique with at least two visits
+    """
+    # at the same instant, ends sort before starts since back-to-back visits do
+    # not overlap. Zero-length visits overlap everything touching their instant
+    # (see Visit.overlaps), so they open first and close last.
+    events = []
+    for vi, visit in enumerate(visits):
+        if visit.start == visit.end:
+            events.append((visit.start, 0, vi))
+            events.append((visit.end, 3, vi))
+        else:
+            events.append((visit.start, 2, vi))
+            events.append((visit.end, 1, vi))
+    events.sort()
+
+    cliques = []
+    running: dict[int, None] = {}  # insertion-ordered set
+    grew = False
+    for _, kind, vi in events:
+        if kind in (0, 2):
+            running[vi] = None
+            grew = True
+            continue
+        if grew and len(running) > 1:
+            cliques.append(list(running))
+        grew = False
+        del running[vi]
+    return cliques
+
+
+def caregiver_classes(
+    caregivers: list[Caregiver], served: dict[str, set[str]] | None = None
+) -> list[list[int]]:
+    """
+    Group caregivers with identical profiles.
+
+    Caregivers with the same skills, availability slots and max hours can
+    swap schedules without changing feasibility or any objective, so every
+    solution has symmetric copies that permute a class.
+
+    Args:
+        caregivers: List of caregivers
+        served: Customer -> ids of caregivers already serving it, see solve;
+            caregivers only swap with those serving the same customers
+
+    Returns:
+        Caregiver indices of each class with at least two caregivers, in
+        index order
+    """
+    classes = defaultdict(list)
+    for ci, caregiver in enumerate(caregivers):
+        profile = (
+            frozenset(caregiver.skills),
+            tuple(
+                sorted(
+                    (slot.day, slot.start, slot.end) for slot in caregiver.availability
+                )
+            ),
+            caregiver.max_hours,
+            frozenset(
+                customer
+                for customer, ids in (served or {}).items()
+                if caregiver.id in ids
+            ),
+        )
+        classes[profile].append(ci)
+    return [members for members in classes.values() if len(members) > 1]
+
+
+@dataclass
+class _Objectives:
+    """Objective terms of the model, minimized in this order."""
+
+    # unique caregivers per customer
+    continuity: cp_model.LinearExprT
+    # lower bound of the neighborhood switches, None when not modelled
+    travel: cp_model.LinearExprT | None
+    # staffed visits, maximized before the others when visits may be left
+    # unstaffed
+    coverage: cp_model.LinearExprT | None = None
+
+
+def _add_constraints(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    eligibility: list[list[int]],
+    cliques: list[list[int]],
+    partial: bool = False,
+) -> None:
+    # optimal is exactly one caregiver per visit : AddExactlyOne. If we want at
+    # least a feasible solution even it doesnt satisfy all visits, partial uses
+    # AddAtMostOne. A visit with no eligible caregiver makes the model infeasible.
+    add_one = model.AddAtMostOne if partial else model.AddExactlyOne
+    for vi, eligible in enumerate(eligibility):
+        add_one([caregiver_visit[(ci, vi)] for ci in eligible])
+
+    # a caregiver can staff at most one visit of each group of mutually
+    # overlapping visits; one AtMostOne per clique covers every overlapping pair
+    for clique in cliques:
+        clique_vars = defaultdict(list)
+        for vi in clique:
+            for ci in eligibility[vi]:
+                clique_vars[ci].append(caregiver_visit[(ci, vi)])
+        for assigned_vars in clique_vars.values():
+            if len(assigned_vars) > 1:
+                model.AddAtMostOne(assigned_vars)
+
+    # a caregiver works at most max_hours per ISO week, counted in seconds;
+    # weeks whose eligible visits fit the budget anyway need no constraint
+    weekly_terms = defaultdict(list)
+    for (ci, vi), var in caregiver_visit.items():
+        visit = visits[vi]
+        seconds = int((visit.end - visit.start).total_seconds())
+        weekly_terms[(ci, iso_week(visit))].append((seconds, var))
+    for (ci, _), terms in weekly_terms.items():
+        budget = int(caregivers[ci].max_hours * 3600)
+        if sum(seconds for seconds, _ in terms) > budget:
+            model.Add(sum(seconds * var for seconds, var in terms) <= budget)
+
+
+def _break_symmetries(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    classes: list[list[int]],
+) -> None:
+    # within a class, only keep the solutions where caregivers are ordered by
+    # their first visit (unused ones last): the next caregiver of a class can
+    # only take a visit if the previous one took an earlier visit
+    caregiver_visits = defaultdict(list)
+    for ci, vi in sorted(caregiver_visit):
+        caregiver_visits[ci].append(vi)
+    for members in classes:
+        class_visits = caregiver_visits[members[0]]
+        # members are only interchangeable if eligible for the same visits
+        if not class_visits or any(
+            caregiver_visits[ci] != class_visits for ci in members
+        ):
+            continue
+        for previous, ci in zip(members, members[1:], strict=False):
+            model.Add(caregiver_visit[(ci, class_visits[0])] == 0)
+            # worked_before: previous took one of the class visits before vi
+            worked_before = caregiver_visit[(previous, class_visits[0])]
+            for k, vi in enumerate(class_visits[1:], start=1):
+                model.AddImplication(caregiver_visit[(ci, vi)], worked_before)
+                if k + 1 < len(class_visits):
+                    worked = model.NewBoolVar(f"caregiver_{previous}_before_{vi}")
+                    model.AddBoolOr(
+                        [worked_before, caregiver_visit[(previous, vi)]]
+                    ).OnlyEnforceIf(worked)
+                    worked_before = worked
+
+
+def _build_model(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    eligibility: list[list[int]],
+    report: SolveReport | None = None,
+    continuity: str = "max",
+    partial: bool = False,
+    served: dict[str, set[str]] | None = None,
+    travel: bool = True,
+) -> tuple[cp_model.CpModel, dict[tuple[int, int], cp_model.IntVar], "_Objectives"]:
+    """
+    Build the CP-SAT model over the eligible (caregiver, visit) pairs only.
+
+    The model minimizes continuity, combined across customers as continuity
+    says (see CONTINUITY_OBJECTIVES); the travel terms are returned for
+    _solve_lexicographic to minimize next, unless travel is False. When
+    partial, visits may be left unstaffed and the model maximizes the staffed
+    visits first instead. Caregivers in served already serve the customer
+    elsewhere, so keeping them costs no continuity.
+    """
+    model = cp_model.CpModel()
 
-        
+    # variables : caregiver_visit[(ci, vi)] iff caregiver ci is assigned to visit vi.
+    # pairs that fail the skill or availability check never get a variable.
+    caregiver_visit = {}
+    with timed(report, "variables"):
+        for vi, eligible in enumerate(eligibility):
+            for ci in eligible:
+                caregiver_visit[(ci, vi)] = model.NewBoolVar(
+                    f"caregiver_{ci}_visit_{vi}"
+                )
 
-    for ci in range(len(caregivers)): # basically a matrix of caregivers and visits. ci,vi iff caregiver ci is assigned to visit vi
-        for vi in range(len(visits)):
-            caregiver_visit[(ci, vi)] = model.NewBoolVar(f'caregiver_{ci}_visit_{vi}')
-    
-    
     ## constraints :
+    with timed(report, "constraints"):
+        cliques = overlap_cliques(visits)
+        _add_constraints(
+            model, caregiver_visit, visits, caregivers, eligibility, cliques, partial
+        )
+        _break_symmetries(model, caregiver_visit, caregiver_classes(caregivers, served))
 
-    for vi in range(len(visits)):# optimal is exactly one caregiver per visit : AddExactlyOne. If we want at least a fesible solution even it doesnt satisfy all visits. (replace by AddAtMostOne)
-        model.AddExactlyOne(
-            [caregiver_visit[(ci, vi)] for ci in range(len(caregivers))]
+    # minimize the number of unique caregivers assigned to customers
+    # (continuity) first
+    with timed(report, "objective"):
+        # the clique lower bounds assume every visit is staffed
+        unique_caregivers = minimize_unique_caregivers_per_customer(
+            model,
+            caregiver_visit,
+            caregivers,
+            visits,
+            continuity,
+            None if partial else cliques,
+            served,
         )
-    
-    
-    for ci, caregiver in enumerate(caregivers):
-        for vi, visit in enumerate(visits):
-            # Check if *any* availability slot for the caregiver fits this visit
-            if not any(av.check_availability(visit) for av in caregiver.availability):
-                model.Add(caregiver_visit[(ci, vi)] == 0)
-    
-    for vi, visit_i in enumerate(visits):
-        for vj in range(vi +1, len(visits)):
-            visit_j = visits[vj]
-            if visit_i.overlaps(visit_j) :
-                # if two visits overlap, they cannot be assigned to the same caregiver
-                for ci in range(len(caregivers)):
-                    model.Add(caregiver_visit[(ci, vi)] + caregiver_visit[(ci, vj)] <= 1)
-    
-
-
-    # skill-matching 
-    for ci, caregiver in enumerate(caregivers):
-        for vi, visit in enumerate(visits):
-            if visit.required_skill not in caregiver.skills:
-                model.Add(caregiver_visit[(ci, vi)] == 0)
+        model.Minimize(unique_caregivers)
+        # then the neighborhoods caregivers work in per day (travel), see
+        # _solve_lexicographic
+        switches = None
+        if travel:
+            switches = minimize_neighborhood_switches(
+                model, caregiver_visit, caregivers, visits
+            )
+        coverage = None
+        if partial:
+            # staff as many visits as possible before anything else
+            coverage = sum(caregiver_visit.values())
+            model.Maximize(coverage)
 
- ## IN CASE WE USE (AddAtMostOne - WE WANT A FEASIBLE SOLUTION EVEN IF NOT ALL VISITS ARE ASSIGNED)
-    # for vi in range(len(visits)):
-    #     assigned = model.NewBoolVar(f'assigned_visit_{vi}')
-    #     model.AddMaxEquality(assigned,
-    #         [caregiver_visit[(ci, vi)] for ci in range(len(caregivers))])
-    #     objective_terms.append(assigned)
+    if report is not None:
+        report.record_model(model)
+    return model, caregiver_visit, _Objectives(unique_caregivers, switches, coverage)
 
-    # if objective_terms:
-    #     model.Maximize(sum (objective_terms))
 
-    
-    # minimize the maximum number of unique caregivers assigned to any customer
-    max_unique_caregivers = minimize_max_unique_caregivers_per_customer(model,caregiver_visit,caregivers,visits)
-    model.Minimize(max_unique_caregivers)
+def connected_components(
+    visits: list[Visit], eligibility: list[list[int]]
+) -> list[tuple[list[int], list[int]]]:
+    """
+    Split the instance into groups of visits and caregivers that never interact.
 
-    # code to start the solver
+    Two visits interact when a caregiver is eligible for both (they compete for
+    the caregiver's time) or when they share a customer (continuity of care).
+    Each group can be solved on its own and the solutions merged.
+
+    Args:
+        visits: List of visits
+        eligibility: Eligible caregiver indices of each visit
+
+    Returns:
+        (visit indices, caregiver indices) of each component, both sorted.
+        Caregivers eligible for no visit belong to no component.
+    """
+    # union-find over visits; a caregiver or customer is represented by the
+    # first visit it was seen with
+    parent = list(range(len(visits)))
+
+    def find(vi: int) -> int:
+        while parent[vi] != vi:
+            parent[vi] = parent[parent[vi]]
+            vi = parent[vi]
+        return vi
+
+    def union(vi: int, vj: int) -> None:
+        root_i, root_j = find(vi), find(vj)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    caregiver_anchor: dict[int, int] = {}
+    customer_anchor: dict[str, int] = {}
+    for vi, visit in enumerate(visits):
+        union(vi, customer_anchor.setdefault(visit.customer, vi))
+        for ci in eligibility[vi]:
+            union(vi, caregiver_anchor.setdefault(ci, vi))
+
+    component_visits = defaultdict(list)
+    for vi in range(len(visits)):
+        component_visits[find(vi)].append(vi)
+    component_caregivers = defaultdict(list)
+    for ci, vi in sorted(caregiver_anchor.items()):
+        component_caregivers[find(vi)].append(ci)
+
+    return [
+        (visit_indices, component_caregivers[root])
+        for root, visit_indices in component_visits.items()
+    ]
+
+
+def repair_hint(
+    hint: list[Assignment],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    eligibility: list[list[int]],
+) -> dict[int, int]:
+    """
+    Turn a previous schedule into a feasible partial hint for this instance.
+
+    Assignments of visits or caregivers that no longer exist, or that are no
+    longer eligible, are dropped. When hinted visits of a caregiver now
+    overlap, the earliest-starting ones are kept.
+
+    Args:
+        hint: Assignments of a previous schedule
+        visits: List of visits to be assigned
+        caregivers: List of available caregivers
+        eligibility: Eligible caregiver indices of each visit
+
+    Returns:
+        Mapping of visit index to hinted caregiver index
+    """
+    visit_index = {visit.id: vi for vi, visit in enumerate(visits)}
+    caregiver_index = {caregiver.id: ci for ci, caregiver in enumerate(caregivers)}
+
+    hinted_visits = defaultdict(list)
+    for assignment in hint:
+        vi = visit_index.get(assignment.visit_id)
+        ci = caregiver_index.get(assignment.caregiver_id)
+        if vi is None or ci is None or ci not in eligibility[vi]:
+            continue
+        hinted_visits[ci].append(vi)
+
+    repaired = {}
+    for ci, hinted in hinted_visits.items():
+        kept: list[Visit] = []
+        for vi in sorted(set(hinted), key=lambda vi: visits[vi].start):
+            # a visit hinted to several caregivers keeps the first one
+            if vi in repaired:
+                continue
+            if kept and kept[-1].overlaps(visits[vi]):
+                continue
+            kept.append(visits[vi])
+            repaired[vi] = ci
+    return repaired
+
+
+def canonical_hint(hint: dict[int, int], classes: list[list[int]]) -> dict[int, int]:
+    """
+    Rename the caregivers of a hint within their class to the symmetry-free order.
+
+    _build_model orders the caregivers of a class by their first visit, those
+    without a visit last, and a hint breaking that order would be rejected.
+
+    Args:
+        hint: Mapping of visit index to hinted caregiver index
+        classes: Caregiver classes, see caregiver_classes
+
+    Returns:
+        The equivalent hint that the symmetry-breaking constraints accept
+    """
+    first_visit: dict[int, int] = {}
+    for vi, ci in sorted(hint.items()):
+        first_visit.setdefault(ci, vi)
+    renamed: dict[int, int] = {}
+    for members in classes:
+        by_first_visit = sorted(
+            members,
+            key=lambda ci: (ci not in first_visit, first_visit.get(ci, 0), ci),
+        )
+        renamed.update(zip(by_first_visit, members, strict=True))
+    return {vi: renamed.get(ci, ci) for vi, ci in hint.items()}
+
+
+def _next_stage(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    solver: cp_model.CpSolver,
+    reached: tuple[cp_model.LinearExprT, bool],
+    objective: tuple[cp_model.LinearExprT, bool],
+) -> None:
+    """Pin the objective a solver reached and optimize the next one from there."""
+    expression, maximized = reached
+    value = round(solver.ObjectiveValue())
+    model.Add(expression >= value if maximized else expression <= value)
+    model.ClearHints()
+    for var in caregiver_visit.values():
+        model.AddHint(var, solver.Value(var))
+    expression, maximize = objective
+    if maximize:
+        model.Maximize(expression)
+    else:
+        model.Minimize(expression)
+
+
+def _solve_lexicographic(
+    model: cp_model.CpModel,
+    caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+    objectives: _Objectives,
+    time_limit: float,
+    num_workers: int,
+    report: SolveReport,
+) -> tuple[cp_model.CpSolver, int]:
+    """
+    Minimize continuity, then travel without giving up any continuity.
+
+    A weighted sum of both objectives is much harder for CP-SAT to close than
+    two successive searches: each search after the first pins the objective
+    reached by the previous one, starts from its solution and uses the time
+    left. Coverage, when the model has it, is maximized before continuity.
+    Each search is recorded on the report under the name of its stage.
+
+    Returns:
+        The solver holding the final solution, and its status
+    """
+    # (objective, maximized) in order; the model starts with the first one
+    stages = [(objectives.continuity, False)]
+    names = ["continuity"]
+    if objectives.travel is not None:
+        stages.append((objectives.travel, False))
+        names.append("travel")
+    if objectives.coverage is not None:
+        stages.insert(0, (objectives.coverage, True))
+        names.insert(0, "coverage")
 
     solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 300.0 #5 mins for a start we can increase depending on the size of the data
-    solver.parameters.num_search_workers = 4 
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = num_workers
     status = solver.Solve(model)
+    report.record_solve(solver, status, names[0])
+    time_left = time_limit - solver.WallTime()
+    for name, reached, objective in zip(names[1:], stages, stages[1:], strict=False):
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) or time_left <= 0:
+            break
+        _next_stage(model, caregiver_visit, solver, reached, objective)
+        stage_solver = cp_model.CpSolver()
+        stage_solver.parameters.max_time_in_seconds = time_left
+        stage_solver.parameters.num_search_workers = num_workers
+        stage_status = stage_solver.Solve(model)
+        report.record_solve(stage_solver, stage_status, name)
+        if stage_status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            # keep the solution of the previous stage
+            break
+        solver, status = stage_solver, stage_status
+        time_left -= solver.WallTime()
+    return solver, status
+
+
+@dataclass
+class _Component:
+    """An independent sub-problem, with indices renumbered from 0."""
+
+    visit_indices: list[int]
+    caregiver_indices: list[int]
+    visits: list[Visit]
+    caregivers: list[Caregiver]
+    eligibility: list[list[int]]
+    # local visit index -> local caregiver index
+    hint: dict[int, int]
+    continuity: str = "max"
+    # share of the instance's time limit, set by _solve_components
+    time_limit: float = TIME_LIMIT_SECONDS
+    partial: bool = False
+    # customer -> ids of caregivers serving it outside the instance
+    served: dict[str, set[str]] | None = None
+
+
+def _solve_component(
+    component: _Component, num_workers: int
+) -> tuple[list[tuple[int, int]] | None, SolveReport]:
+    """
+    Solve one independent part of the problem.
+
+    Runs in a worker process, hence the single picklable argument.
+
+    Returns:
+        The assigned (caregiver index, visit index) pairs, or None when no
+        feasible schedule was found, and the measurements of the solve
+    """
+    report = SolveReport()
+    model, caregiver_visit, objectives = _build_model(
+        component.visits,
+        component.caregivers,
+        component.eligibility,
+        report,
+        component.continuity,
+        component.partial,
+        component.served,
+    )
+    # start the search from the previous schedule where it is still valid
+    hint = canonical_hint(
+        component.hint, caregiver_classes(component.caregivers, component.served)
+    )
+    for vi, ci in hint.items():
+        for cj in component.eligibility[vi]:
+            model.AddHint(caregiver_visit[(cj, vi)], cj == ci)
+
+    # code to start the solver
+
+    with report.phase("solve"):
+        solver, status = _solve_lexicographic(
+            model,
+            caregiver_visit,
+            objectives,
+            component.time_limit,
+            num_workers,
+            report,
+        )
 
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        assignments = []
-        for ci, caregiver in enumerate(caregivers):
-            for vi, visit in enumerate(visits):
-                if solver.Value(caregiver_visit[(ci, vi)]) == 1:
-                    assignment = Assignment(caregiver_id=caregiver.id, visit_id=visit.id)
-                    assignments.append(assignment)
-        return assignments
+        with report.phase("extraction"):
+            pairs = [
+                (ci, vi)
+                for ci, vi in sorted(caregiver_visit)
+                if solver.Value(caregiver_visit[(ci, vi)]) == 1
+            ]
+        return pairs, report
     else:
+        return None, report
+
+
+def _make_components(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    eligibility: list[list[int]],
+    hinted: dict[int, int],
+    continuity: str,
+    partial: bool = False,
+    served: dict[str, set[str]] | None = None,
+) -> list[_Component]:
+    """Split the instance into independent components, renumbered from 0."""
+    components = []
+    for visit_indices, caregiver_indices in connected_components(visits, eligibility):
+        # visits nobody can staff stay unassigned without a model
+        if partial and not caregiver_indices:
+            continue
+        local_vi = {vi: i for i, vi in enumerate(visit_indices)}
+        local_ci = {ci: i for i, ci in enumerate(caregiver_indices)}
+        customers = {visits[vi].customer for vi in visit_indices}
+        components.append(
+            _Component(
+                visit_indices=visit_indices,
+                caregiver_indices=caregiver_indices,
+                visits=[visits[vi] for vi in visit_indices],
+                caregivers=[caregivers[ci] for ci in caregiver_indices],
+                eligibility=[
+                    [local_ci[ci] for ci in eligibility[vi]] for vi in visit_indices
+                ],
+                hint={
+                    local_vi[vi]: local_ci[ci]
+                    for vi, ci in hinted.items()
+                    if vi in local_vi
+                },
+                continuity=continuity,
+                partial=partial,
+                served={
+                    customer: ids
+                    for customer, ids in (served or {}).items()
+                    if customer in customers
+                },
+            )
+        )
+    return components
+
+
+def _solve_components(
+    components: list[_Component], max_workers: int | None, time_limit: float
+) -> list[tuple[list[tuple[int, int]] | None, SolveReport]]:
+    """
+    Solve components, concurrently in a process pool when there are several.
+
+    The time limit is shared by all components. Solved one after the other,
+    each gets an equal part of the time left by the previous ones; in the
+    pool, each gets an equal part per wave of pool_size concurrent solves.
+    """
+    cores = max_workers or os.cpu_count() or 1
+    pool_size = min(cores, len(components))
+    # cores left over by a small number of components go to CP-SAT's workers
+    num_workers = max(1, cores // max(pool_size, 1))
+    if pool_size <= 1:
+        start = time.perf_counter()
+        results = []
+        for i, component in enumerate(components):
+            time_left = max(0.0, time_limit - (time.perf_counter() - start))
+            share = replace(component, time_limit=time_left / (len(components) - i))
+            results.append(_solve_component(share, num_workers))
+        return results
+    waves = -(-len(components) // pool_size)
+    with ProcessPoolExecutor(max_workers=pool_size) as executor:
+        futures = [
+            executor.submit(
+                _solve_component,
+                replace(component, time_limit=max(0.0, time_limit) / waves),
+                num_workers,
+            )
+            for component in components
+        ]
+        return [future.result() for future in futures]
+
+
+def _cache_options(
+    continuity: str,
+    partial: bool,
+    served: dict[str, set[str]] | None = None,
+    time_limit: float = TIME_LIMIT_SECONDS,
+) -> dict[str, str] | None:
+    """Solve options the cached schedule depends on."""
+    # the default options keep the fingerprints of older caches
+    options = {}
+    if continuity != "max":
+        options["continuity"] = continuity
+    if partial:
+        options["coverage"] = "partial"
+    # a longer search may find a better schedule than the cached one
+    if time_limit != TIME_LIMIT_SECONDS:
+        options["time_limit"] = repr(float(time_limit))
+    if served:
+        options["served"] = json.dumps(
+            {customer: sorted(ids) for customer, ids in sorted(served.items())}
+        )
+    return options or None
+
+
+def _solve_instance(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    max_workers: int | None,
+    hint: list[Assignment] | None,
+    report: SolveReport | None,
+    continuity: str,
+    time_limit: float,
+    partial: bool,
+    served: dict[str, set[str]] | None = None,
+) -> list[Assignment]:
+    """Solve an instance as independent components, see solve."""
+    start = time.perf_counter()
+    with timed(report, "eligibility"):
+        eligibility = build_eligibility(visits, caregivers)
+    # presolve builds on this module
+    from .presolve import diagnose
+
+    with timed(report, "presolve"):
+        diagnosis = diagnose(visits, caregivers, eligibility)
+    if report is not None:
+        report.diagnosis = diagnosis.to_dict()
+    if not diagnosis.feasible and not partial:
         return []
+    with timed(report, "decomposition"):
+        hinted = repair_hint(hint, visits, caregivers, eligibility) if hint else {}
+        components = _make_components(
+            visits,
+            caregivers,
+            eligibility,
+            hinted,
+            continuity,
+            partial,
+            served,
+        )
+
+    # the preparation above counts against the time limit too
+    time_left = time_limit - (time.perf_counter() - start)
+    results = _solve_components(components, max_workers, time_left)
+    assigned: list[tuple[int, int]] = []
+    for component, (pairs, component_report) in zip(components, results, strict=True):
+        if report is not None:
+            report.merge(component_report)
+        if pairs is None:
+            return []
+        assigned.extend(
+            (component.caregiver_indices[ci], component.visit_indices[vi])
+            for ci, vi in pairs
+        )
+
+    return [
+        Assignment(caregiver_id=caregivers[ci].id, visit_id=visits[vi].id)
+        for ci, vi in sorted(assigned)
+    ]
+
+
+def solve(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    max_workers: int | None = None,
+    hint: list[Assignment] | None = None,
+    cache_dir: str | None = None,
+    report: SolveReport | None = None,
+    continuity: str = "max",
+    time_limit: float = TIME_LIMIT_SECONDS,
+    partial: bool = False,
+    split_weeks: bool = True,
+    served: dict[str, set[str]] | None = None,
+) -> list[Assignment]:
+    """
+    Solve the scheduling problem.
+
+    Independent components of the problem are solved as separate CP-SAT
+    models, concurrently in a process pool when there are several of them.
+    The instance is first checked by presolve.diagnose: when it proves that
+    not every visit can be staffed, no model is solved and the diagnosis is
+    recorded on the report. Visits spanning several ISO weeks are solved week
+    by week with horizon.solve_weeks.
+
+    Args:
+        visits: List of visits to be assigned
+        caregivers: List of available caregivers
+        max_workers: Number of CPU cores to use, all of them by default
+        hint: A previous schedule (e.g. last week's) to warm-start from;
+            assignments that became infeasible are repaired away
+        cache_dir: Directory of solved instances keyed by input fingerprint;
+            an unchanged instance is returned from it without solving
+        report: If given, collects phase timings, model sizes and CP-SAT
+            statistics
+        continuity: How unique caregivers per customer are combined in the
+            objective: "max" (worst customer), "sum" or "ratio" (the
+            evaluator's continuity score)
+        time_limit: Time limit in seconds of the whole solve, shared by its
+            components and weeks
+        partial: Staff as many visits as possible when not all of them can
+            be, instead of returning no schedule
+        split_weeks: Solve each ISO week separately rather than the whole
+            horizon in one model
+        served: Customer -> ids of the caregivers serving it outside these
+            visits (e.g. in adjacent weeks); continuity counts them as already
+            assigned, so keeping them is free
+
+    Returns:
+        List of Assignment objects representing which caregiver
+          is assigned to which visit; empty when not every visit can be
+          staffed and partial is False
+    """
+    if continuity not in CONTINUITY_OBJECTIVES:
+        raise ValueError(f"Unknown continuity objective: {continuity}")
+
+    fingerprint = None
+    if cache_dir is not None:
+        with timed(report, "cache"):
+            fingerprint = instance_fingerprint(
+                visits,
+                caregivers,
+                _cache_options(continuity, partial, served, time_limit),
+            )
+            cached = load_cached_schedule(cache_dir, fingerprint)
+        if cached is not None:
+            return cached
+
+    if split_weeks and len({iso_week(visit) for visit in visits}) > 1:
+        # horizon builds on this module
+        from .horizon import solve_weeks
+
+        assignments = solve_weeks(
+            visits,
+            caregivers,
+            max_workers,
+            hint,
+            report,
+            continuity,
+            time_limit,
+            partial,
+            served,
+        )
+    else:
+        assignments = _solve_instance(
+            visits,
+            caregivers,
+            max_workers,
+            hint,
+            report,
+            continuity,
+            time_limit,
+            partial,
+            served,
+        )
+    # an empty schedule of a non-empty instance is a failure, not a result
+    if (
+        cache_dir is not None
+        and fingerprint is not None
+        and (assignments or not visits)
+    ):
+        store_cached_schedule(cache_dir, fingerprint, assignments)
+    return assignments
+
+
+@dataclass(frozen=True)
+class SolutionUpdate:
+    """An improving schedule found during the search."""
+
+    assignments: list[Assignment]
+    objective: float
+    best_bound: float
+    # seconds since the search started
+    elapsed: float
+
+
+class _SolutionStreamer(cp_model.CpSolverSolutionCallback):
+    """Pushes every solution CP-SAT finds to a queue read by another thread."""
+
+    def __init__(
+        self,
+        caregiver_visit: dict[tuple[int, int], cp_model.IntVar],
+        visits: list[Visit],
+        caregivers: list[Caregiver],
+        updates: "queue.Queue[SolutionUpdate | None]",
+        objective_threshold: float | None,
+    ) -> None:
+        super().__init__()
+        self._caregiver_visit = sorted(caregiver_visit.items())
+        self._visits = visits
+        self._caregivers = caregivers
+        self._updates = updates
+        self._objective_threshold = objective_threshold
+
+    def on_solution_callback(self) -> None:
+        self._updates.put(
+            SolutionUpdate(
+                assignments=[
+                    Assignment(
+                        caregiver_id=self._caregivers[ci].id,
+                        visit_id=self._visits[vi].id,
+                    )
+                    for (ci, vi), var in self._caregiver_visit
+                    if self.Value(var)
+                ],
+                objective=self.ObjectiveValue(),
+                best_bound=self.BestObjectiveBound(),
+                elapsed=self.WallTime(),
+            )
+        )
+        if (
+            self._objective_threshold is not None
+            and self.ObjectiveValue() <= self._objective_threshold
+        ):
+            self.StopSearch()
+
+
+def iter_solutions(
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+    time_limit: float = TIME_LIMIT_SECONDS,
+    objective_threshold: float | None = None,
+    max_workers: int | None = None,
+    hint: list[Assignment] | None = None,
+    continuity: str = "max",
+    should_stop: Callable[[], bool] | None = None,
+) -> Iterator[SolutionUpdate]:
+    """
+    Yield each improving schedule as soon as CP-SAT finds it.
+
+    The search runs on a background thread and hands solutions over through a
+    queue. It stops at the time limit, once a solution reaches the objective
+    threshold, when should_stop returns True, or when the caller stops
+    iterating. Unlike solve, the instance
+    is searched as a single model, since a schedule is only complete once
+    every component has a solution, and only for continuity, the objective
+    the threshold applies to.
+
+    Args:
+        visits: List of visits to be assigned
+        caregivers: List of available caregivers
+        time_limit: Deadline of the search in seconds
+        objective_threshold: Stop at the first solution with a continuity
+            objective at or below this value
+        max_workers: Number of CP-SAT search workers, all cores by default
+        hint: A previous schedule to warm-start from
+        continuity: Continuity objective, as in solve
+        should_stop: Polled while waiting for solutions, e.g. to cancel the
+            search from another thread or process
+
+    Yields:
+        SolutionUpdate objects, each with a better objective than the last
+    """
+    eligibility = build_eligibility(visits, caregivers)
+    # a visit nobody can staff makes every model infeasible
+    if not all(eligibility):
+        return
+    # only continuity is searched, so the travel variables are left out
+    model, caregiver_visit, _ = _build_model(
+        visits, caregivers, eligibility, continuity=continuity, travel=False
+    )
+    if hint:
+        repaired = repair_hint(hint, visits, caregivers, eligibility)
+        classes = caregiver_classes(caregivers)
+        for vi, ci in canonical_hint(repaired, classes).items():
+            for cj in eligibility[vi]:
+                model.AddHint(caregiver_visit[(cj, vi)], cj == ci)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    solver.parameters.num_search_workers = max_workers or os.cpu_count() or 1
+    updates: queue.Queue[SolutionUpdate | None] = queue.Queue()
+    streamer = _SolutionStreamer(
+        caregiver_visit, visits, caregivers, updates, objective_threshold
+    )
+
+    def search() -> None:
+        try:
+            solver.Solve(model, streamer)
+        finally:
+            # None marks the end of the search
+            updates.put(None)
+
+    thread = threading.Thread(target=search, daemon=True)
+    thread.start()
+    try:
+        while should_stop is None or not should_stop():
+            try:
+                update = updates.get(timeout=_STOP_POLL_SECONDS)
+            except queue.Empty:
+                continue
+            if update is None:
+                return
+            yield update
+    finally:
+        # the caller may stop early: end the search before returning
+        solver.StopSearch()
+        thread.join()
@@ -0,0 +1,67 @@
+"""Tests for the chunked evaluation of assignment logs."""
+
+import random
+from pathlib import Path
+
+from scheduler.audit import EvaluationAggregate, evaluate_chunked, evaluate_file
+from scheduler.evaluator import evaluate
+from scheduler.generator import InstanceConfig, generate_instance
+from scheduler.models import Assignment, Caregiver, Visit
+from scheduler.parser import save_assignments
+
+
+def _random_schedule(
+    seed: int,
+) -> tuple[list[Visit], list[Caregiver], list[Assignment]]:
+    visits, caregivers = generate_instance(
+        InstanceConfig(caregivers=8, visits=300, customers=20, horizon_days=28),
+        seed=seed,
+    )
+    rng = random.Random(seed)
+    # random caregivers break every constraint, and some visits stay unassigned
+    assignments = [
+        Assignment(visit_id=visit.id, caregiver_id=rng.choice(caregivers).id)
+        for visit in visits
+        if rng.random() < 0.9
+    ]
+    return visits, caregivers, assignments
+
+
+def test_evaluate_file_matches_evaluate(tmp_path: Path) -> None:
+    """Chunks evaluated in a pool merge into exactly what evaluate returns."""
+    visits, caregivers, assignments = _random_schedule(seed=3)
+    path = str(tmp_path / "assignments.json")
+    save_assignments(assignments, path)
+
+    expected = evaluate(assignments, visits, caregivers)
+    violations = expected["constraint_violations"]
+    assert all(violations.values())
+
+    assert evaluate_file(path, visits, caregivers, 37, max_workers=2) == expected
+    assert evaluate_chunked(assignments, visits, caregivers, 1000, 1) == expected
+    assert evaluate_chunked([], visits, caregivers, max_workers=1) == evaluate(
+        [], visits, caregivers
+    )
+
+
+def test_aggregate_merge_keeps_first_appearance_order() -> None:
+    """Merged groupings keep customers and caregivers in assignment order."""
+    first = EvaluationAggregate(
+        assignments=1,
+        assigned_visits={"V1"},
+        customer_caregivers={"Bob": {"C2"}},
+        caregiver_visits={"C2": ["V1"]},
+    )
+    second = EvaluationAggregate(
+        assignments=2,
+        assigned_visits={"V2", "V3"},
+        customer_caregivers={"Ann": {"C1"}, "Bob": {"C1"}},
+        caregiver_visits={"C1": ["V2", "V3"]},
+    )
+
+    first.merge(second)
+
+    assert first.assignments == 3
+    assert list(first.customer_caregivers) == ["Bob", "Ann"]
+    assert first.customer_caregivers["Bob"] == {"C1", "C2"}
+    assert list(first.caregiver_visits) == ["C2", "C1"]
@@ -0,0 +1,61 @@
+"""Tests for batch solving."""
+
+import json
+import shutil
+from pathlib import Path
+
+from scheduler.batch import discover_instances, run_batch
+
+
+def _agency(directory: Path) -> None:
+    directory.mkdir(parents=True)
+    shutil.copy("inputs/visits.json", directory / "visits.json")
+    shutil.copy("inputs/caregivers.json", directory / "caregivers.json")
+
+
+def test_discover_instances(tmp_path: Path) -> None:
+    """Instances are found in sub-directories or listed by a manifest."""
+    _agency(tmp_path / "b")
+    _agency(tmp_path / "a")
+    (tmp_path / "notes").mkdir()
+    manifest = tmp_path / "manifest.jsonl"
+    manifest.write_text(
+        json.dumps(
+            {
+                "name": "night",
+                "visits": "a/visits.json",
+                "caregivers": "a/caregivers.json",
+                "workers": 2,
+            }
+        )
+    )
+
+    assert [i.name for i in discover_instances(str(tmp_path))] == ["a", "b"]
+    assert [i.name for i in discover_instances(str(tmp_path / "a"))] == ["a"]
+    (instance,) = discover_instances(str(manifest), time_limit=5.0)
+    assert instance.visits_path == str(tmp_path / "a" / "visits.json")
+    assert (instance.time_limit, instance.workers) == (5.0, 2)
+
+
+def test_run_batch(tmp_path: Path) -> None:
+    """Every instance gets a result line; a broken one does not stop the rest."""
+    _agency(tmp_path / "ok")
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    (broken / "visits.json").write_text('[{"id": "V1"}]')
+    (broken / "caregivers.json").write_text("[]")
+    output = tmp_path / "results.jsonl"
+
+    failures = run_batch(
+        discover_instances(str(tmp_path), time_limit=10.0), str(output), max_cores=2
+    )
+
+    records = {
+        record["name"]: record
+        for record in map(json.loads, output.read_text().splitlines())
+    }
+    assert failures == 1
+    assert records["broken"]["status"] == "error"
+    assert records["ok"]["status"] == "ok"
+    assert len(records["ok"]["assignments"]) == 15
+    assert not any(records["ok"]["evaluation"]["constraint_violations"].values())
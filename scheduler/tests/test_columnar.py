@@ -0,0 +1,94 @@
+"""Tests for the columnar evaluation backend."""
+
+import random
+from pathlib import Path
+
+import numpy as np
+
+from scheduler.columnar import ColumnarInstance
+from scheduler.evaluator import evaluate
+from scheduler.generator import InstanceConfig, generate_instance
+from scheduler.models import Assignment
+from scheduler.parser import load_caregivers, load_columnar, load_visits, save_columnar
+
+
+def test_numpy_backend_matches_python_backend() -> None:
+    """Both evaluation backends return the same results."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    rng = random.Random(0)
+
+    for _ in range(20):
+        assignments = [
+            Assignment(visit_id=visit.id, caregiver_id=rng.choice(caregivers).id)
+            for visit in visits
+            if rng.random() < 0.9
+        ]
+
+        assert evaluate(assignments, visits, caregivers, backend="numpy") == (
+            evaluate(assignments, visits, caregivers)
+        )
+
+
+def test_backends_match_over_several_weeks() -> None:
+    """Both backends check max hours per ISO week over a multi-week horizon."""
+    visits, caregivers = generate_instance(
+        InstanceConfig(caregivers=4, visits=300, customers=20, horizon_days=28),
+        seed=1,
+    )
+    rng = random.Random(1)
+    assignments = [
+        Assignment(visit_id=visit.id, caregiver_id=rng.choice(caregivers).id)
+        for visit in visits
+    ]
+
+    expected = evaluate(assignments, visits, caregivers)
+    weeks = {
+        v["week"] for v in expected["constraint_violations"]["max_hours_violations"]
+    }
+    assert len(weeks) > 1
+    assert evaluate(assignments, visits, caregivers, backend="numpy") == expected
+    instance = ColumnarInstance.from_models(visits, caregivers)
+    assert instance.score(*instance.encode(assignments))["max_hours_violations"] == (
+        len(expected["constraint_violations"]["max_hours_violations"])
+    )
+
+
+def test_score_encoded_schedule() -> None:
+    """Candidate schedules can be scored from their encoded arrays."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    instance = ColumnarInstance.from_models(visits, caregivers)
+    assignments = [
+        Assignment(visit_id=visit.id, caregiver_id=caregivers[0].id) for visit in visits
+    ]
+
+    score = instance.score(*instance.encode(assignments))
+
+    metrics = evaluate(assignments, visits, caregivers)["optimization_metrics"]
+    assert score["continuity_score"] == metrics["continuity_score"]
+    assert score["travel_efficiency_score"] == metrics["travel_efficiency_score"]
+    assert score["max_hours_violations"] == 1
+
+
+def test_columnar_files_round_trip(tmp_path: Path) -> None:
+    """Saved instances and schedules load memory-mapped and decode unchanged."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    assignments = [
+        Assignment(visit_id=visit.id, caregiver_id=caregivers[i % 3].id)
+        for i, visit in enumerate(visits)
+    ]
+    save_columnar(visits, caregivers, str(tmp_path))
+    ColumnarInstance.from_models(visits, caregivers).save_assignments(
+        assignments, str(tmp_path / "schedule.npy")
+    )
+
+    instance = load_columnar(str(tmp_path))
+    codes = instance.load_assignments(str(tmp_path / "schedule.npy"))
+
+    assert isinstance(instance.visit_start, np.memmap)
+    assert instance.to_models() == (visits, caregivers)
+    assert instance.decode(*codes) == assignments
+    metrics = evaluate(assignments, visits, caregivers)["optimization_metrics"]
+    assert instance.continuity_score(*codes) == metrics["continuity_score"]
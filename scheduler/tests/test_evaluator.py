@@ -0,0 +1,156 @@
+"""Tests for the evaluator module."""
+
+from dataclasses import replace
+from datetime import datetime, time, timedelta
+
+from scheduler.audit import evaluate_chunked
+from scheduler.evaluator import (
+    count_overlap_violations,
+    evaluate,
+    has_overlap_violations,
+)
+from scheduler.models import Assignment, Availability, Caregiver, Visit
+from scheduler.scorer import IncrementalScorer
+
+
+def _visit(visit_id: str, start: int, end: int, customer: str, hood: str) -> Visit:
+    return Visit(
+        id=visit_id,
+        start=datetime(2025, 6, 23, start, 0),  # Monday
+        end=datetime(2025, 6, 23, end, 0),
+        customer=customer,
+        required_skill="test",
+        neighborhood=hood,
+    )
+
+
+def _caregiver(caregiver_id: str, max_hours: int) -> Caregiver:
+    return Caregiver(
+        id=caregiver_id,
+        name=caregiver_id,
+        max_hours=max_hours,
+        availability=[Availability(day="MONDAY", start=time(8, 0), end=time(12, 0))],
+        skills=["test"],
+    )
+
+
+def test_evaluate() -> None:
+    """Metrics and violations are computed from one shared pass."""
+    visits = [
+        _visit("V1", 8, 10, "Anna", "Nord"),
+        _visit("V2", 9, 11, "Anna", "Sud"),
+        _visit("V3", 11, 13, "Bob", "Sud"),
+        _visit("V4", 8, 9, "Bob", "Nord"),
+    ]
+    caregivers = [_caregiver("C1", 4), _caregiver("C2", 35)]
+    assignments = [
+        Assignment(visit_id="V1", caregiver_id="C1"),
+        Assignment(visit_id="V2", caregiver_id="C1"),
+        Assignment(visit_id="V3", caregiver_id="C1"),
+    ]
+
+    evaluation = evaluate(assignments, visits, caregivers)
+
+    violations = evaluation["constraint_violations"]
+    assert violations["unassigned_visits"] == ["V4"]
+    # V3 ends at 13:00, after C1's availability
+    assert violations["availability_violations"] == [assignments[2]]
+    assert violations["overlap_violations"] == [
+        {"caregiver_id": "C1", "conflicting_visits": ["V1", "V2"]}
+    ]
+    assert violations["max_hours_violations"] == [
+        {
+            "caregiver_id": "C1",
+            "week": "2025-W26",
+            "assigned_hours": 6.0,
+            "max_hours": 4,
+        }
+    ]
+
+    metrics = evaluation["optimization_metrics"]
+    # Anna: 1 - 1/2, Bob: single visit
+    assert metrics["continuity_score"] == 0.75
+    # One caregiver-day with a single Nord -> Sud switch
+    assert metrics["travel_efficiency_score"] == 0.5
+
+
+def test_overlap_violation_checks() -> None:
+    """The count and first-violation checks agree with the full report."""
+    visits = [
+        _visit("V1", 8, 12, "Anna", "Nord"),
+        _visit("V2", 9, 10, "Anna", "Nord"),
+        _visit("V3", 10, 11, "Anna", "Nord"),
+        _visit("V4", 12, 13, "Anna", "Nord"),  # starts when V1 ends
+    ]
+    assignments = [Assignment(visit_id=v.id, caregiver_id="C1") for v in visits]
+
+    assert count_overlap_violations(assignments, visits) == 2
+    assert has_overlap_violations(assignments, visits)
+    assert not has_overlap_violations(assignments[2:], visits)
+
+
+def test_max_hours_are_weekly() -> None:
+    """Hours are checked against max_hours per ISO week, not over the horizon."""
+    monday = _visit("V1", 8, 11, "Anna", "Nord")
+    visits = [
+        monday,
+        replace(
+            monday,
+            id="V2",
+            start=monday.start + timedelta(days=7),
+            end=monday.end + timedelta(days=7),
+        ),
+        replace(
+            monday,
+            id="V3",
+            start=monday.start + timedelta(days=8, hours=1),
+            end=monday.end + timedelta(days=8),
+        ),
+    ]
+    caregivers = [_caregiver("C1", 4)]
+    assignments = [Assignment(visit_id=v.id, caregiver_id="C1") for v in visits]
+
+    violations = evaluate(assignments, visits, caregivers)["constraint_violations"]
+
+    # 3 hours in week 26, 3 + 2 hours in week 27
+    assert violations["max_hours_violations"] == [
+        {
+            "caregiver_id": "C1",
+            "week": "2025-W27",
+            "assigned_hours": 5.0,
+            "max_hours": 4,
+        }
+    ]
+
+
+def test_max_hours_filled_exactly_in_every_backend() -> None:
+    """Visits filling max_hours exactly are no violation; a second more is."""
+    base = _visit("V0", 8, 9, "Anna", "Nord")
+    duration = timedelta(minutes=70)
+    # six 70 minute visits sum to 7.000000000000001 hours in floats
+    visits = [
+        replace(
+            base,
+            id=f"V{i}",
+            start=base.start + i * duration,
+            end=base.start + (i + 1) * duration,
+        )
+        for i in range(6)
+    ]
+    caregivers = [_caregiver("C1", 7)]
+    longer = visits[:-1] + [
+        replace(visits[-1], end=visits[-1].end + timedelta(seconds=1))
+    ]
+
+    for schedule, expected in ((visits, 0), (longer, 1)):
+        assignments = [Assignment(visit_id=v.id, caregiver_id="C1") for v in schedule]
+        results = [
+            evaluate(assignments, schedule, caregivers),
+            evaluate(assignments, schedule, caregivers, backend="numpy"),
+            evaluate_chunked(assignments, schedule, caregivers, chunk_size=2),
+        ]
+        for result in results:
+            violations = result["constraint_violations"]["max_hours_violations"]
+            assert len(violations) == expected
+        scorer = IncrementalScorer(assignments, schedule, caregivers)
+        assert scorer.score().max_hours_violations == expected
@@ -0,0 +1,42 @@
+"""Tests for the synthetic instance generator and the benchmark."""
+
+from pathlib import Path
+
+from scheduler.benchmark import run_benchmark
+from scheduler.generator import InstanceConfig, generate_instance, write_instance
+from scheduler.parser import load_caregivers, load_visits
+
+
+def test_generate_instance_is_seeded(tmp_path: Path) -> None:
+    """The same seed gives the same instance, which survives a file round trip."""
+    config = InstanceConfig(caregivers=8, visits=50, customers=10)
+
+    visits, caregivers = generate_instance(config, seed=3)
+
+    assert (visits, caregivers) == generate_instance(config, seed=3)
+    assert (visits, caregivers) != generate_instance(config, seed=4)
+    assert len(visits) == 50 and len(caregivers) == 8
+    assert len({visit.customer for visit in visits}) <= 10
+    visits_path, caregivers_path = write_instance(visits, caregivers, str(tmp_path))
+    assert load_visits(visits_path) == visits
+    assert load_caregivers(caregivers_path) == caregivers
+
+
+def test_run_benchmark_records_phases() -> None:
+    """A benchmark record holds every phase timing and the solution quality."""
+    config = InstanceConfig(caregivers=10, visits=20, customers=5)
+
+    record = run_benchmark("tiny", config, time_limit=2.0)
+
+    assert set(record["phases"]) == {
+        "parse",
+        "eligibility",
+        "presolve",
+        "decomposition",
+        "model_build",
+        "solve",
+        "extraction",
+        "evaluate",
+    }
+    assert record["quality"]["status"] in {"OPTIMAL", "FEASIBLE", "INFEASIBLE"}
+    assert "continuity_score" in record["quality"]
@@ -0,0 +1,54 @@
+"""Tests for the greedy and LNS heuristic solver."""
+
+from scheduler.evaluator import evaluate
+from scheduler.heuristic import construct_greedy, iter_schedules, reoptimise
+from scheduler.parser import load_caregivers, load_visits
+from scheduler.scorer import IncrementalScorer
+from scheduler.solver import build_eligibility
+
+
+def test_construct_greedy_is_feasible() -> None:
+    """The greedy schedule staffs every visit without violations."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+
+    assigned = construct_greedy(visits, caregivers)
+
+    assert sorted(assigned) == list(range(len(visits)))
+    eligibility = build_eligibility(visits, caregivers)
+    assert all(ci in eligibility[vi] for vi, ci in assigned.items())
+
+
+def test_reoptimise_keeps_fixed_assignments_compatible() -> None:
+    """Re-optimising a window never clashes with the fixed visits."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    eligibility = build_eligibility(visits, caregivers)
+    assigned = construct_greedy(visits, caregivers, eligibility)
+    free = list(range(0, len(visits), 2))
+
+    result = reoptimise(visits, caregivers, eligibility, assigned, free, 5.0)
+
+    assert result is not None
+    assert sorted(result) == free
+    # visits left unassigned in the window stay out of the schedule
+    assigned.update({vi: ci for vi, ci in result.items() if ci is not None})
+    schedule = IncrementalScorer([], visits, caregivers)
+    for vi, ci in assigned.items():
+        schedule.reassign(visits[vi].id, caregivers[ci].id)
+    assert schedule.score().is_valid
+
+
+def test_iter_schedules_improves() -> None:
+    """Every yielded schedule is valid and at least as good as the previous."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+
+    totals = []
+    for assignments in iter_schedules(visits, caregivers, time_budget=3.0):
+        evaluation = evaluate(assignments, visits, caregivers)
+        assert not any(evaluation["constraint_violations"].values())
+        metrics = evaluation["optimization_metrics"]
+        totals.append(metrics["continuity_score"] + metrics["travel_efficiency_score"])
+
+    assert totals == sorted(totals)
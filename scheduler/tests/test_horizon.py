@@ -0,0 +1,118 @@
+"""Tests for the rolling-horizon decomposition."""
+
+import time as clock
+from datetime import datetime, time
+
+from scheduler.evaluator import evaluate
+from scheduler.generator import InstanceConfig, generate_instance
+from scheduler.horizon import pairing_hint, split_weeks
+from scheduler.models import Assignment, Availability, Caregiver, Visit
+from scheduler.solver import solve
+
+
+def _visit(visit_id: str, day: int, start: int, end: int, customer: str) -> Visit:
+    return Visit(
+        id=visit_id,
+        start=datetime(2025, 6, day, start, 0),
+        end=datetime(2025, 6, day, end, 0),
+        customer=customer,
+        required_skill="hygiene",
+        neighborhood="test",
+    )
+
+
+def _caregiver(caregiver_id: str, max_hours: int) -> Caregiver:
+    return Caregiver(
+        id=caregiver_id,
+        name=caregiver_id,
+        max_hours=max_hours,
+        availability=[Availability(day="MONDAY", start=time(8, 0), end=time(18, 0))],
+        skills=["hygiene"],
+    )
+
+
+def test_split_weeks() -> None:
+    """Visits are grouped by ISO week, merging weeks a visit runs across."""
+    visits = [
+        _visit("V1", 23, 9, 10, "Ann"),  # Monday, week 26
+        _visit("V2", 30, 9, 10, "Ann"),  # Monday, week 27
+        _visit("V3", 24, 9, 10, "Ann"),  # Tuesday, week 26
+    ]
+    assert split_weeks(visits) == [[0, 2], [1]]
+
+    # Sunday 23:00 to Monday 01:00 overlaps a Monday visit at midnight
+    late = Visit(
+        id="V4",
+        start=datetime(2025, 6, 29, 23, 0),
+        end=datetime(2025, 6, 30, 1, 0),
+        customer="Bob",
+        required_skill="hygiene",
+        neighborhood="test",
+    )
+    assert split_weeks([*visits, late]) == [[0, 2, 3], [1]]
+    early = _visit("V5", 30, 0, 2, "Cid")
+    assert split_weeks([*visits, late, early]) == [[0, 2, 3, 1, 4]]
+
+
+def test_pairing_hint() -> None:
+    """Visits are hinted to the caregiver who served their customer most."""
+    visits = [
+        _visit("V1", 23, 9, 10, "Ann"),
+        _visit("V2", 24, 9, 10, "Ann"),
+        _visit("V3", 30, 9, 10, "Ann"),
+        _visit("V4", 30, 11, 12, "Bob"),
+    ]
+    schedule = [
+        Assignment(visit_id="V1", caregiver_id="C2"),
+        Assignment(visit_id="V2", caregiver_id="C2"),
+    ]
+
+    assert pairing_hint(visits, [2, 3], [schedule]) == [
+        Assignment(visit_id="V3", caregiver_id="C2")
+    ]
+
+
+def test_solve_weeks_with_weekly_hours() -> None:
+    """Each week has its own hours budget, and customers keep their caregiver."""
+    visits = [
+        _visit("V1", 23, 9, 11, "Ann"),
+        _visit("V2", 23, 12, 14, "Bob"),
+        _visit("V3", 30, 9, 11, "Ann"),
+        _visit("V4", 30, 12, 14, "Bob"),
+    ]
+    caregivers = [_caregiver("C1", max_hours=2), _caregiver("C2", max_hours=3)]
+
+    assignments = solve(visits, caregivers, max_workers=1)
+
+    caregiver_of = {a.visit_id: a.caregiver_id for a in assignments}
+    # 2 hours each per week: both caregivers work every week
+    assert caregiver_of["V1"] != caregiver_of["V2"]
+    assert caregiver_of["V1"] == caregiver_of["V3"]
+    assert caregiver_of["V2"] == caregiver_of["V4"]
+    evaluation = evaluate(assignments, visits, caregivers)
+    assert not any(evaluation["constraint_violations"].values())
+    # a week needing more hours than the budgets allow is diagnosed
+    extra = _visit("V5", 30, 15, 17, "Cid")
+    assert solve([*visits, extra], caregivers, max_workers=1) == []
+
+
+def test_solve_keeps_served_caregivers() -> None:
+    """A caregiver already serving a customer is kept, even among identical ones."""
+    visits = [_visit("V1", 30, 9, 10, "Ann")]
+    caregivers = [_caregiver("C1", max_hours=8), _caregiver("C2", max_hours=8)]
+
+    assignments = solve(visits, caregivers, max_workers=1, served={"Ann": {"C2"}})
+
+    assert assignments == [Assignment(visit_id="V1", caregiver_id="C2")]
+
+
+def test_solve_weeks_shares_the_time_limit() -> None:
+    """The weeks of a horizon share one time limit rather than one each."""
+    config = InstanceConfig(caregivers=30, visits=400, customers=60, horizon_days=28)
+    visits, caregivers = generate_instance(config, seed=0)
+
+    start = clock.perf_counter()
+    solve(visits, caregivers, max_workers=1, time_limit=1.0, partial=True)
+
+    # four weeks solved one after the other, with room for the model builds
+    assert clock.perf_counter() - start < 2.0
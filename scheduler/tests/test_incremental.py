@@ -0,0 +1,100 @@
+"""Tests for incremental re-scheduling."""
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+from scheduler.evaluator import evaluate
+from scheduler.generator import InstanceConfig, generate_instance
+from scheduler.heuristic import WINDOW_SIZE, construct_greedy
+from scheduler.incremental import CaregiverAbsence, ScheduleChange, reschedule
+from scheduler.models import Assignment
+from scheduler.parser import load_caregivers, load_visits
+from scheduler.solver import solve
+
+
+def test_reschedule_caregiver_absence() -> None:
+    """Visits of an absent caregiver are handed over, the rest is kept."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    assignments = solve(visits, caregivers)
+    absent = assignments[0].caregiver_id
+    change = ScheduleChange(
+        absences=[CaregiverAbsence(absent, datetime(2025, 1, 1), datetime(2030, 1, 1))]
+    )
+
+    updated, rescheduled = reschedule(assignments, visits, caregivers, change)
+
+    assert updated == visits
+    assert all(a.caregiver_id != absent for a in rescheduled)
+    evaluation = evaluate(rescheduled, updated, caregivers)
+    violations = evaluation["constraint_violations"]
+    assert not violations["availability_violations"]
+    assert not violations["overlap_violations"]
+
+
+def test_reschedule_visit_changes() -> None:
+    """Added, cancelled and moved visits are applied to the schedule."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    assignments = solve(visits, caregivers)
+    moved = replace(
+        visits[1],
+        start=visits[1].start + timedelta(hours=1),
+        end=visits[1].end + timedelta(hours=1),
+    )
+    added = replace(visits[2], id="new-visit")
+    change = ScheduleChange(
+        added_visits=[added],
+        cancelled_visit_ids=[visits[0].id],
+        moved_visits=[moved],
+    )
+
+    updated, rescheduled = reschedule(assignments, visits, caregivers, change)
+
+    assert [visit.id for visit in updated] == [
+        *(visit.id for visit in visits[1:]),
+        "new-visit",
+    ]
+    assert updated[0].start == moved.start
+    assert visits[0].id not in {a.visit_id for a in rescheduled}
+    evaluation = evaluate(rescheduled, updated, caregivers)
+    assert not any(evaluation["constraint_violations"].values())
+
+
+def test_reschedule_large_change_keeps_other_assignments() -> None:
+    """A change hitting more than WINDOW_SIZE visits displaces no other one."""
+    visits, caregivers = generate_instance(InstanceConfig(), seed=0)
+    assignments = [
+        Assignment(visit_id=visits[vi].id, caregiver_id=caregivers[ci].id)
+        for vi, ci in construct_greedy(visits, caregivers).items()
+    ]
+    absent = {caregiver.id for caregiver in caregivers[:8]}
+    hit = [a for a in assignments if a.caregiver_id in absent]
+    assert len(hit) > WINDOW_SIZE
+    change = ScheduleChange(
+        absences=[
+            CaregiverAbsence(caregiver_id, datetime(2025, 1, 1), datetime(2030, 1, 1))
+            for caregiver_id in absent
+        ]
+    )
+
+    _, rescheduled = reschedule(assignments, visits, caregivers, change)
+
+    kept = [a for a in assignments if a.caregiver_id not in absent]
+    rescheduled_pairs = {(a.visit_id, a.caregiver_id) for a in rescheduled}
+    assert all((a.visit_id, a.caregiver_id) in rescheduled_pairs for a in kept)
+    assert all(a.caregiver_id not in absent for a in rescheduled)
+
+
+def test_reschedule_rejects_moved_and_cancelled_visit() -> None:
+    """A visit cannot be moved and cancelled by the same change."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    change = ScheduleChange(
+        cancelled_visit_ids=[visits[0].id], moved_visits=[visits[0]]
+    )
+
+    with pytest.raises(ValueError):
+        reschedule([], visits, caregivers, change)
@@ -0,0 +1,52 @@
+"""Tests for the solve report."""
+
+from scheduler.instrumentation import SolveReport
+from scheduler.parser import load_caregivers, load_visits
+from scheduler.solver import solve
+
+
+def test_solve_fills_report() -> None:
+    """Solving with a report records phases, model size and CP-SAT statistics."""
+    report = SolveReport()
+
+    solve(load_visits(), load_caregivers(), report=report)
+
+    assert {"eligibility", "variables", "constraints", "solve", "extraction"} <= set(
+        report.phases
+    )
+    assert report.variables > 0 and report.constraints > 0
+    # one search per lexicographic stage of the single component
+    assert [
+        (stats["component"], stats["stage"], stats["status"]) for stats in report.solves
+    ] == [(0, "continuity", "OPTIMAL"), (0, "travel", "OPTIMAL")]
+    assert all(stats["gap"] == 0.0 for stats in report.solves)
+    assert all(stats["wall_time"] > 0 for stats in report.solves)
+
+
+def test_merge_numbers_components() -> None:
+    """Merged reports keep their searches apart as successive components."""
+    report = SolveReport()
+    for _ in range(2):
+        component_report = SolveReport()
+        solve(load_visits(), load_caregivers(), report=component_report)
+        report.merge(component_report)
+
+    assert [stats["component"] for stats in report.solves] == [0, 0, 1, 1]
+    text = report.to_prometheus()
+    assert 'scheduler_solver_status{component="1",stage="travel",' in text
+
+
+def test_prometheus_format() -> None:
+    """Each metric is declared once, with one sample per phase or component."""
+    report = SolveReport()
+    with report.phase("load"):
+        pass
+    with report.phase("load"):
+        pass
+
+    text = report.to_prometheus()
+
+    assert text.count('scheduler_phase_seconds{phase="load"}') == 1
+    assert (
+        "# TYPE scheduler_model_variables gauge\nscheduler_model_variables 0\n" in text
+    )
@@ -2,7 +2,7 @@
 
 from datetime import datetime, time
 
-from scheduler.models import Availability, Visit
+from scheduler.models import Availability, AvailabilityIndex, Visit
 
 
 def test_check_availability() -> None:
@@ -118,3 +118,50 @@ def test_visit_overlaps():
     )
     assert not base.overlaps(edge_case)
     assert not edge_case.overlaps(base)
+
+
+def test_availability_index_covers() -> None:
+    """The weekday index agrees with checking every availability slot."""
+    availability = [
+        Availability(day="MONDAY", start=time(8, 0), end=time(12, 0)),
+        Availability(day="MONDAY", start=time(9, 0), end=time(10, 0)),
+        Availability(day="MONDAY", start=time(14, 0), end=time(18, 0)),
+    ]
+    index = AvailabilityIndex.from_availability(availability)
+
+    for start, end, expected in [
+        (9, 11, True),  # within the first slot only
+        (14, 18, True),
+        (11, 15, False),  # spans two slots
+        (18, 19, False),
+    ]:
+        visit = Visit(
+            id="V1",
+            start=datetime(2025, 6, 23, start, 0),  # Monday
+            end=datetime(2025, 6, 23, end, 0),
+            customer="Test Customer",
+            required_skill="test",
+            neighborhood="test",
+        )
+        assert index.covers(visit) == expected
+        assert expected == any(av.check_availability(visit) for av in availability)
+
+
+def test_moved_visit_is_checked_at_its_new_time() -> None:
+    """Availability checks follow a visit whose times are changed in place."""
+    availability = Availability(day="TUESDAY", start=time(9, 0), end=time(17, 0))
+    index = AvailabilityIndex.from_availability([availability])
+    visit = Visit(
+        id="V1",
+        start=datetime(2025, 6, 23, 10, 0),  # Monday
+        end=datetime(2025, 6, 23, 12, 0),
+        customer="Test Customer",
+        required_skill="test",
+        neighborhood="test",
+    )
+    assert not availability.check_availability(visit)
+
+    visit.start = datetime(2025, 6, 24, 10, 0)  # Tuesday
+    visit.end = datetime(2025, 6, 24, 12, 0)
+    assert availability.check_availability(visit)
+    assert index.covers(visit)
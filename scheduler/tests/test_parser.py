@@ -0,0 +1,41 @@
+"""Tests for the parser module."""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from scheduler.parser import iter_visits, load_caregivers, load_visits
+
+
+def test_load_visits_from_json_lines(tmp_path: Path) -> None:
+    """JSON Lines files load the same visits as a JSON array."""
+    with open("inputs/visits.json") as f:
+        records = json.load(f)
+    jsonl_path = tmp_path / "visits.jsonl"
+    jsonl_path.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    assert load_visits(str(jsonl_path)) == load_visits()
+
+
+def test_iter_visits_date_range() -> None:
+    """Only visits starting within [start, end) are streamed."""
+    visits = list(iter_visits(start=datetime(2025, 6, 24), end=datetime(2025, 6, 25)))
+
+    assert visits
+    assert all(visit.start.date() == datetime(2025, 6, 24).date() for visit in visits)
+
+
+def test_loaded_models_share_strings() -> None:
+    """Categorical strings are interned when loading."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+
+    # categorical strings are shared between records
+    assert visits[0].customer is visits[2].customer
+    skill = visits[0].required_skill
+    assert all(
+        caregiver_skill is skill
+        for caregiver in caregivers
+        for caregiver_skill in caregiver.skills
+        if caregiver_skill == skill
+    )
@@ -0,0 +1,92 @@
+"""Tests for the presolve checks."""
+
+from datetime import datetime, time, timedelta
+
+from scheduler.models import Availability, Caregiver, Visit
+from scheduler.parser import load_caregivers, load_visits
+from scheduler.presolve import diagnose
+from scheduler.solver import solve
+
+
+def _visit(visit_id: str, start: int, end: int, customer: str) -> Visit:
+    # Monday 2025-06-23
+    return Visit(
+        id=visit_id,
+        start=datetime(2025, 6, 23, start, 0),
+        end=datetime(2025, 6, 23, end, 0),
+        customer=customer,
+        required_skill="hygiene",
+        neighborhood="test",
+    )
+
+
+def _caregiver(caregiver_id: str, max_hours: int = 35) -> Caregiver:
+    return Caregiver(
+        id=caregiver_id,
+        name=caregiver_id,
+        max_hours=max_hours,
+        availability=[Availability(day="MONDAY", start=time(8, 0), end=time(18, 0))],
+        skills=["hygiene"],
+    )
+
+
+def test_diagnose_feasible_inputs() -> None:
+    """The bundled inputs pass every check."""
+    diagnosis = diagnose(load_visits(), load_caregivers())
+
+    assert diagnosis.feasible
+    assert not diagnosis.hours_shortfalls
+    assert diagnosis.continuity_bound["max"] >= 1
+
+
+def test_diagnose_explains_infeasibility() -> None:
+    """Unstaffable visits, overloaded slots and hour shortfalls are reported."""
+    visits = [
+        _visit("V1", 9, 11, "Ann"),
+        _visit("V2", 10, 12, "Ann"),
+        _visit("V3", 10, 11, "Bob"),
+        _visit("V4", 19, 20, "Bob"),  # after every shift
+    ]
+    caregivers = [_caregiver("C1", max_hours=2), _caregiver("C2", max_hours=2)]
+
+    diagnosis = diagnose(visits, caregivers)
+
+    assert not diagnosis.feasible
+    assert diagnosis.unstaffable_visits == ["V4"]
+    assert [(s["visits"], s["unmatched"]) for s in diagnosis.overloaded_slots] == [
+        (["V1", "V2", "V3"], 1)
+    ]
+    assert diagnosis.hours_shortfalls == [
+        {
+            "week": "2025-W26",
+            "skill": "hygiene",
+            "required_hours": 6.0,
+            "capacity_hours": 4.0,
+        }
+    ]
+    assert diagnosis.continuity_lower_bounds == {"Ann": 2, "Bob": 1}
+    assert diagnosis.to_dict()["continuity_bound"] == {"max": 2, "sum": 3}
+
+
+def test_exact_hours_fit_is_feasible() -> None:
+    """Visits filling max_hours exactly are not reported over capacity."""
+    start = datetime(2025, 6, 23, 8, 0)
+    # six 70 minute visits sum to 7.000000000000001 hours in floats
+    visits = [
+        Visit(
+            id=f"V{i}",
+            start=start + i * timedelta(minutes=70),
+            end=start + (i + 1) * timedelta(minutes=70),
+            customer="Ann",
+            required_skill="hygiene",
+            neighborhood="test",
+        )
+        for i in range(6)
+    ]
+    caregivers = [_caregiver("C1", max_hours=7)]
+
+    diagnosis = diagnose(visits, caregivers)
+
+    assert diagnosis.feasible
+    assert not diagnosis.hours_shortfalls
+    assert len(solve(visits, caregivers)) == 6
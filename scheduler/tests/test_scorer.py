@@ -0,0 +1,140 @@
+"""Tests for the incremental scorer."""
+
+from dataclasses import astuple, replace
+from datetime import datetime
+
+import pytest
+
+from scheduler.evaluator import evaluate
+from scheduler.generator import InstanceConfig, generate_instance
+from scheduler.models import Assignment, Caregiver, Visit
+from scheduler.parser import load_caregivers, load_visits
+from scheduler.scorer import IncrementalScorer
+
+
+def _assert_matches_evaluate(
+    scorer: IncrementalScorer,
+    assignments: list[Assignment],
+    visits: list[Visit],
+    caregivers: list[Caregiver],
+) -> None:
+    evaluation = evaluate(assignments, visits, caregivers)
+    metrics = evaluation["optimization_metrics"]
+    violations = evaluation["constraint_violations"]
+    score = scorer.score()
+    assert score.continuity_score == pytest.approx(metrics["continuity_score"])
+    assert score.travel_efficiency_score == pytest.approx(
+        metrics["travel_efficiency_score"]
+    )
+    assert score.availability_violations == len(violations["availability_violations"])
+    assert score.overlap_violations == len(violations["overlap_violations"])
+    assert score.max_hours_violations == len(violations["max_hours_violations"])
+
+
+@pytest.mark.parametrize("same_start", [False, True])
+def test_moves_match_full_evaluation(same_start: bool) -> None:
+    """Scores after reassign, swap and undo match a full evaluate."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    n_caregivers = 3
+    if same_start:
+        # the visits of a day all start together and go to one caregiver, so
+        # only the assignment order ranks them within the day
+        day_start: dict[int, datetime] = {}
+        for visit in visits:
+            day_start[visit.weekday] = min(
+                visit.start, day_start.get(visit.weekday, visit.start)
+            )
+        visits = [
+            replace(
+                visit,
+                start=day_start[visit.weekday],
+                end=day_start[visit.weekday] + (visit.end - visit.start),
+            )
+            for visit in visits
+        ]
+        n_caregivers = 1
+    assignments = [
+        Assignment(visit_id=visit.id, caregiver_id=caregivers[i % n_caregivers].id)
+        for i, visit in enumerate(visits)
+    ]
+    if same_start:
+        neighborhoods = {visit.id: visit.neighborhood for visit in visits}
+        assignments.sort(key=lambda assignment: neighborhoods[assignment.visit_id])
+    scorer = IncrementalScorer(assignments, visits, caregivers)
+    initial = scorer.score()
+    _assert_matches_evaluate(scorer, assignments, visits, caregivers)
+
+    delta = scorer.reassign(visits[0].id, caregivers[4].id)
+    scorer.swap(visits[1].id, visits[2].id)
+    _assert_matches_evaluate(scorer, scorer.assignments(), visits, caregivers)
+
+    scorer.undo()
+    scorer.undo()
+    assert astuple(scorer.score()) == pytest.approx(astuple(initial))
+    assert scorer.reassign_delta(visits[0].id, caregivers[4].id) == delta
+    assert scorer.score() == initial
+
+    # moving a visit away and back makes it the latest assignment
+    caregiver_id = scorer.caregiver_of(visits[-4].id)
+    scorer.reassign(visits[-4].id, caregivers[4].id)
+    scorer.reassign(visits[-4].id, caregiver_id)
+    _assert_matches_evaluate(scorer, scorer.assignments(), visits, caregivers)
+
+
+def test_unassign() -> None:
+    """Reassigning to None leaves the visit unassigned."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    assignments = [
+        Assignment(visit_id=visit.id, caregiver_id=caregivers[0].id) for visit in visits
+    ]
+    scorer = IncrementalScorer(assignments, visits, caregivers)
+
+    delta = scorer.reassign(visits[0].id, None)
+
+    assert delta.unassigned_visits == 1
+    assert scorer.caregiver_of(visits[0].id) is None
+    assert len(scorer.assignments()) == len(visits) - 1
+
+
+def test_unknown_ids_leave_schedule_unchanged() -> None:
+    """Moves with unknown ids raise before touching the schedule."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+    assignments = [
+        Assignment(visit_id=visit.id, caregiver_id=caregivers[0].id) for visit in visits
+    ]
+    scorer = IncrementalScorer(assignments, visits, caregivers)
+    initial = scorer.score()
+
+    with pytest.raises(KeyError):
+        scorer.reassign(visits[0].id, "NOPE")
+    with pytest.raises(KeyError):
+        scorer.swap(visits[0].id, "NOPE")
+
+    assert scorer.score() == initial
+    assert scorer.caregiver_of(visits[0].id) == caregivers[0].id
+    assert scorer.assignments() == assignments
+
+
+def test_max_hours_are_weekly() -> None:
+    """Hours count against max_hours per ISO week, as evaluate checks them."""
+    visits, caregivers = generate_instance(
+        InstanceConfig(caregivers=8, visits=300, customers=20, horizon_days=28),
+        seed=2,
+    )
+    assignments = [
+        Assignment(visit_id=visit.id, caregiver_id=caregivers[i % 2].id)
+        for i, visit in enumerate(visits)
+    ]
+
+    scorer = IncrementalScorer(assignments, visits, caregivers)
+    scorer.reassign(visits[0].id, caregivers[3].id)
+
+    violations = evaluate(scorer.assignments(), visits, caregivers)[
+        "constraint_violations"
+    ]
+    assert scorer.score().max_hours_violations == len(
+        violations["max_hours_violations"]
+    )
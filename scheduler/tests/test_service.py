@@ -0,0 +1,159 @@
+"""Tests for the scheduling service."""
+
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from scheduler.generator import InstanceConfig, generate_instance, write_instance
+from scheduler.service import SchedulingService, _parse_job
+from scheduler.solver import build_eligibility
+
+
+async def _request(
+    port: int, method: str, path: str, payload: Any = None
+) -> tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), content
+
+
+def _instance(directory: str = "inputs") -> dict[str, Any]:
+    with open(f"{directory}/visits.json") as f:
+        visits = json.load(f)
+    with open(f"{directory}/caregivers.json") as f:
+        caregivers = json.load(f)
+    return {"visits": visits, "caregivers": caregivers}
+
+
+class _LateProgressService(SchedulingService):
+    """Starts pumping progress late, as when the event loop is busy."""
+
+    async def _pump_progress(self) -> None:
+        await asyncio.sleep(1.0)
+        await super()._pump_progress()
+
+
+def _run(
+    test: Callable[[int], Awaitable[None]],
+    workers: int = 1,
+    max_pending: int = 4,
+    service_type: type[SchedulingService] = SchedulingService,
+) -> None:
+    async def main() -> None:
+        async with service_type(workers, max_pending) as service:
+            server = await service.serve("127.0.0.1", 0)
+            async with server:
+                await test(server.sockets[0].getsockname()[1])
+
+    asyncio.run(main())
+
+
+def test_submit_stream_and_fetch_result() -> None:
+    """A submitted job streams its progress and ends with a full schedule."""
+
+    async def test(port: int) -> None:
+        status, content = await _request(port, "POST", "/jobs", _instance())
+        assert status == 202
+        job_id = json.loads(content)["id"]
+
+        status, content = await _request(port, "GET", f"/jobs/{job_id}/events")
+        lines = [json.loads(line) for line in content.splitlines()]
+        assert lines[-1] == {"status": "done"}
+        assert len(lines) > 1 and "objective" in lines[0]
+
+        status, content = await _request(port, "GET", f"/jobs/{job_id}/result")
+        result = json.loads(content)
+        assert status == 200
+        assert len(result["assignments"]) == 15
+        assert not any(result["evaluation"]["constraint_violations"].values())
+
+    _run(test)
+
+
+def test_progress_is_recorded_before_the_job_ends() -> None:
+    """A job only ends once all its progress updates have been recorded."""
+
+    async def test(port: int) -> None:
+        content = (await _request(port, "POST", "/jobs", _instance()))[1]
+        job_id = json.loads(content)["id"]
+        # the solve is over before the progress queue starts being pumped
+        for _ in range(100):
+            summary = json.loads((await _request(port, "GET", f"/jobs/{job_id}"))[1])
+            if summary["status"] == "done":
+                break
+            await asyncio.sleep(0.05)
+        assert summary["status"] == "done"
+        assert summary["progress"] is not None
+
+    _run(test, service_type=_LateProgressService)
+
+
+def test_invalid_requests() -> None:
+    """Malformed instances and unknown jobs are rejected."""
+
+    async def test(port: int) -> None:
+        assert (await _request(port, "POST", "/jobs", {"visits": []}))[0] == 400
+        instance = {**_instance(), "continuity": "min"}
+        assert (await _request(port, "POST", "/jobs", instance))[0] == 400
+        assert (await _request(port, "GET", "/jobs/abc123"))[0] == 404
+        assert (await _request(port, "PUT", "/jobs"))[0] == 405
+
+    _run(test)
+
+
+def test_queue_limit_and_cancellation(tmp_path: Path) -> None:
+    """A full queue refuses jobs, and queued or running jobs can be cancelled."""
+    visits, caregivers = generate_instance(
+        InstanceConfig(caregivers=40, visits=400, customers=80), seed=1
+    )
+    eligibility = build_eligibility(visits, caregivers)
+    visits = [
+        visit for visit, eligible in zip(visits, eligibility, strict=True) if eligible
+    ]
+    write_instance(visits, caregivers, str(tmp_path))
+    long_job = {**_instance(str(tmp_path)), "time_limit": 60}
+
+    async def wait_for(port: int, job_id: str, status: str) -> None:
+        for _ in range(300):
+            content = (await _request(port, "GET", f"/jobs/{job_id}"))[1]
+            if json.loads(content)["status"] == status:
+                return
+            await asyncio.sleep(0.05)
+        raise AssertionError(f"job {job_id} never became {status}")
+
+    async def test(port: int) -> None:
+        running = json.loads((await _request(port, "POST", "/jobs", long_job))[1])
+        await wait_for(port, running["id"], "running")
+        queued = json.loads((await _request(port, "POST", "/jobs", _instance()))[1])
+        assert (await _request(port, "POST", "/jobs", _instance()))[0] == 503
+
+        status, _ = await _request(port, "GET", f"/jobs/{queued['id']}/result")
+        assert status == 409
+        await _request(port, "DELETE", f"/jobs/{queued['id']}")
+        await wait_for(port, queued["id"], "cancelled")
+        # the cancelled job no longer takes a place in the queue
+        status, content = await _request(port, "POST", "/jobs", _instance())
+        assert status == 202
+        await _request(port, "DELETE", f"/jobs/{running['id']}")
+        await wait_for(port, running["id"], "cancelled")
+        await wait_for(port, json.loads(content)["id"], "done")
+
+    _run(test, max_pending=1)
+
+
+def test_requested_workers_are_clamped() -> None:
+    """A job never gets more CP-SAT workers than its share of the cores."""
+    body = json.dumps({**_instance(), "workers": 10_000}).encode()
+    assert _parse_job(body, 2).workers == 2
+    body = json.dumps({**_instance(), "workers": 0}).encode()
+    assert _parse_job(body, 2).workers == 1
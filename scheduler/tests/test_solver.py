@@ -0,0 +1,294 @@
+"""Tests for the solver module."""
+
+from dataclasses import replace
+from datetime import datetime, time
+from pathlib import Path
+
+import pytest
+
+from scheduler.cache import instance_fingerprint, store_cached_schedule
+from scheduler.evaluator import evaluate
+from scheduler.instrumentation import SolveReport
+from scheduler.models import Assignment, Availability, Caregiver, Visit
+from scheduler.parser import load_caregivers, load_visits
+from scheduler.solver import (
+    build_eligibility,
+    canonical_hint,
+    caregiver_classes,
+    connected_components,
+    iter_solutions,
+    overlap_cliques,
+    repair_hint,
+    solve,
+)
+
+
+def _visit(visit_id: str, day: int, start: int, end: int, skill: str) -> Visit:
+    return Visit(
+        id=visit_id,
+        start=datetime(2025, 6, day, start, 0),
+        end=datetime(2025, 6, day, end, 0),
+        customer=f"Customer {visit_id}",
+        required_skill=skill,
+        neighborhood="test",
+    )
+
+
+def _caregiver(caregiver_id: str, skills: list[str]) -> Caregiver:
+    return Caregiver(
+        id=caregiver_id,
+        name=caregiver_id,
+        max_hours=35,
+        # Monday 2025-06-23 only
+        availability=[Availability(day="MONDAY", start=time(8, 0), end=time(18, 0))],
+        skills=skills,
+    )
+
+
+def test_build_eligibility() -> None:
+    """Only caregivers with the skill and a covering availability are eligible."""
+    visits = [
+        _visit("V1", 23, 9, 11, "hygiene"),  # Monday, hygiene
+        _visit("V2", 23, 9, 11, "cooking"),  # Monday, cooking
+        _visit("V3", 24, 9, 11, "hygiene"),  # Tuesday, nobody available
+    ]
+    caregivers = [
+        _caregiver("C1", ["hygiene"]),
+        _caregiver("C2", ["cooking", "hygiene"]),
+    ]
+
+    assert build_eligibility(visits, caregivers) == [[0, 1], [1], []]
+
+
+def test_overlap_cliques() -> None:
+    """Each maximal group of mutually overlapping visits is reported once."""
+    visits = [
+        _visit("V1", 23, 9, 12, "test"),
+        _visit("V2", 23, 10, 11, "test"),
+        _visit("V3", 23, 11, 13, "test"),
+        _visit("V4", 23, 13, 14, "test"),  # starts when V3 ends: no overlap
+    ]
+
+    cliques = overlap_cliques(visits)
+
+    assert sorted(sorted(clique) for clique in cliques) == [[0, 1], [0, 2]]
+
+
+def test_solve_assigns_overlapping_visits_to_different_caregivers() -> None:
+    """Overlapping visits are split between eligible caregivers."""
+    visits = [
+        _visit("V1", 23, 9, 11, "hygiene"),
+        _visit("V2", 23, 10, 12, "hygiene"),
+    ]
+    caregivers = [_caregiver("C1", ["hygiene"]), _caregiver("C2", ["hygiene"])]
+
+    assignments = solve(visits, caregivers)
+
+    assert sorted(a.visit_id for a in assignments) == ["V1", "V2"]
+    assert len({a.caregiver_id for a in assignments}) == 2
+
+
+def test_connected_components() -> None:
+    """Visits sharing no caregiver nor customer are solved separately."""
+    visits = [
+        _visit("V1", 23, 9, 11, "hygiene"),
+        _visit("V2", 23, 9, 11, "cooking"),
+        _visit("V3", 23, 12, 13, "hygiene"),
+    ]
+    caregivers = [
+        _caregiver("C1", ["hygiene"]),
+        _caregiver("C2", ["cooking"]),
+        _caregiver("C3", ["driver"]),
+    ]
+
+    components = connected_components(visits, build_eligibility(visits, caregivers))
+
+    assert sorted(components) == [([0, 2], [0]), ([1], [1])]
+
+
+def test_solve_components_in_parallel() -> None:
+    """Components solved in worker processes are merged into one schedule."""
+    visits = [
+        _visit("V1", 23, 9, 11, "hygiene"),
+        _visit("V2", 23, 9, 11, "cooking"),
+    ]
+    caregivers = [_caregiver("C1", ["hygiene"]), _caregiver("C2", ["cooking"])]
+
+    assignments = solve(visits, caregivers, max_workers=2)
+
+    assert {(a.visit_id, a.caregiver_id) for a in assignments} == {
+        ("V1", "C1"),
+        ("V2", "C2"),
+    }
+
+
+def test_repair_hint() -> None:
+    """Hints that became ineligible or overlapping are dropped."""
+    visits = [
+        _visit("V1", 23, 9, 11, "hygiene"),
+        _visit("V2", 23, 10, 12, "hygiene"),  # overlaps V1
+        _visit("V3", 23, 13, 14, "cooking"),
+    ]
+    caregivers = [_caregiver("C1", ["hygiene"]), _caregiver("C2", ["hygiene"])]
+    hint = [
+        Assignment(visit_id="V1", caregiver_id="C1"),
+        Assignment(visit_id="V2", caregiver_id="C1"),
+        Assignment(visit_id="V3", caregiver_id="C2"),  # C2 lost the skill
+        Assignment(visit_id="V9", caregiver_id="C2"),  # visit was cancelled
+    ]
+
+    repaired = repair_hint(
+        hint, visits, caregivers, build_eligibility(visits, caregivers)
+    )
+
+    assert repaired == {0: 0}
+
+
+def test_solve_reuses_cached_schedule(tmp_path: Path) -> None:
+    """An unchanged instance is answered from the cache."""
+    visits = [_visit("V1", 23, 9, 11, "hygiene")]
+    caregivers = [_caregiver("C1", ["hygiene"]), _caregiver("C2", ["hygiene"])]
+    cached = [Assignment(visit_id="V1", caregiver_id="C2")]
+    store_cached_schedule(
+        str(tmp_path), instance_fingerprint(visits, caregivers), cached
+    )
+
+    assert solve(visits, caregivers, cache_dir=str(tmp_path)) == cached
+
+
+def test_cached_schedule_depends_on_time_limit(tmp_path: Path) -> None:
+    """A schedule cached for one time limit is not reused for another."""
+    visits = [_visit("V1", 23, 9, 11, "hygiene")]
+    caregivers = [_caregiver("C1", ["hygiene"]), _caregiver("C2", ["hygiene"])]
+    cached = [Assignment(visit_id="V1", caregiver_id="C2")]
+    store_cached_schedule(
+        str(tmp_path), instance_fingerprint(visits, caregivers), cached
+    )
+
+    assignments = solve(visits, caregivers, cache_dir=str(tmp_path), time_limit=5.0)
+
+    assert assignments == [Assignment(visit_id="V1", caregiver_id="C1")]
+
+
+def test_iter_solutions_streams_improvements() -> None:
+    """Solutions arrive with decreasing objectives, the last one optimal."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+
+    updates = list(iter_solutions(visits, caregivers, max_workers=1))
+
+    assert updates
+    objectives = [update.objective for update in updates]
+    assert objectives == sorted(objectives, reverse=True)
+    assert updates[-1].objective == updates[-1].best_bound
+    assert len(updates[-1].assignments) == len(visits)
+
+
+def test_iter_solutions_stops_early() -> None:
+    """A loose threshold ends the search at the first solution reaching it."""
+    visits = load_visits()
+    caregivers = load_caregivers()
+
+    updates = list(iter_solutions(visits, caregivers, objective_threshold=len(visits)))
+
+    assert len(updates) == 1
+
+
+def test_solve_keeps_caregivers_in_one_neighborhood_per_day() -> None:
+    """Among schedules with the same continuity, fewer switches are preferred."""
+    visits = [
+        replace(_visit(f"V{hour}", 23, hour, hour + 1, "cooking"), neighborhood=area)
+        for hour, area in zip((8, 10, 12, 14), "ABAB", strict=True)
+    ]
+    caregivers = [_caregiver("C1", ["cooking"]), _caregiver("C2", ["cooking"])]
+
+    assignments = solve(visits, caregivers, max_workers=1)
+
+    metrics = evaluate(assignments, visits, caregivers)["optimization_metrics"]
+    assert metrics["travel_efficiency_score"] == 1.0
+
+
+@pytest.mark.parametrize("continuity", ["max", "sum", "ratio"])
+def test_solve_continuity_objectives(continuity: str) -> None:
+    """Every continuity objective gives a customer as few caregivers as possible."""
+    # the two morning visits overlap and need two caregivers, the third one
+    # can reuse either of them
+    visits = [
+        replace(_visit(visit_id, 23, start, end, "cooking"), customer="Customer")
+        for visit_id, start, end in [("V1", 8, 10), ("V2", 9, 11), ("V3", 14, 15)]
+    ]
+    caregivers = [_caregiver(f"C{i}", ["cooking"]) for i in range(1, 4)]
+
+    assignments = solve(visits, caregivers, max_workers=1, continuity=continuity)
+
+    assert len({a.caregiver_id for a in assignments}) == 2
+
+
+def test_solve_rejects_unknown_continuity_objective() -> None:
+    """Unknown objectives fail before any solving."""
+    with pytest.raises(ValueError):
+        solve([], [], continuity="median")
+
+
+def test_caregiver_classes() -> None:
+    """Caregivers with the same skills, availability and max hours are grouped."""
+    caregivers = [
+        _caregiver("C1", ["hygiene", "cooking"]),
+        _caregiver("C2", ["hygiene"]),
+        _caregiver("C3", ["cooking", "hygiene"]),
+        replace(_caregiver("C4", ["hygiene"]), max_hours=20),
+        _caregiver("C5", ["hygiene"]),
+    ]
+
+    assert caregiver_classes(caregivers) == [[0, 2], [1, 4]]
+    # C5 hinted first is renamed to C2, C2 hinted later to C5
+    assert canonical_hint({0: 4, 1: 1, 2: 3}, [[1, 4]]) == {0: 1, 1: 4, 2: 3}
+
+
+def test_solve_breaks_symmetries_between_identical_caregivers() -> None:
+    """Identical caregivers are used in order of their first visit."""
+    visits = [
+        _visit("V1", 23, 9, 11, "hygiene"),
+        _visit("V2", 23, 10, 12, "hygiene"),
+        _visit("V3", 23, 14, 15, "hygiene"),
+    ]
+    caregivers = [_caregiver(f"C{i}", ["hygiene"]) for i in range(1, 5)]
+
+    # any previous schedule is renamed rather than fought against
+    hint = [Assignment(visit_id="V1", caregiver_id="C4")]
+    assignments = solve(visits, caregivers, hint=hint)
+
+    assert [a.caregiver_id for a in assignments if a.visit_id != "V3"] == [
+        "C1",
+        "C2",
+    ]
+    assert evaluate(assignments, visits, caregivers)["constraint_violations"] == {
+        "unassigned_visits": [],
+        "availability_violations": [],
+        "overlap_violations": [],
+        "max_hours_violations": [],
+    }
+
+
+def test_solve_partial_staffs_most_visits() -> None:
+    """Infeasible instances are diagnosed, or partially staffed on request."""
+    visits = [
+        _visit("V1", 23, 9, 11, "hygiene"),
+        _visit("V2", 23, 10, 12, "hygiene"),
+        _visit("V3", 23, 14, 16, "hygiene"),
+        _visit("V4", 24, 9, 11, "hygiene"),  # Tuesday, nobody available
+    ]
+    caregivers = [_caregiver("C1", ["hygiene"])]
+    report = SolveReport()
+
+    assert solve(visits, caregivers, report=report) == []
+    assert report.diagnosis is not None
+    assert report.diagnosis["unstaffable_visits"] == ["V4"]
+    assert "solve" not in report.phases
+
+    assignments = solve(visits, caregivers, partial=True)
+    staffed = {a.visit_id for a in assignments}
+    assert len(staffed) == 2 and "V3" in staffed
+    assert not evaluate(assignments, visits, caregivers)["constraint_violations"][
+        "overlap_violations"
+    ]